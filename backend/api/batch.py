@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional
+
+from django.db import DatabaseError, transaction
+
+from api.parsers import json_loads
+from api.renderers import FoodgramJSONRenderer
+from api.serializers import (
+    RecipeBatchSerializer,
+    RecipeIngredientListSerializer,
+)
+from core.metrics import metrics
+from recipes.jobs import timeline_push_recipes
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeRanking,
+    RecipeTag,
+    Tag,
+)
+from recipes.similarity import RecipeSimilarity
+
+
+class RecipeBatch:
+    """
+    Creates recipes of one author from NDJSON lines and yields one result
+    per line, `{"line": n, "id": id}` or `{"line": n, "errors": ...}`.
+    Lines are handled in chunks of `chunk_size`: ingredients of a chunk
+    are loaded with one query and tags once per batch, valid recipes of a
+    chunk are inserted with their rankings, tags, ingredients and
+    similarity signatures by bulk queries in one transaction.
+    """
+
+    RECIPE_FIELD_NAMES = ('name', 'text', 'image', 'cooking_time')
+
+    def __init__(self, author: Any, chunk_size: int) -> None:
+        self.author = author
+        self.chunk_size = chunk_size
+        self.tags: Optional[dict[int, Tag]] = None
+
+    def stream(self, lines: Iterable[bytes]) -> Iterator[bytes]:
+        renderer = FoodgramJSONRenderer()
+        for result in self.run(lines):
+            yield renderer.render(result) + b'\n'
+
+    def run(self, lines: Iterable[bytes]) -> Iterator[dict[str, Any]]:
+        numbered = ((number, line)
+                    for number, line in enumerate(lines, start=1)
+                    if line.strip())
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                return
+            yield from self.process(chunk)
+
+    def process(self, chunk: list[tuple[int, bytes]]) -> list[dict[str, Any]]:
+        results = {}
+        items = {}
+        for number, line in chunk:
+            try:
+                items[number] = json_loads(line)
+            except ValueError as error:
+                results[number] = {'line': number,
+                                   'errors': f'JSON parse error - {error}'}
+        context = {
+            'tags': self.get_tags(),
+            'ingredients': self.get_ingredients(items.values()),
+        }
+        valid = OrderedDict()
+        for number, item in items.items():
+            serializer = RecipeBatchSerializer(data=item, context=context)
+            if serializer.is_valid():
+                valid[number] = serializer.validated_data
+            else:
+                results[number] = {'line': number,
+                                   'errors': serializer.errors}
+        try:
+            created = self.create(valid)
+        except DatabaseError as error:
+            created = {}
+            for number in valid:
+                results[number] = {'line': number, 'errors': str(error)}
+        for number, recipe_id in created.items():
+            results[number] = {'line': number, 'id': recipe_id}
+        return [results[number] for number, _ in chunk]
+
+    def get_tags(self) -> dict[int, Tag]:
+        if self.tags is None:
+            self.tags = Tag.objects.in_bulk()
+        return self.tags
+
+    def get_ingredients(self, items: Iterable[Any]) -> dict[int, Ingredient]:
+        ids = set()
+        for item in items:
+            if isinstance(item, dict):
+                ids |= RecipeIngredientListSerializer.get_ingredient_ids(
+                    item.get('ingredients')
+                )
+        return Ingredient.objects.in_bulk(ids) if ids else {}
+
+    def create(self, valid: dict[int, OrderedDict]) -> dict[int, int]:
+        if not valid:
+            return {}
+        with transaction.atomic():
+            recipes = Recipe.objects.bulk_create(
+                Recipe(author=self.author, **{
+                    name: data[name]
+                    for name in type(self).RECIPE_FIELD_NAMES
+                })
+                for data in valid.values()
+            )
+            pairs = list(zip(recipes, valid.values()))
+            RecipeRanking.objects.bulk_create(
+                RecipeRanking(recipe=recipe) for recipe in recipes
+            )
+            RecipeTag.objects.bulk_create(
+                RecipeTag(recipe=recipe, tag=tag)
+                for recipe, data in pairs for tag in data['tags']
+            )
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient_id=item['id'],
+                                 amount=item['amount'])
+                for recipe, data in pairs for item in data['ingredients']
+            )
+            RecipeSimilarity.update_many({
+                recipe.id: [item['id'] for item in data['ingredients']]
+                for recipe, data in pairs
+            })
+            recipe_ids = [recipe.id for recipe in recipes]
+            timeline_push_recipes.delay(self.author.id, recipe_ids)
+        metrics.inc('foodgram_recipes_created_total', len(recipe_ids),
+                    source='batch')
+        return dict(zip(valid, recipe_ids))
@@ -1,9 +1,17 @@
 from django_filters import rest_framework as django_filter
+from django.db.models import Exists, OuterRef
 from django.db.models.query import QuerySet
 
-from recipes.models import Recipe, Tag
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    Tag,
+)
 
 BOOLEAN_ENUM = ((0, 'false'), (1, 'true'))
+ORDERING_ENUM = (('popular', 'popular'), ('trending', 'trending'))
 
 
 class RecipeFilter(django_filter.FilterSet):
@@ -16,9 +24,22 @@ class RecipeFilter(django_filter.FilterSet):
         choices=BOOLEAN_ENUM,
         method='filter_shopping'
     )
-    tags = django_filter.MultipleChoiceFilter(
-        field_name='tags__slug',
-        choices=Tag.objects.values_list('slug', 'slug'),
+    tags = django_filter.ModelMultipleChoiceFilter(
+        queryset=Tag.objects.all(),
+        to_field_name='slug',
+        method='filter_tags'
+    )
+    ingredients = django_filter.ModelMultipleChoiceFilter(
+        queryset=Ingredient.objects.all(),
+        method='filter_ingredients'
+    )
+    exclude_ingredients = django_filter.ModelMultipleChoiceFilter(
+        queryset=Ingredient.objects.all(),
+        method='filter_exclude_ingredients'
+    )
+    ordering = django_filter.ChoiceFilter(
+        choices=ORDERING_ENUM,
+        method='filter_ordering'
     )
 
     class Meta:
@@ -32,3 +53,37 @@ class RecipeFilter(django_filter.FilterSet):
     def filter_shopping(self, queryset: QuerySet, name: str,
                         value: bool) -> QuerySet:
         return queryset.filter(is_in_shopping_cart=value)
+
+    def filter_tags(self, queryset: QuerySet, name: str,
+                    value: list[Tag]) -> QuerySet:
+        if not value:
+            return queryset
+        return queryset.filter(Exists(RecipeTag.objects.filter(
+            recipe_id=OuterRef('id'),
+            tag_id__in=[tag.id for tag in value]
+        )))
+
+    def filter_ingredients(self, queryset: QuerySet, name: str,
+                           value: list[Ingredient]) -> QuerySet:
+        for ingredient in value:
+            queryset = queryset.filter(Exists(RecipeIngredient.objects.filter(
+                recipe_id=OuterRef('id'),
+                ingredient_id=ingredient.id
+            )))
+        return queryset
+
+    def filter_exclude_ingredients(self, queryset: QuerySet, name: str,
+                                   value: list[Ingredient]) -> QuerySet:
+        if not value:
+            return queryset
+        return queryset.exclude(Exists(RecipeIngredient.objects.filter(
+            recipe_id=OuterRef('id'),
+            ingredient__in=value
+        )))
+
+    def filter_ordering(self, queryset: QuerySet, name: str,
+                        value: str) -> QuerySet:
+        field = 'favorites' if value == 'popular' else 'trending'
+        return queryset.filter(ranking__isnull=False).order_by(
+            f'-ranking__{field}', '-id'
+        )
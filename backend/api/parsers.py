@@ -0,0 +1,42 @@
+import json
+from typing import IO, Any, Optional
+
+from django.conf import settings
+from rest_framework import exceptions, parsers
+
+from api.renderers import FoodgramJSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+UTF8_ENCODINGS = ('utf-8', 'utf8')
+
+
+def json_loads(data: bytes) -> Any:
+    """ Decodes UTF-8 JSON with `orjson` when it is installed. """
+    if orjson is None:
+        return json.loads(data)
+    return orjson.loads(data)
+
+
+class FoodgramJSONParser(parsers.JSONParser):
+    """
+    Parses UTF-8 request bodies with `orjson` when it is installed and
+    falls back to the stdlib based DRF parser otherwise.
+    """
+
+    renderer_class = FoodgramJSONRenderer
+
+    def parse(self, stream: IO[bytes], media_type: Optional[str] = None,
+              parser_context: Optional[dict[str, Any]] = None) -> Any:
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if (orjson is None or not self.strict
+                or encoding.lower() not in UTF8_ENCODINGS):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as error:
+            raise exceptions.ParseError(f'JSON parse error - {error}')
@@ -1,3 +1,7 @@
+import hmac
+import ipaddress
+
+from django.conf import settings
 from django.db.models import Model
 from rest_framework import permissions, views
 from rest_framework.request import Request
@@ -15,3 +19,25 @@ class AuthorOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         return obj.author.id == request.user.id
+
+
+class MetricsAccess(permissions.BasePermission):
+    """
+    Scrapers from `METRICS_ALLOWED_IPS` addresses or networks, or with the
+    `METRICS_TOKEN` bearer token.
+    """
+
+    NETWORKS = [ipaddress.ip_network(item.strip(), strict=False)
+                for item in settings.METRICS_ALLOWED_IPS if item.strip()]
+
+    def has_permission(self, request: Request, view: views.APIView) -> bool:
+        token = settings.METRICS_TOKEN
+        if token and hmac.compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+        ):
+            return True
+        try:
+            address = ipaddress.ip_address(request.META.get('REMOTE_ADDR'))
+        except ValueError:
+            return False
+        return any(address in network for network in type(self).NETWORKS)
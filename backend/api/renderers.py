@@ -0,0 +1,51 @@
+from typing import Any, Optional
+
+from rest_framework import renderers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class FoodgramJSONRenderer(renderers.JSONRenderer):
+    """
+    Writes UTF-8 JSON with `orjson` when it is installed and falls back to
+    the stdlib based DRF renderer for indented output, for data `orjson`
+    can't encode and when `orjson` is missing. The output is byte for byte
+    the same as the DRF one, except NaN and infinite floats become `null`.
+    """
+
+    ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    ) if orjson else 0
+
+    def render(self, data: Any, accepted_media_type: Optional[str] = None,
+               renderer_context: Optional[dict[str, Any]] = None) -> bytes:
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (orjson is None or indent is not None or not self.compact
+                or self.ensure_ascii):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            result = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=type(self).ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        # Same as DRF, keep the output a strict javascript subset.
+        if LINE_SEPARATOR in result:
+            result = result.replace(LINE_SEPARATOR, b'\\u2028')
+        if PARAGRAPH_SEPARATOR in result:
+            result = result.replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return result
@@ -0,0 +1,246 @@
+from collections import defaultdict
+from typing import Any, Iterable, Optional, Union
+
+from django.db import connections
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.db.models.query import QuerySet
+
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    Tag,
+)
+from users.models import Subscription
+
+RECIPE_IMAGE_STORAGE = Recipe._meta.get_field('image').storage
+
+
+def image_url(name: str) -> Union[str, None]:
+    if not name:
+        return None
+    return RECIPE_IMAGE_STORAGE.url(name)
+
+
+def tag_color(value: int) -> str:
+    return f'#{value:06X}'
+
+
+class ReadOnlyRepresentation:
+    """
+    Read only replacement of a DRF serializer for hot GET endpoints.
+    Produces the same data as the matching serializer from
+    `api.serializers`, but builds plain dicts without field dispatch.
+    """
+
+    def __init__(self, instance: Any = None, many: bool = False,
+                 context: Optional[dict[str, Any]] = None) -> None:
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self) -> Union[list[dict[str, Any]], dict[str, Any]]:
+        if self.many:
+            return self.to_representation_many(self.instance)
+        return self.to_representation(self.instance)
+
+    def to_representation_many(
+            self, instances: Iterable[Any]) -> list[dict[str, Any]]:
+        return [self.to_representation(instance) for instance in instances]
+
+    def to_representation(self, instance: Any) -> dict[str, Any]:
+        raise NotImplementedError()
+
+
+class TagRepresentation(ReadOnlyRepresentation):
+    """ TagSerializer """
+
+    def to_representation(self, tag: Tag) -> dict[str, Any]:
+        return {
+            'id': tag.id,
+            'name': tag.name,
+            'color': tag_color(tag.color),
+            'slug': tag.slug,
+        }
+
+
+class IngredientRepresentation(ReadOnlyRepresentation):
+    """ IngredientSerializer """
+
+    FIELD_NAMES = ('id', 'name', 'measurement_unit')
+
+    def to_representation_many(
+            self, instances: Iterable[Ingredient]) -> list[dict[str, Any]]:
+        if isinstance(instances, QuerySet):
+            return list(instances.values(*type(self).FIELD_NAMES))
+        return super().to_representation_many(instances)
+
+    def to_representation(self, ingredient: Ingredient) -> dict[str, Any]:
+        return {
+            'id': ingredient.id,
+            'name': ingredient.name,
+            'measurement_unit': ingredient.measurement_unit,
+        }
+
+
+class RecipeMinifiedRepresentation(ReadOnlyRepresentation):
+    """ RecipeMinifiedSerializer """
+
+    FIELD_NAMES = ('id', 'name', 'image', 'cooking_time')
+
+    def to_representation(self, recipe: Recipe) -> dict[str, Any]:
+        return {
+            'id': recipe.id,
+            'name': recipe.name,
+            'image': image_url(recipe.image.name),
+            'cooking_time': recipe.cooking_time,
+        }
+
+    @staticmethod
+    def from_values(row: dict[str, Any]) -> dict[str, Any]:
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'image': image_url(row['image']),
+            'cooking_time': row['cooking_time'],
+        }
+
+
+class RecipeReadRepresentation(ReadOnlyRepresentation):
+    """
+    RecipeReadSerializer
+
+    Expects recipes with `author` selected and `tags`,
+    `recipe_ingredient__ingredient` prefetched, see
+    `RecipeBaseView.get_queryset`.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._tags: dict[int, dict[str, Any]] = {}
+
+    def get_tag(self, tag: Tag) -> dict[str, Any]:
+        data = self._tags.get(tag.id)
+        if data is None:
+            data = TagRepresentation().to_representation(tag)
+            self._tags[tag.id] = data
+        return data
+
+    def to_representation(self, recipe: Recipe) -> dict[str, Any]:
+        author = recipe.author
+        return {
+            'id': recipe.id,
+            'name': recipe.name,
+            'text': recipe.text,
+            'image': image_url(recipe.image.name),
+            'cooking_time': recipe.cooking_time,
+            'author': {
+                'id': author.id,
+                'username': author.username,
+                'email': author.email,
+                'first_name': author.first_name,
+                'last_name': author.last_name,
+            },
+            'tags': [self.get_tag(tag) for tag in recipe.tags.all()],
+            'ingredients': [
+                {
+                    'id': item.ingredient.id,
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in recipe.recipe_ingredient.all()
+            ],
+            'is_favorited': getattr(recipe, 'is_favorited', False),
+            'is_in_shopping_cart': getattr(
+                recipe, 'is_in_shopping_cart', False
+            ),
+        }
+
+
+class SubscriptionReadRepresentation(ReadOnlyRepresentation):
+    """
+    SubscriptionReadSerializer
+
+    Recipes and recipes counts of all authors on the page are loaded with
+    one query instead of two queries per subscription.
+    """
+
+    RECIPE_FIELD_NAMES = (*RecipeMinifiedRepresentation.FIELD_NAMES,
+                          'author_id', 'position', 'recipes_count')
+
+    def to_representation(self, subscription: Subscription) -> dict[str, Any]:
+        return self.to_representation_many([subscription])[0]
+
+    def to_representation_many(
+            self, subscriptions: Iterable[Subscription]
+    ) -> list[dict[str, Any]]:
+        subscriptions = list(subscriptions)
+        recipes = self.get_recipes(
+            [subscription.author_id for subscription in subscriptions]
+        )
+        result = []
+        for subscription in subscriptions:
+            author = subscription.author
+            author_recipes = recipes.get(author.id, {})
+            result.append({
+                'id': author.id,
+                'username': author.username,
+                'email': author.email,
+                'first_name': author.first_name,
+                'last_name': author.last_name,
+                'recipes': author_recipes.get('recipes', []),
+                'recipes_count': author_recipes.get('recipes_count', 0),
+                'is_subscribed': getattr(subscription, 'is_subscribed', True),
+            })
+        return result
+
+    def get_recipes(
+            self, author_ids: list[int]
+    ) -> dict[int, dict[str, Any]]:
+        if not author_ids:
+            return {}
+        recipes_limit = self.context.get('recipes_limit')
+        queryset = Recipe.objects.filter(
+            author_id__in=author_ids,
+            deleted=False
+        ).annotate(
+            position=Window(
+                expression=RowNumber(),
+                partition_by=F('author_id'),
+                order_by=F('id').asc(),
+            ),
+            recipes_count=Window(
+                expression=Count('id'),
+                partition_by=F('author_id'),
+            ),
+        ).values(*type(self).RECIPE_FIELD_NAMES)
+        result = defaultdict(lambda: {'recipes': [], 'recipes_count': 0})
+        for row in self._limit_rows(queryset, recipes_limit):
+            author_recipes = result[row['author_id']]
+            author_recipes['recipes_count'] = row['recipes_count']
+            if recipes_limit is None or row['position'] <= recipes_limit:
+                author_recipes['recipes'].append(
+                    RecipeMinifiedRepresentation.from_values(row)
+                )
+        return result
+
+    @classmethod
+    def _limit_rows(cls, queryset: QuerySet,
+                    recipes_limit: Union[int, None]) -> Iterable[dict]:
+        if recipes_limit is None:
+            return queryset
+        # Window expressions can't be filtered in Django 3.2, so the
+        # limit is applied by wrapping the compiled query. The first row
+        # of every author is kept to report recipes count.
+        sql, params = queryset.query.sql_with_params()
+        names = cls.RECIPE_FIELD_NAMES
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                f'SELECT * FROM ({sql}) AS recipes '
+                'WHERE recipes.position <= GREATEST(%s, 1) '
+                'ORDER BY recipes.author_id, recipes.position',
+                (*params, recipes_limit)
+            )
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
@@ -2,24 +2,27 @@ import re
 from typing import Any, Final, Union
 from collections import OrderedDict
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
+from django.db import transaction
 from rest_framework import (
     exceptions,
     serializers,
-    validators,
 )
 from rest_framework.authtoken.models import Token
 
 from core.utils import base64_to_image
+from recipes.jobs import image_deletions
 from recipes.models import (
-    Favorite,
     Ingredient,
-    Shopping,
     Recipe,
     RecipeIngredient,
+    RecipeTag,
     Tag,
 )
+from recipes.pantry import pantry_index
+from recipes.similarity import RecipeSimilarity
 from users.models import Subscription
 
 User = get_user_model()
@@ -32,7 +35,7 @@ class TokenSerializer(serializers.Serializer):
 
     def validate(self, data: OrderedDict) -> OrderedDict:
         try:
-            user = User.objects.get(email=data.get('email'))
+            user = User.objects.get(email=data.get('email'), deleted=False)
         except User.DoesNotExist:
             raise exceptions.AuthenticationFailed()
         if user.check_password(data.get('password')):
@@ -188,6 +191,32 @@ class RecipeImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+class RecipeIngredientListSerializer(serializers.ListSerializer):
+    """
+    Loads all ingredients of the list with one query, a batch passes the
+    ingredients of all its recipes in the `ingredients` context.
+    """
+
+    @staticmethod
+    def get_ingredient_ids(data: Any) -> set[int]:
+        ids = set()
+        if isinstance(data, list):
+            id_field = serializers.IntegerField()
+            for item in data:
+                try:
+                    ids.add(id_field.to_internal_value(item['id']))
+                except (TypeError, KeyError, serializers.ValidationError):
+                    continue
+        return ids
+
+    def to_internal_value(self, data: Any) -> list[OrderedDict]:
+        self.ingredients = self.context.get('ingredients')
+        if self.ingredients is None:
+            ids = self.get_ingredient_ids(data)
+            self.ingredients = Ingredient.objects.in_bulk(ids) if ids else {}
+        return super().to_internal_value(data)
+
+
 class RecipeIngredientWriteSerializer(serializers.Serializer):
 
     id = serializers.IntegerField()
@@ -196,8 +225,11 @@ class RecipeIngredientWriteSerializer(serializers.Serializer):
         min_value=RecipeIngredient.MIN_AMOUNT
     )
 
-    def validate_id(self, value: int) -> Ingredient:
-        if not Ingredient.objects.filter(id=value).exists():
+    class Meta:
+        list_serializer_class = RecipeIngredientListSerializer
+
+    def validate_id(self, value: int) -> int:
+        if value not in self.parent.ingredients:
             raise serializers.ValidationError(
                 f'Ingredient <id={value}> not exist'
             )
@@ -217,6 +249,8 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
     )
     ingredients = RecipeIngredientWriteSerializer(many=True)
 
+    UPDATE_FIELD_NAMES = ('name', 'text', 'image', 'cooking_time')
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'text', 'image', 'cooking_time', 'tags',
@@ -225,13 +259,8 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
 
     def validate_ingredients(
             self, ingredients: list[OrderedDict]) -> list[OrderedDict]:
-        if len(ingredients) < 2:
-            return ingredients
-        for i in range(len(ingredients) - 1):
-            id = ingredients[i]['id']
-            for j in range(i + 1, len(ingredients)):
-                if ingredients[j]['id'] == id:
-                    raise serializers.ValidationError('Incorrect value.')
+        if len({item['id'] for item in ingredients}) < len(ingredients):
+            raise serializers.ValidationError('Incorrect value.')
         return ingredients
 
     def create(self, data: dict[str, Any]) -> Recipe:
@@ -240,23 +269,91 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**data)
         recipe.tags.set(tags_data)
         self.create_ingredients(recipe.id, ingredients_data)
+        RecipeSimilarity.update(
+            recipe.id, [item['id'] for item in ingredients_data]
+        )
         return recipe
 
     def update(self, recipe: Recipe, data: dict[str, Any]) -> Recipe:
-        recipe.name = data.get('name', recipe.name)
-        recipe.text = data.get('text', recipe.text)
-        recipe.image = data.get('image', recipe.image)
-        recipe.cooking_time = data.get('cooking_time', recipe.cooking_time)
-        tags_data = data.get('tags')
-        if tags_data:
-            recipe.tags.set(tags_data)
-        ingredients_data = data.get('ingredients')
-        if ingredients_data:
-            recipe.recipe_ingredient.all().delete()
-            self.create_ingredients(recipe.id, ingredients_data)
-        recipe.save()
+        """
+        Writes only changed columns and rows, tags and ingredients are
+        compared with the prefetched ones and the prefetch caches are
+        replaced, so the response needs no queries. A replaced image is
+        deleted by a job after the transaction commits.
+        """
+        fields = [name for name in type(self).UPDATE_FIELD_NAMES
+                  if name in data and (name == 'image'
+                                       or data[name] != getattr(recipe, name))]
+        with transaction.atomic():
+            if 'image' in fields:
+                image_deletions.add(recipe.image.name)
+            for name in fields:
+                setattr(recipe, name, data[name])
+            if fields:
+                recipe.save(update_fields=fields)
+            if data.get('tags'):
+                self.update_tags(recipe, data['tags'])
+            if data.get('ingredients'):
+                self.update_ingredients(recipe, data['ingredients'])
         return recipe
 
+    def update_tags(self, recipe: Recipe, tags: list[Tag]) -> None:
+        current = {tag.id: tag for tag in recipe.tags.all()}
+        tags = {tag.id: tag for tag in tags}
+        removed = current.keys() - tags.keys()
+        if removed:
+            RecipeTag.objects.filter(recipe=recipe,
+                                     tag_id__in=removed).delete()
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag)
+            for tag_id, tag in tags.items() if tag_id not in current
+        )
+        self.set_prefetched(recipe, 'tags', sorted(
+            tags.values(), key=lambda tag: tag.id
+        ))
+
+    def update_ingredients(self, recipe: Recipe,
+                           data: list[OrderedDict]) -> None:
+        current = {item.ingredient_id: item
+                   for item in recipe.recipe_ingredient.all()}
+        amounts = {item['id']: item['amount'] for item in data}
+        removed = [item.id for ingredient_id, item in current.items()
+                   if ingredient_id not in amounts]
+        changed = []
+        for ingredient_id, item in current.items():
+            if ingredient_id in amounts and (
+                    item.amount != amounts[ingredient_id]):
+                item.amount = amounts[ingredient_id]
+                changed.append(item)
+        ingredients = self.fields['ingredients'].ingredients
+        created = [
+            RecipeIngredient(recipe=recipe,
+                             ingredient=ingredients[ingredient_id],
+                             amount=amount)
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        ]
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if created:
+            RecipeIngredient.objects.bulk_create(created)
+        self.set_prefetched(recipe, 'recipe_ingredient', sorted(
+            [item for ingredient_id, item in current.items()
+             if ingredient_id in amounts] + created,
+            key=lambda item: item.id
+        ))
+        if removed or created:
+            RecipeSimilarity.update(recipe.id, amounts.keys())
+            pantry_index.update(recipe.id, amounts.keys())
+
+    @staticmethod
+    def set_prefetched(recipe: Recipe, name: str, items: list[Any]) -> None:
+        recipe.__dict__.setdefault('_prefetched_objects_cache', {})[
+            name
+        ] = items
+
     def create_ingredients(self, recipe_id: int, data: list[OrderedDict]):
         ingrediets = [
             RecipeIngredient(
@@ -272,6 +369,21 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         return RecipeReadSerializer(recipe).data
 
 
+class RecipeBatchSerializer(RecipeWriteSerializer):
+    """ Takes tags from the `tags` context of a batch. """
+
+    tags = serializers.ListField(child=serializers.IntegerField())
+
+    def validate_tags(self, value: list[int]) -> list[Tag]:
+        tags = self.context['tags']
+        for pk in value:
+            if pk not in tags:
+                raise serializers.ValidationError(
+                    f'Invalid pk "{pk}" - object does not exist.'
+                )
+        return [tags[pk] for pk in dict.fromkeys(value)]
+
+
 class RecipeMinifiedSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -280,36 +392,16 @@ class RecipeMinifiedSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Favorite
-        fields = ('user', 'recipe')
-        validators = [
-            validators.UniqueTogetherValidator(
-                queryset=Favorite.objects.all(),
-                fields=('user', 'recipe'),
-            )
-        ]
+class RecipeIdsSerializer(serializers.Serializer):
 
-    def to_representation(self, favorite: Favorite) -> OrderedDict:
-        return RecipeMinifiedSerializer(instance=favorite.recipe).data
-
-
-class ShoppingSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Shopping
-        fields = ('user', 'recipe')
-        validators = [
-            validators.UniqueTogetherValidator(
-                queryset=Shopping.objects.all(),
-                fields=('user', 'recipe'),
-            )
-        ]
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_MAX_RECIPES
+    )
 
-    def to_representation(self, shopping: Shopping) -> OrderedDict:
-        return RecipeMinifiedSerializer(instance=shopping.recipe).data
+    def validate_recipes(self, value: list[int]) -> list[int]:
+        return list(dict.fromkeys(value))
 
 
 class SubscriptionReadSerializer(serializers.ModelSerializer):
@@ -346,22 +438,3 @@ class SubscriptionReadSerializer(serializers.ModelSerializer):
         if hasattr(subscription, 'is_subscribed'):
             return subscription.is_subscribed
         return True
-
-
-class SubscriptionWriteSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Subscription
-        fields = ('user', 'author')
-        validators = [
-            validators.UniqueTogetherValidator(
-                queryset=Subscription.objects.all(),
-                fields=('user', 'author'),
-            )
-        ]
-
-    def to_representation(self, subscription: Subscription) -> OrderedDict:
-        return SubscriptionReadSerializer(
-            instance=subscription,
-            context=self.context
-        ).data
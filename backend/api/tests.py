@@ -0,0 +1,198 @@
+from typing import Any, Optional
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.representations import (
+    IngredientRepresentation,
+    RecipeMinifiedRepresentation,
+    RecipeReadRepresentation,
+    SubscriptionReadRepresentation,
+    TagRepresentation,
+)
+from api.serializers import (
+    IngredientSerializer,
+    RecipeMinifiedSerializer,
+    RecipeReadSerializer,
+    SubscriptionReadSerializer,
+    TagSerializer,
+)
+from api.views import (
+    IngredientListView,
+    RecipeListView,
+    SubscribtionView,
+)
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Shopping,
+    Tag,
+)
+from users.models import FoodgramUser, Subscription
+
+
+class RepresentationParityTest(TestCase):
+    """
+    Representations of `api.representations` render the same bytes as the
+    serializers they replace, see the `benchserializers` command for
+    their speed.
+    """
+
+    @classmethod
+    def create_user(cls, username: str, first_name: str,
+                    last_name: str) -> FoodgramUser:
+        return FoodgramUser.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='password',
+            first_name=first_name,
+            last_name=last_name,
+        )
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = cls.create_user('reader', 'Иван', 'Петров')
+        cls.author = cls.create_user('author', 'Анна', 'Смирнова')
+        cls.empty_author = cls.create_user('empty', 'Empty', 'Author')
+        breakfast = Tag.objects.create(name='Завтрак', color=0xE26C2D,
+                                       slug='breakfast')
+        dinner = Tag.objects.create(name='Dinner', color=0x49B64E,
+                                    slug='dinner')
+        potato = Ingredient.objects.create(name='картофель',
+                                           measurement_unit='г')
+        milk = Ingredient.objects.create(name='молоко "3,2%"',
+                                         measurement_unit='мл')
+        Ingredient.objects.create(name='salt', measurement_unit='pinch')
+        full = Recipe.objects.create(
+            name='Пюре', text='Сварить картофель.\nРазмять с молоком.',
+            image='recipes/images/пюре.png', cooking_time=30,
+            author=cls.author,
+        )
+        full.tags.set((breakfast, dinner))
+        RecipeIngredient.objects.create(recipe=full, ingredient=potato,
+                                        amount=500)
+        RecipeIngredient.objects.create(recipe=full, ingredient=milk,
+                                        amount=100)
+        # Without tags and ingredients.
+        bare = Recipe.objects.create(
+            name='Water', text='Boil.', image='recipes/images/water.png',
+            cooking_time=1, author=cls.author,
+        )
+        only_tags = Recipe.objects.create(
+            name='Чай', text='Заварить.', image='recipes/images/tea.png',
+            cooking_time=5, author=cls.user,
+        )
+        only_tags.tags.set((breakfast,))
+        Favorite.objects.create(user=cls.user, recipe=full)
+        Shopping.objects.create(user=cls.user, recipe=bare)
+        Subscription.objects.create(user=cls.user, author=cls.author)
+        Subscription.objects.create(user=cls.user, author=cls.empty_author)
+
+    def get_request(self, user: Optional[FoodgramUser] = None):
+        request = APIRequestFactory().get('/')
+        request.user = user or AnonymousUser()
+        return request
+
+    def assertSameOutput(self, serializer: type, representation: type,
+                         instances: Any,
+                         context: Optional[dict[str, Any]] = None) -> None:
+        renderer = JSONRenderer()
+        context = context or {}
+        expected = renderer.render(
+            serializer(instance=instances, many=True, context=context).data
+        )
+        actual = renderer.render(
+            representation(instance=instances, many=True,
+                           context=context).data
+        )
+        self.assertEqual(actual, expected)
+
+    def test_tags(self) -> None:
+        self.assertSameOutput(TagSerializer, TagRepresentation,
+                              list(Tag.objects.all()))
+
+    def test_ingredients(self) -> None:
+        queryset = IngredientListView(
+            request=self.get_request()
+        ).get_queryset()
+        self.assertSameOutput(IngredientSerializer, IngredientRepresentation,
+                              queryset)
+        self.assertSameOutput(IngredientSerializer, IngredientRepresentation,
+                              queryset.none())
+        self.assertSameOutput(IngredientSerializer, IngredientRepresentation,
+                              list(queryset))
+
+    def test_recipes(self) -> None:
+        for user in (None, self.user):
+            with self.subTest(user=user):
+                recipes = list(RecipeListView(
+                    request=self.get_request(user)
+                ).get_queryset())
+                self.assertSameOutput(RecipeReadSerializer,
+                                      RecipeReadRepresentation, recipes)
+                self.assertSameOutput(RecipeMinifiedSerializer,
+                                      RecipeMinifiedRepresentation, recipes)
+
+    def test_recipe_flags(self) -> None:
+        recipes = RecipeListView(
+            request=self.get_request(self.user)
+        ).get_queryset()
+        data = RecipeReadRepresentation(instance=recipes, many=True).data
+        flags = {item['name']: (item['is_favorited'],
+                                item['is_in_shopping_cart'])
+                 for item in data}
+        self.assertEqual(flags, {'Пюре': (True, False),
+                                 'Water': (False, True),
+                                 'Чай': (False, False)})
+
+    def test_subscriptions(self) -> None:
+        subscriptions = list(SubscribtionView(
+            request=self.get_request(self.user)
+        ).get_queryset())
+        for recipes_limit in (0, 1, None):
+            with self.subTest(recipes_limit=recipes_limit):
+                self.assertSameOutput(
+                    SubscriptionReadSerializer,
+                    SubscriptionReadRepresentation,
+                    subscriptions,
+                    {'recipes_limit': recipes_limit}
+                )
+        self.assertSameOutput(SubscriptionReadSerializer,
+                              SubscriptionReadRepresentation, [],
+                              {'recipes_limit': None})
+
+
+class CachedResponseTest(TestCase):
+    """ Cached pages with absolute links are not shared between hosts. """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        author = FoodgramUser.objects.create_user(
+            username='author', email='author@example.com',
+            password='password', first_name='Анна', last_name='Смирнова',
+        )
+        for number in range(3):
+            Recipe.objects.create(
+                name=f'Recipe {number}', text='Text.',
+                image=f'recipes/images/{number}.png', cooking_time=5,
+                author=author,
+            )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_recipe_page_links(self) -> None:
+        path = '/api/recipes/?limit=1'
+        poisoned = self.client.get(path, HTTP_HOST='evil.example')
+        self.assertTrue(
+            poisoned.json()['next'].startswith('http://evil.example/')
+        )
+        response = self.client.get(path)
+        self.assertTrue(
+            response.json()['next'].startswith('http://testserver/')
+        )
@@ -2,11 +2,19 @@ from django.urls import path
 
 from api.views import (
     DownloadShoppingCartView,
+    FavoriteBulkView,
     FavoriteView,
+    FeedView,
     IngredientDetailView,
     IngredientListView,
+    RecipeBatchView,
+    RecipeCookableView,
     RecipeDetailView,
     RecipeListView,
+    RecipeSimilarView,
+    RequestStatsView,
+    ShoppingBulkView,
+    ShoppingFromFavoritesView,
     ShoppingView,
     SubscribeView,
     SubscribtionView,
@@ -53,6 +61,11 @@ urlpatterns = [
         view=SubscribtionView.as_view(),
         name='user-subscribtion'
     ),
+    path(
+        route='users/feed/',
+        view=FeedView.as_view(),
+        name='user-feed'
+    ),
     path(
         route='users/<int:pk>/',
         view=UserDetailView.as_view(),
@@ -88,11 +101,41 @@ urlpatterns = [
         view=RecipeListView.as_view(),
         name='recipe-list'
     ),
+    path(
+        route='recipes/batch/',
+        view=RecipeBatchView.as_view(),
+        name='recipe-batch'
+    ),
+    path(
+        route='recipes/cookable/',
+        view=RecipeCookableView.as_view(),
+        name='recipe-cookable'
+    ),
+    path(
+        route='recipes/favorite/',
+        view=FavoriteBulkView.as_view(),
+        name='favorite-bulk'
+    ),
+    path(
+        route='recipes/shopping_cart/',
+        view=ShoppingBulkView.as_view(),
+        name='shopping-bulk'
+    ),
+    path(
+        route='recipes/shopping_cart/from_favorites/',
+        view=ShoppingFromFavoritesView.as_view(),
+        name='shopping-from-favorites'
+    ),
     path(
         route='recipes/<int:pk>/',
         view=RecipeDetailView.as_view(),
         name='recipe-detail'
     ),
+    path(
+        route='recipes/<int:pk>/similar/',
+        view=RecipeSimilarView.as_view(),
+        name='recipe-similar'
+    ),
     path(
         route='recipes/<int:pk>/favorite/',
         view=FavoriteView.as_view(),
@@ -108,4 +151,9 @@ urlpatterns = [
         view=DownloadShoppingCartView.as_view(),
         name='download-shopping'
     ),
+    path(
+        route='stats/requests/',
+        view=RequestStatsView.as_view(),
+        name='request-stats'
+    ),
 ]
@@ -1,11 +1,14 @@
 import csv
-from typing import Union
+import hashlib
+from typing import Any, Callable, Iterable, Optional, Union
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Exists, OuterRef, Value, Sum
+from django.db import DatabaseError, connection
+from django.db.models import Exists, OuterRef, Prefetch, Value, Sum
 from django.db.models.query import QuerySet
-from django.http.request import QueryDict
-from django.http.response import HttpResponse
+from django.http.request import HttpRequest, QueryDict
+from django.http.response import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters import rest_framework as django_filter
 from rest_framework import (
@@ -18,31 +21,47 @@ from rest_framework import (
 )
 from rest_framework.request import Request
 from rest_framework.response import Response
+from api.batch import RecipeBatch
 from api.filters import RecipeFilter
+from api.representations import (
+    IngredientRepresentation,
+    RecipeMinifiedRepresentation,
+    RecipeReadRepresentation,
+    SubscriptionReadRepresentation,
+)
 from api.serializers import (
-    FavoriteSerializer,
     FoodgramUserSerializer,
-    IngredientSerializer,
     PasswordSerializer,
-    RecipeReadSerializer,
+    RecipeIdsSerializer,
     RecipeWriteSerializer,
-    ShoppingSerializer,
-    SubscriptionReadSerializer,
-    SubscriptionWriteSerializer,
     TagSerializer,
     TokenSerializer
 )
 
-from api.permissions import AuthorOrReadOnly
+from api.permissions import AuthorOrReadOnly, MetricsAccess
+from core.cache import single_flight
+from core.instrumentation import request_stats_buffer
+from core.metrics import metrics
+from core.profiling import RequestProfiler
 from core.utils import str_to_int
+from core.warmup import warm_up
 
+from recipes.jobs import (
+    delete_recipes,
+    timeline_push_recipe,
+    timeline_subscribe,
+)
 from recipes.models import (
     Favorite,
     Ingredient,
     Shopping,
     Recipe,
+    RecipeIngredient,
     Tag,
 )
+from recipes.pantry import pantry_index
+from recipes.similarity import RecipeSimilarity
+from recipes.timeline import Timeline, TimelineFeed
 from users.models import Subscription
 
 User = get_user_model()
@@ -50,12 +69,68 @@ User = get_user_model()
 
 class FoodgramView(views.APIView):
 
+    profiler = None
+    # Seconds responses built with `cached_response` are fresh, None
+    # disables the cache. Expired responses are served `cache_stale`
+    # seconds more while one request rebuilds them.
+    cache_ttl: Optional[float] = None
+    cache_stale: float = 0
+    # Responses with absolute links, like pagination, are cached per
+    # scheme and host, the host comes from the request.
+    cache_per_host = True
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+
+    def initial(self, request: Request, *args, **kwargs) -> None:
+        super().initial(request, *args, **kwargs)
+        if request.user.is_authenticated and request.user.is_admin():
+            self.profiler = RequestProfiler.from_request(request)
+            if self.profiler is not None:
+                self.profiler.start()
+
+    def finalize_response(self, request: Request, response: HttpResponse,
+                          *args, **kwargs) -> HttpResponse:
+        response = super().finalize_response(request, response, *args,
+                                             **kwargs)
+        if self.profiler is None:
+            return response
+        return self.profiler.finish(request, response, type(self).__name__)
+
     def handle_exception(self, error: Exception) -> Response:
         if isinstance(error, exceptions.ValidationError):
             error_data = {'errors': str(error)}
             return Response(error_data, status=status.HTTP_400_BAD_REQUEST)
         return super().handle_exception(error)
 
+    def get_cache_key(self, request: Request) -> Optional[str]:
+        """ Key of the cached response, None skips the cache. """
+        if self.cache_per_host:
+            url = request.build_absolute_uri()
+        else:
+            url = request.get_full_path()
+        path = hashlib.md5(url.encode()).hexdigest()
+        return f'view:{type(self).__name__}:{path}'
+
+    def cached_response(self, request: Request,
+                        get_data: Callable[[], Any]) -> Response:
+        """
+        Response with data of `get_data`, which is computed by one request
+        at a time on a cache miss, see `SingleFlight`.
+        """
+        key = None
+        if self.cache_ttl is not None:
+            key = self.get_cache_key(request)
+        if key is None:
+            return Response(data=get_data(), status=status.HTTP_200_OK)
+        data = single_flight.get(key, get_data, self.cache_ttl,
+                                 self.cache_stale)
+        return Response(data=data, status=status.HTTP_200_OK)
+
 
 class FoodgramModelView(FoodgramView):
 
@@ -113,8 +188,12 @@ class UserBaseView(FoodgramModelView):
             subquery = user.subscription_source.filter(
                 author_id=OuterRef('id')
             )
-            return User.objects.annotate(is_subscribed=Exists(subquery))
-        return User.objects.annotate(is_subscribed=Value(False))
+            return User.objects.filter(deleted=False).annotate(
+                is_subscribed=Exists(subquery)
+            )
+        return User.objects.filter(deleted=False).annotate(
+            is_subscribed=Value(False)
+        )
 
 
 class UserListView(UserBaseView):
@@ -138,6 +217,7 @@ class UserListView(UserBaseView):
         serializer = FoodgramUserSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        metrics.inc('foodgram_users_registered_total')
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -183,18 +263,12 @@ class SubscriptionBaseView(FoodgramModelView):
     def get_queryset(self) -> QuerySet:
         user = self.request.user
         subquery = User.objects.filter(id=OuterRef('user_id'))
-        return user.subscription_source.annotate(
+        return user.subscription_source.filter(
+            author__deleted=False
+        ).select_related('author').annotate(
             is_subscribed=Exists(subquery)
         )
 
-    def get_object(self) -> Union[Subscription, None]:
-        user = self.request.user
-        author = get_object_or_404(User, id=self.kwargs['pk'])
-        try:
-            return Subscription.objects.get(user=user, author=author)
-        except Subscription.DoesNotExist:
-            raise exceptions.ValidationError('Subscription not exist')
-
     def get_recipes_limit(self, data: QueryDict) -> Union[int, None]:
         return str_to_int(data.get('recipes_limit'))
 
@@ -213,7 +287,7 @@ class SubscribtionView(SubscriptionBaseView):
             queryset=self.filter_queryset(),
             request=self.request
         )
-        serializer = SubscriptionReadSerializer(
+        serializer = SubscriptionReadRepresentation(
             instance=queryset,
             context=context,
             many=True
@@ -226,22 +300,51 @@ class SubscribeView(SubscriptionBaseView):
 
     permission_classes = (permissions.IsAuthenticated,)
 
+    AUTHOR_FIELD_NAMES = ('id', 'username', 'email', 'first_name',
+                          'last_name')
+    INSERT_SQL = (
+        f'WITH inserted AS ('
+        f'INSERT INTO {Subscription._meta.db_table} (user_id, author_id) '
+        f'SELECT %(user)s, id FROM {User._meta.db_table} '
+        f'WHERE id = %(author)s AND NOT deleted '
+        f'ON CONFLICT DO NOTHING RETURNING id) '
+        f'SELECT {", ".join(AUTHOR_FIELD_NAMES)}, (SELECT id FROM inserted) '
+        f'FROM {User._meta.db_table} WHERE id = %(author)s AND NOT deleted'
+    )
+    DELETE_SQL = (
+        f'DELETE FROM {Subscription._meta.db_table} '
+        f'WHERE user_id = %s AND author_id = %s'
+    )
+
     def post(self, request: Request, pk: int) -> Response:
-        author = get_object_or_404(User, id=pk)
-        data = {
-            'user': request.user.id,
-            'author': author.id
-        }
+        with connection.cursor() as cursor:
+            cursor.execute(type(self).INSERT_SQL,
+                           {'user': request.user.id, 'author': pk})
+            row = cursor.fetchone()
+        if row is None:
+            raise exceptions.NotFound()
+        *values, subscription_id = row
+        if subscription_id is None:
+            raise exceptions.ValidationError('Subscription already exist')
+        author = User(**dict(zip(type(self).AUTHOR_FIELD_NAMES, values)))
+        subscription = Subscription(id=subscription_id, user=request.user,
+                                    author=author)
         context = {
             'recipes_limit': self.get_recipes_limit(request.query_params)
         }
-        serializer = SubscriptionWriteSerializer(data=data, context=context)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        serializer = SubscriptionReadRepresentation(instance=subscription,
+                                                    context=context)
+        timeline_subscribe.delay(request.user.id, pk)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request: Request, pk: int) -> Response:
-        self.get_object().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(type(self).DELETE_SQL, (request.user.id, pk))
+            deleted = cursor.rowcount
+        if not deleted:
+            get_object_or_404(User.objects.only('id'), id=pk, deleted=False)
+            raise exceptions.ValidationError('Subscription not exist')
+        Timeline.unsubscribe(request.user.id, pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -256,10 +359,17 @@ class TagListView(TagBaseView):
 
     permission_classes = (permissions.AllowAny,)
 
+    cache_ttl = settings.CACHE_TAGS_TTL
+    cache_stale = settings.CACHE_TAGS_STALE
+    cache_per_host = False
+
     def get(self, request: Request) -> Response:
+        return self.cached_response(request, self.get_data)
+
+    def get_data(self) -> list:
         queryset = self.filter_queryset()
         serializer = TagSerializer(instance=queryset, many=True)
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        return serializer.data
 
 
 class TagDetailView(TagBaseView):
@@ -287,10 +397,17 @@ class IngredientListView(IngredientBaseView):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
 
+    cache_ttl = settings.CACHE_INGREDIENTS_TTL
+    cache_stale = settings.CACHE_INGREDIENTS_STALE
+    cache_per_host = False
+
     def get(self, request: Request) -> Response:
+        return self.cached_response(request, self.get_data)
+
+    def get_data(self) -> list:
         queryset = self.filter_queryset()
-        serializer = IngredientSerializer(instance=queryset, many=True)
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        serializer = IngredientRepresentation(instance=queryset, many=True)
+        return serializer.data
 
 
 class IngredientDetailView(IngredientBaseView):
@@ -300,7 +417,7 @@ class IngredientDetailView(IngredientBaseView):
 
     def get(self, request: Request, pk: int) -> Response:
         ingredient = self.get_object()
-        serializer = IngredientSerializer(instance=ingredient)
+        serializer = IngredientRepresentation(instance=ingredient)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
 
@@ -308,6 +425,15 @@ class RecipeBaseView(FoodgramModelView):
 
     def get_queryset(self) -> QuerySet:
         user = self.request.user
+        queryset = Recipe.objects.filter(
+            deleted=False
+        ).select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            )
+        )
         if user.is_authenticated:
             favorite = Favorite.objects.filter(
                 user=user,
@@ -317,11 +443,11 @@ class RecipeBaseView(FoodgramModelView):
                 user=user,
                 recipe_id=OuterRef('id')
             )
-            return Recipe.objects.annotate(
+            return queryset.annotate(
                 is_favorited=Exists(favorite),
                 is_in_shopping_cart=Exists(shopping)
             )
-        return Recipe.objects.annotate(
+        return queryset.annotate(
             is_favorited=Value(False),
             is_in_shopping_cart=Value(False)
         )
@@ -335,22 +461,87 @@ class RecipeListView(RecipeBaseView):
     filter_backends = (django_filter.DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    cache_ttl = settings.CACHE_RECIPES_TTL
+    cache_stale = settings.CACHE_RECIPES_STALE
+
+    def get_cache_key(self, request: Request) -> Optional[str]:
+        # Pages of users differ by favorites and shopping carts.
+        if request.user.is_authenticated:
+            return None
+        return super().get_cache_key(request)
+
     def get(self, request: Request) -> Response:
+        return self.cached_response(request, self.get_data)
+
+    def get_data(self) -> dict:
         paginator = FoodgramPaginator()
         queryset = paginator.paginate_queryset(
             queryset=self.filter_queryset(),
             request=self.request
         )
-        serializer = RecipeReadSerializer(instance=queryset, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        serializer = RecipeReadRepresentation(instance=queryset, many=True)
+        return paginator.get_paginated_response(serializer.data).data
 
     def post(self, request: Request) -> Response:
         serializer = RecipeWriteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(author=request.user)
+        recipe = serializer.save(author=request.user)
+        timeline_push_recipe.delay(recipe.id)
+        metrics.inc('foodgram_recipes_created_total', source='api')
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class RecipeBatchView(FoodgramView):
+    """ api/recipes/batch/ """
+
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request: Request) -> HttpResponse:
+        lines = self.get_lines(request)
+        if lines is None:
+            error_data = {'errors': 'Content-Length header is required.'}
+            return Response(error_data,
+                            status=status.HTTP_411_LENGTH_REQUIRED)
+        batch = RecipeBatch(request.user, settings.BATCH_CHUNK_SIZE)
+        return StreamingHttpResponse(
+            batch.stream(lines),
+            content_type='application/x-ndjson'
+        )
+
+    @staticmethod
+    def get_lines(request: Request) -> Optional[Iterable[bytes]]:
+        """
+        Lines of the request body, None if its end can't be found: a body
+        without `Content-Length` (chunked) is read up to the end of the
+        input only from servers that mark it, like gunicorn.
+        """
+        if request.META.get('CONTENT_LENGTH'):
+            return request.stream or ()
+        if request.META.get('wsgi.input_terminated'):
+            return request.META['wsgi.input']
+        return None
+
+
+class FeedView(RecipeBaseView):
+    """ api/users/feed/ """
+
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request: Request) -> Response:
+        paginator = FoodgramPaginator()
+        ids = paginator.paginate_queryset(
+            queryset=TimelineFeed(request.user.id),
+            request=self.request
+        )
+        recipes = self.get_queryset().in_bulk(ids)
+        serializer = RecipeReadRepresentation(
+            instance=[recipes[recipe_id] for recipe_id in ids
+                      if recipe_id in recipes],
+            many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+
 class RecipeDetailView(RecipeBaseView):
     """ api/recipes/<int:pk>/ """
 
@@ -358,7 +549,7 @@ class RecipeDetailView(RecipeBaseView):
 
     def get(self, request: Request, pk: int) -> Response:
         recipe = self.get_object()
-        serializer = RecipeReadSerializer(instance=recipe)
+        serializer = RecipeReadRepresentation(instance=recipe)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
     def patch(self, request: Request, pk: int) -> Response:
@@ -373,93 +564,216 @@ class RecipeDetailView(RecipeBaseView):
 
     def delete(self, request: Request, pk: int) -> Response:
         recipe = self.get_object()
-        recipe.delete()
+        delete_recipes([recipe.id])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class FavoriteBaseView(FoodgramModelView):
+class RecipeCookableView(RecipeBaseView):
+    """ api/recipes/cookable/ """
 
-    def get_queryset(self) -> QuerySet:
-        return Favorite.objects.all()
+    permission_classes = (permissions.AllowAny,)
 
-    def get_object(self) -> Favorite:
-        user = self.request.user
-        try:
-            recipe = Recipe.objects.get(id=self.kwargs['pk'])
-            favorite = Favorite.objects.get(user=user, recipe=recipe)
-        except Recipe.DoesNotExist:
-            raise exceptions.ValidationError('Recipe not exist')
-        except Favorite.DoesNotExist:
-            raise exceptions.ValidationError('Favorite not exist')
-        else:
-            return favorite
+    def get(self, request: Request) -> Response:
+        ingredient_ids = [
+            str_to_int(value)
+            for value in request.query_params.getlist('ingredients')
+        ]
+        missing = str_to_int(request.query_params.get('missing', '0'))
+        if None in ingredient_ids or missing is None:
+            raise exceptions.ValidationError('Incorrect value.')
+        if not 0 <= missing <= settings.PANTRY_MAX_MISSING:
+            raise exceptions.ValidationError(
+                f'missing must be between 0 and '
+                f'{settings.PANTRY_MAX_MISSING}.'
+            )
+        paginator = FoodgramPaginator()
+        ids = paginator.paginate_queryset(
+            queryset=pantry_index.cookable(ingredient_ids, missing),
+            request=self.request
+        )
+        recipes = self.get_queryset().in_bulk(ids)
+        serializer = RecipeReadRepresentation(
+            instance=[recipes[recipe_id] for recipe_id in ids
+                      if recipe_id in recipes],
+            many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
 
 
-class FavoriteView(FavoriteBaseView):
-    """ api/recipes/<int:pk>/favorite/ """
+class RecipeSimilarView(RecipeBaseView):
+    """ api/recipes/<int:pk>/similar/ """
+
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request: Request, pk: int) -> Response:
+        get_object_or_404(Recipe.objects.only('id'), id=pk, deleted=False)
+        paginator = FoodgramPaginator()
+        ids = paginator.paginate_queryset(
+            queryset=RecipeSimilarity.similar(pk),
+            request=self.request
+        )
+        recipes = self.get_queryset().in_bulk(ids)
+        serializer = RecipeReadRepresentation(
+            instance=[recipes[recipe_id] for recipe_id in ids
+                      if recipe_id in recipes],
+            many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+
+class UserRecipeView(FoodgramView):
+    """
+    Adds or removes one recipe with a single statement. Duplicates are
+    reported by the unique constraint on user and recipe, existence of the
+    recipe is checked only when nothing was deleted.
+    """
 
     permission_classes = (permissions.IsAuthenticated,)
 
+    model = None
+
+    INSERT_SQL = (
+        'WITH inserted AS ('
+        'INSERT INTO {links} (user_id, recipe_id, created) '
+        'SELECT %(user)s, id, NOW() FROM {recipes} '
+        'WHERE id = %(recipe)s AND NOT deleted '
+        'ON CONFLICT DO NOTHING RETURNING recipe_id) '
+        'SELECT recipe.id, recipe.name, recipe.image, recipe.cooking_time, '
+        'EXISTS (SELECT 1 FROM inserted) '
+        'FROM {recipes} AS recipe '
+        'WHERE recipe.id = %(recipe)s AND NOT recipe.deleted'
+    )
+    DELETE_SQL = 'DELETE FROM {links} WHERE user_id = %s AND recipe_id = %s'
+
+    def get_sql(self, sql: str) -> str:
+        return sql.format(links=type(self).model._meta.db_table,
+                          recipes=Recipe._meta.db_table)
+
     def post(self, request: Request, pk: int) -> Response:
-        data = {
-            'user': request.user.id,
-            'recipe': pk,
-        }
-        serializer = FavoriteSerializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        name = type(self).model.__name__
+        with connection.cursor() as cursor:
+            cursor.execute(self.get_sql(type(self).INSERT_SQL),
+                           {'user': request.user.id, 'recipe': pk})
+            row = cursor.fetchone()
+        if row is None:
+            raise exceptions.ValidationError('Recipe not exist')
+        *values, inserted = row
+        if not inserted:
+            raise exceptions.ValidationError(f'{name} already exist')
+        data = RecipeMinifiedRepresentation.from_values(
+            dict(zip(RecipeMinifiedRepresentation.FIELD_NAMES, values))
+        )
+        return Response(data, status=status.HTTP_201_CREATED)
 
     def delete(self, request: Request, pk: int) -> Response:
-        self.get_object().delete()
+        name = type(self).model.__name__
+        with connection.cursor() as cursor:
+            cursor.execute(self.get_sql(type(self).DELETE_SQL),
+                           (request.user.id, pk))
+            deleted = cursor.rowcount
+        if not deleted:
+            if not Recipe.objects.filter(id=pk, deleted=False).exists():
+                raise exceptions.ValidationError('Recipe not exist')
+            raise exceptions.ValidationError(f'{name} not exist')
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ShoppingBaseView(FoodgramModelView):
-
-    def get_queryset(self) -> QuerySet:
-        return Shopping.objects.all()
+class FavoriteView(UserRecipeView):
+    """ api/recipes/<int:pk>/favorite/ """
 
-    def get_object(self) -> Shopping:
-        user = self.request.user
-        try:
-            recipe = Recipe.objects.get(id=self.kwargs['pk'])
-            shopping = Shopping.objects.get(user=user, recipe=recipe)
-        except Recipe.DoesNotExist:
-            raise exceptions.ValidationError('Recipe not exist')
-        except Shopping.DoesNotExist:
-            raise exceptions.ValidationError('Shopping not exist')
-        else:
-            return shopping
+    model = Favorite
 
 
-class ShoppingView(ShoppingBaseView):
+class ShoppingView(UserRecipeView):
     """ api/recipes/<int:pk>/shopping_cart/ """
 
+    model = Shopping
+
+
+class UserRecipeBulkView(FoodgramView):
+    """
+    Adds or removes a list of recipes with one query for the recipes and
+    one INSERT ... ON CONFLICT DO NOTHING or DELETE for the links.
+    """
+
     permission_classes = (permissions.IsAuthenticated,)
 
-    def post(self, request: Request, pk: int) -> Response:
-        data = {
-            'user': request.user.id,
-            'recipe': pk,
-        }
-        serializer = ShoppingSerializer(data=data)
+    model = None
+
+    def get_recipe_ids(self, request: Request) -> list[int]:
+        serializer = RecipeIdsSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        return serializer.validated_data['recipes']
+
+    def post(self, request: Request) -> Response:
+        model = type(self).model
+        recipe_ids = self.get_recipe_ids(request)
+        recipes = Recipe.objects.filter(deleted=False).only(
+            *RecipeMinifiedRepresentation.FIELD_NAMES
+        ).in_bulk(recipe_ids)
+        if len(recipes) != len(recipe_ids):
+            raise exceptions.ValidationError('Recipe not exist')
+        model.objects.bulk_create(
+            (model(user=request.user, recipe_id=recipe_id)
+             for recipe_id in recipe_ids),
+            ignore_conflicts=True
+        )
+        serializer = RecipeMinifiedRepresentation(
+            instance=[recipes[recipe_id] for recipe_id in recipe_ids],
+            many=True
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    def delete(self, request: Request, pk: int) -> Response:
-        self.get_object().delete()
+    def delete(self, request: Request) -> Response:
+        type(self).model.objects.filter(
+            user=request.user,
+            recipe_id__in=self.get_recipe_ids(request)
+        ).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class FavoriteBulkView(UserRecipeBulkView):
+    """ api/recipes/favorite/ """
+
+    model = Favorite
+
+
+class ShoppingBulkView(UserRecipeBulkView):
+    """ api/recipes/shopping_cart/ """
+
+    model = Shopping
+
+
+class ShoppingFromFavoritesView(FoodgramView):
+    """ api/recipes/shopping_cart/from_favorites/ """
+
+    permission_classes = (permissions.IsAuthenticated,)
+
+    COPY_SQL = (
+        f'INSERT INTO {Shopping._meta.db_table} (user_id, recipe_id, created) '
+        f'SELECT favorite.user_id, favorite.recipe_id, NOW() '
+        f'FROM {Favorite._meta.db_table} AS favorite '
+        f'JOIN {Recipe._meta.db_table} AS recipe '
+        f'ON recipe.id = favorite.recipe_id AND NOT recipe.deleted '
+        f'WHERE favorite.user_id = %s ORDER BY favorite.id '
+        f'ON CONFLICT DO NOTHING'
+    )
+
+    def post(self, request: Request) -> Response:
+        with connection.cursor() as cursor:
+            cursor.execute(type(self).COPY_SQL, (request.user.id,))
+            added = cursor.rowcount
+        return Response(data={'added': added}, status=status.HTTP_201_CREATED)
+
+
 class DownloadShoppingCartBaseView(FoodgramModelView):
 
     FIELD_NAMES = ('name', 'measurement_unit', 'total')
 
     def get_queryset(self) -> QuerySet:
         return Ingredient.objects.filter(
-            recipe_ingredient__recipe__shopping_recipe__user=self.request.user
+            recipe_ingredient__recipe__shopping_recipe__user=self.request.user,
+            recipe_ingredient__recipe__deleted=False
         ).annotate(
             total=Sum('recipe_ingredient__amount')
         ).values_list(
@@ -485,4 +799,58 @@ class DownloadShoppingCartView(DownloadShoppingCartBaseView):
         writer = csv.writer(response)
         writer.writerow(type(self).FIELD_NAMES)
         writer.writerows(queryset)
+        metrics.inc('foodgram_shopping_cart_downloads_total')
         return response
+
+
+class RequestStatsView(FoodgramView):
+    """ api/stats/requests/ """
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request: Request) -> Response:
+        if not request_stats_buffer.enabled:
+            raise exceptions.NotFound('Request stats buffer is disabled')
+        data = request_stats_buffer.latest(
+            view=request.query_params.get('view'),
+            limit=str_to_int(request.query_params.get('limit'))
+        )
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+class MetricsView(FoodgramView):
+    """ metrics """
+
+    authentication_classes = ()
+    permission_classes = (MetricsAccess,)
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def get(self, request: Request) -> HttpResponse:
+        return HttpResponse(metrics.render(),
+                            content_type=type(self).CONTENT_TYPE)
+
+
+class ReadinessView(FoodgramView):
+    """ ready """
+
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request: Request) -> Response:
+        try:
+            connection.ensure_connection()
+            database = connection.is_usable()
+        except DatabaseError:
+            database = False
+        ready = warm_up.ensure() and database
+        data = {
+            'ready': ready,
+            'database': database,
+            'warm_up_ms': warm_up.timings,
+        }
+        return Response(
+            data=data,
+            status=(status.HTTP_200_OK if ready
+                    else status.HTTP_503_SERVICE_UNAVAILABLE)
+        )
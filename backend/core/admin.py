@@ -0,0 +1,109 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.db.models import Model
+from django.db.models.query import QuerySet
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.safestring import SafeText
+
+from core.models import Job, ProfileReport
+
+
+class SoftDeleteAdminMixin:
+    """
+    Deletions hide the objects with `soft_delete(ids)` and leave related
+    objects to a background purge. The confirmation page lists only the
+    selected objects instead of collecting all related objects.
+    """
+
+    soft_delete = None
+
+    def delete_model(self, request, obj: Model) -> None:
+        self.soft_delete([obj.pk])
+
+    def delete_queryset(self, request, queryset: QuerySet) -> None:
+        self.soft_delete(list(queryset.values_list('pk', flat=True)))
+
+    def get_deleted_objects(self, objs, request) -> tuple:
+        objs = list(objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        return [str(obj) for obj in objs], model_count, set(), []
+
+
+@admin.register(ProfileReport)
+class ProfileReportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created', 'user', 'method', 'path', 'view',
+                    'status', 'duration', 'download_link')
+    fields = ('created', 'user', 'method', 'path', 'view', 'status',
+              'duration', 'download_link', 'summary_text')
+    readonly_fields = fields
+    list_filter = ('view', 'method')
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def get_urls(self) -> list:
+        return [
+            path(
+                '<int:report_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_profilereport_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, report_id: int) -> FileResponse:
+        """ Profiles are stored outside MEDIA_ROOT and served only here. """
+        report = get_object_or_404(ProfileReport, id=report_id)
+        if not self.has_view_permission(request, report):
+            raise PermissionDenied
+        if not report.file or not report.file.storage.exists(
+            report.file.name
+        ):
+            raise Http404
+        return FileResponse(report.file.open('rb'), as_attachment=True,
+                            filename=f'profile-{report.id}.prof')
+
+    def download_link(self, report: ProfileReport) -> SafeText:
+        url = reverse('admin:core_profilereport_download', args=(report.id,))
+        return format_html('<a href="{}">{}</a>', url, 'Скачать')
+
+    download_link.short_description = 'Файл профиля'
+
+    def summary_text(self, report: ProfileReport) -> SafeText:
+        return format_html('<pre>{}</pre>', report.summary)
+
+    summary_text.short_description = 'Сводка'
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'priority', 'attempts',
+                    'max_attempts', 'run_at', 'locked_by', 'finished')
+    fields = ('name', 'args', 'status', 'priority', 'attempts',
+              'max_attempts', 'created', 'run_at', 'locked_by', 'locked_at',
+              'finished', 'last_error_text')
+    readonly_fields = fields
+    list_filter = ('status', 'name')
+    search_fields = ('name',)
+    actions = ('retry',)
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def last_error_text(self, job: Job) -> SafeText:
+        return format_html('<pre>{}</pre>', job.last_error)
+
+    last_error_text.short_description = 'Последняя ошибка'
+
+    @admin.action(description='Перезапустить выбранные задачи')
+    def retry(self, request, queryset: QuerySet) -> None:
+        updated = queryset.exclude(status=Job.Status.RUNNING).update(
+            status=Job.Status.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            finished=None,
+        )
+        self.message_user(request, f'Задач в очереди: {updated}')
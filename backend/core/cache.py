@@ -0,0 +1,133 @@
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class KeyLocks:
+    """ Thread locks by key, a lock is dropped when nobody holds it. """
+
+    def __init__(self) -> None:
+        self.guard = threading.Lock()
+        self.locks: dict[str, list] = {}
+
+    @contextmanager
+    def hold(self, key: str, timeout: float) -> Iterator[bool]:
+        """
+        Yields whether the lock was acquired within `timeout` seconds,
+        without waiting with a zero `timeout`.
+        """
+        with self.guard:
+            entry = self.locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        lock = entry[0]
+        if timeout > 0:
+            acquired = lock.acquire(timeout=timeout)
+        else:
+            acquired = lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+            with self.guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.locks[key]
+
+
+class SingleFlight:
+    """
+    Cached values computed by one caller at a time. On a miss concurrent
+    callers of the process wait on a lock per key and callers in other
+    processes poll the cache while the lock key `<key>:lock` added to the
+    shared cache is held, then all of them get the computed value.
+    Values are kept in the cache `stale` seconds longer than `ttl`, an
+    expired value is recomputed by one caller while the others get the
+    stale one at once. After `wait` seconds waiting callers compute the
+    value themselves, the lock key expires after `lock_timeout` seconds
+    if its holder is gone.
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, lock_timeout: float, wait: float) -> None:
+        self.lock_timeout = lock_timeout
+        self.wait = wait
+        self.locks = KeyLocks()
+        self.stats: Counter = Counter()
+
+    def get(self, key: str, compute: Callable[[], Any], ttl: float,
+            stale: float = 0) -> Any:
+        entry = cache.get(key)
+        if entry is not None:
+            value, expires = entry
+            if time.time() < expires:
+                self.stats['hit'] += 1
+                return value
+            return self.revalidate(key, compute, ttl, stale, value)
+        with self.locks.hold(key, self.wait) as acquired:
+            entry = cache.get(key)
+            if entry is not None:
+                self.stats['wait'] += 1
+                return entry[0]
+            if not acquired:
+                self.stats['timeout'] += 1
+                return compute()
+            token = self.lock(key)
+            deadline = time.monotonic() + self.wait
+            while token is None and time.monotonic() < deadline:
+                time.sleep(type(self).POLL_INTERVAL)
+                entry = cache.get(key)
+                if entry is not None:
+                    self.stats['wait'] += 1
+                    return entry[0]
+                token = self.lock(key)
+            self.stats['miss'] += 1
+            try:
+                return self.fill(key, compute, ttl, stale)
+            finally:
+                if token is not None:
+                    self.unlock(key, token)
+
+    def revalidate(self, key: str, compute: Callable[[], Any], ttl: float,
+                   stale: float, value: Any) -> Any:
+        """ Recomputes an expired value unless another caller does. """
+        with self.locks.hold(key, 0) as acquired:
+            token = self.lock(key) if acquired else None
+            if token is None:
+                self.stats['stale'] += 1
+                return value
+            self.stats['revalidate'] += 1
+            try:
+                return self.fill(key, compute, ttl, stale)
+            finally:
+                self.unlock(key, token)
+
+    @staticmethod
+    def fill(key: str, compute: Callable[[], Any], ttl: float,
+             stale: float) -> Any:
+        value = compute()
+        cache.set(key, (value, time.time() + ttl), ttl + stale)
+        return value
+
+    def lock(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if cache.add(f'{key}:lock', token, self.lock_timeout):
+            return token
+        return None
+
+    @staticmethod
+    def unlock(key: str, token: str) -> None:
+        # Not atomic, only keeps a holder that outlived the lock timeout
+        # from removing the lock of the next holder in most cases.
+        if cache.get(f'{key}:lock') == token:
+            cache.delete(f'{key}:lock')
+
+
+single_flight = SingleFlight(settings.CACHE_LOCK_TIMEOUT, settings.CACHE_WAIT)
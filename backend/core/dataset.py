@@ -0,0 +1,411 @@
+import io
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator, Sequence
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, Model
+from django.utils import timezone
+from PIL import Image
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    Shopping,
+    Tag,
+)
+from users.models import FoodgramUser, Subscription
+
+WORDS = (
+    'курица', 'говядина', 'рис', 'гречка', 'картофель', 'лук', 'морковь',
+    'чеснок', 'сыр', 'сметана', 'укроп', 'томаты', 'перец', 'грибы',
+    'запечённый', 'тушёный', 'жареный', 'домашний', 'быстрый', 'летний',
+    'соус', 'суп', 'салат', 'пирог', 'каша', 'рагу', 'котлеты', 'блины',
+)
+FIRST_NAMES = ('Анна', 'Мария', 'Елена', 'Ольга', 'Иван', 'Сергей',
+               'Алексей', 'Дмитрий', 'Наталья', 'Павел')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев',
+              'Петров', 'Соколов', 'Михайлов', 'Новиков', 'Фёдоров')
+UNITS = ('г', 'кг', 'мл', 'л', 'шт.', 'ст. л.', 'ч. л.', 'по вкусу')
+IMAGE_COLORS = ((200, 120, 60), (90, 160, 40), (220, 200, 80),
+                (160, 60, 60), (70, 110, 170), (240, 160, 120))
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n',
+                              '\r': '\\r'})
+
+
+class TableWriter:
+    """
+    Writes rows with explicit primary keys in batches: with `COPY` on
+    PostgreSQL and with `bulk_create` on other databases.
+    """
+
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self.copy = connection.vendor == 'postgresql'
+        self.rows: dict[str, int] = {}
+        self.elapsed = 0.0
+
+    def write(self, model: type[Model], field_names: Sequence[str],
+              rows: Iterable[Sequence[Any]]) -> int:
+        started = time.perf_counter()
+        fields = [model._meta.get_field(name) for name in field_names]
+        total = 0
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            if self.copy:
+                self.write_copy(model, fields, batch)
+            else:
+                # Rows hold raw values, foreign keys are set by `attname`.
+                attnames = [field.attname for field in fields]
+                model.objects.bulk_create(
+                    model(**dict(zip(attnames, row))) for row in batch
+                )
+            total += len(batch)
+        self.elapsed += time.perf_counter() - started
+        self.rows[model._meta.db_table] = total
+        return total
+
+    def write_copy(self, model: type[Model], fields: list,
+                   batch: list[Sequence[Any]]) -> None:
+        buffer = io.StringIO()
+        if all(self.is_integer(field) for field in fields):
+            line = '\t'.join(['%d'] * len(fields)) + '\n'
+            buffer.writelines(line % row for row in batch)
+        else:
+            converters = [
+                str if self.is_integer(field) else self.copy_value
+                for field in fields
+            ]
+            buffer.writelines(
+                '\t'.join([
+                    convert(value)
+                    for convert, value in zip(converters, row)
+                ]) + '\n'
+                for row in batch
+            )
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        table = connection.ops.quote_name(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f'COPY {table} ({columns}) FROM STDIN', buffer
+            )
+
+    @staticmethod
+    def is_integer(field: Any) -> bool:
+        return not field.null and field.get_internal_type() in (
+            'AutoField', 'BigAutoField', 'ForeignKey', 'OneToOneField',
+            'IntegerField',
+            'PositiveIntegerField', 'PositiveSmallIntegerField',
+            'SmallIntegerField', 'BigIntegerField'
+        )
+
+    @staticmethod
+    def copy_value(value: Any) -> str:
+        if value is None:
+            return '\\N'
+        if isinstance(value, str):
+            return value.translate(COPY_ESCAPES)
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, (bytes, memoryview)):
+            return '\\\\x' + bytes(value).hex()
+        return str(value)
+
+    @staticmethod
+    def reset_sequences(models: Iterable[type[Model]]) -> None:
+        statements = connection.ops.sequence_reset_sql(no_style(),
+                                                       list(models))
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+class ZipfSampler:
+    """
+    Picks items with probability proportional to 1 / rank ** skew, ranks
+    are shuffled so popular items are spread over the whole id range.
+    """
+
+    def __init__(self, items: Sequence[int], skew: float,
+                 generator: random.Random) -> None:
+        self.items = list(items)
+        generator.shuffle(self.items)
+        self.cum_weights = list(itertools.accumulate(
+            1 / rank ** skew for rank in range(1, len(self.items) + 1)
+        ))
+        self.random = generator
+
+    def pick(self) -> int:
+        return self.random.choices(self.items,
+                                   cum_weights=self.cum_weights)[0]
+
+    def sample(self, amount: int, exclude: int = None) -> set[int]:
+        amount = min(amount, len(self.items) - (exclude is not None))
+        result = set()
+        attempts = amount * 20
+        while len(result) < amount and attempts:
+            chosen = self.random.choices(self.items,
+                                         cum_weights=self.cum_weights,
+                                         k=amount - len(result))
+            result.update(chosen)
+            result.discard(exclude)
+            attempts -= 1
+        return result
+
+
+class SyntheticDataset:
+    """
+    Deterministic synthetic dataset for benchmarks and local load tests.
+    Sizes are given per entity, links (ingredients, tags, favorites,
+    carts and subscriptions) are given per owner, favorites, carts and
+    subscriptions per user are averages. Authors, favorites, carts and
+    subscriptions follow a Zipf distribution with the given skew.
+    `ingredients=0` or `tags=0` reuse ingredients or tags of the database.
+    """
+
+    PASSWORD = 'foodgram-benchmark'
+    IMAGE_NAME = 'placeholder.png'
+    IMAGE_SIZE = (64, 64)
+    PUB_DATE_DAYS = 365
+
+    def __init__(self, users: int = 100, recipes: int = 1000,
+                 ingredients: int = 500, tags: int = 8,
+                 ingredients_per_recipe: int = 8, tags_per_recipe: int = 2,
+                 favorites_per_user: int = 20, shopping_per_user: int = 5,
+                 subscriptions_per_user: int = 10, skew: float = 1.1,
+                 seed: int = 0, batch_size: int = 50_000,
+                 disable_triggers: bool = False) -> None:
+        self.users = users
+        self.recipes = recipes
+        self.ingredients = ingredients
+        self.tags = tags
+        self.ingredients_per_recipe = ingredients_per_recipe
+        self.tags_per_recipe = tags_per_recipe
+        self.favorites_per_user = favorites_per_user
+        self.shopping_per_user = shopping_per_user
+        self.subscriptions_per_user = subscriptions_per_user
+        self.skew = skew
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.writer = TableWriter(batch_size)
+        self.disable_triggers = disable_triggers
+        self.user_ids: Sequence[int] = range(0)
+        self.recipe_ids: Sequence[int] = range(0)
+        self.ingredient_ids: Sequence[int] = range(0)
+        self.tag_ids: Sequence[int] = range(0)
+        self.tag_slugs: list[str] = []
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'users': self.users,
+            'recipes': self.recipes,
+            'ingredients': self.ingredients,
+            'tags': self.tags,
+            'ingredients_per_recipe': self.ingredients_per_recipe,
+            'tags_per_recipe': self.tags_per_recipe,
+            'favorites_per_user': self.favorites_per_user,
+            'shopping_per_user': self.shopping_per_user,
+            'subscriptions_per_user': self.subscriptions_per_user,
+            'skew': self.skew,
+            'seed': self.seed,
+        }
+
+    def create(self) -> None:
+        with transaction.atomic():
+            if self.disable_triggers:
+                # Generated rows reference existing rows only, skip the
+                # foreign key triggers (PostgreSQL superuser only).
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SET LOCAL session_replication_role = replica'
+                    )
+            self.create_tags()
+            self.create_ingredients()
+            if not self.tag_ids or not self.ingredient_ids:
+                raise ValueError('No tags or ingredients to link recipes to')
+            self.create_users()
+            self.create_recipes()
+            self.create_recipe_links()
+            self.create_user_links()
+            self.writer.reset_sequences((
+                Tag, Ingredient, FoodgramUser, Recipe, RecipeIngredient,
+                RecipeTag, Favorite, Shopping, Subscription
+            ))
+
+    @staticmethod
+    def next_ids(model: type[Model], amount: int) -> range:
+        start = (model.objects.aggregate(id=Max('id'))['id'] or 0) + 1
+        return range(start, start + amount)
+
+    def sentence(self, words: int) -> str:
+        return ' '.join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def amount(self, average: int) -> int:
+        if average <= 0:
+            return 0
+        return max(int(self.random.expovariate(1 / average)), 1)
+
+    def create_tags(self) -> None:
+        if not self.tags:
+            tags = Tag.objects.values_list('id', 'slug')
+            self.tag_ids = [tag_id for tag_id, _ in tags]
+            self.tag_slugs = [slug for _, slug in tags]
+            return
+        ids = self.next_ids(Tag, self.tags)
+        colors = set(Tag.objects.values_list('color', flat=True))
+        rows = []
+        for tag_id in ids:
+            color = tag_id * 7919 % (Tag.MAX_COLOR + 1)
+            while color in colors:
+                color = (color + 1) % (Tag.MAX_COLOR + 1)
+            colors.add(color)
+            rows.append((tag_id, f'Тэг {self.seed}-{tag_id}', color,
+                         f'tag-{self.seed}-{tag_id}'))
+        self.writer.write(Tag, ('id', 'name', 'color', 'slug'), rows)
+        self.tag_ids = ids
+        self.tag_slugs = [row[3] for row in rows]
+
+    def create_ingredients(self) -> None:
+        if not self.ingredients:
+            self.ingredient_ids = list(
+                Ingredient.objects.values_list('id', flat=True)
+            )
+            return
+        ids = self.next_ids(Ingredient, self.ingredients)
+        self.writer.write(Ingredient, ('id', 'name', 'measurement_unit'), (
+            (ingredient_id, f'{self.sentence(2)} {ingredient_id}',
+             self.random.choice(UNITS))
+            for ingredient_id in ids
+        ))
+        self.ingredient_ids = ids
+
+    def create_users(self) -> None:
+        ids = self.next_ids(FoodgramUser, self.users)
+        password = make_password(type(self).PASSWORD)
+        now = timezone.now()
+        self.writer.write(FoodgramUser, (
+            'id', 'password', 'is_superuser', 'username', 'email',
+            'first_name', 'last_name', 'is_staff', 'is_active', 'date_joined',
+            'deleted'
+        ), (
+            (user_id, password, False, f'user{self.seed}-{user_id}',
+             f'user{self.seed}-{user_id}@example.com',
+             self.random.choice(FIRST_NAMES),
+             self.random.choice(LAST_NAMES), False, True, now, False)
+            for user_id in ids
+        ))
+        self.user_ids = ids
+
+    def placeholder_images(self) -> list[str]:
+        field = Recipe._meta.get_field('image')
+        names = []
+        for color in IMAGE_COLORS:
+            buffer = io.BytesIO()
+            Image.new('RGB', type(self).IMAGE_SIZE, color).save(
+                buffer, format='PNG'
+            )
+            name = field.generate_filename(None, type(self).IMAGE_NAME)
+            names.append(
+                field.storage.save(name, ContentFile(buffer.getvalue()))
+            )
+        return names
+
+    def create_recipes(self) -> None:
+        ids = self.next_ids(Recipe, self.recipes)
+        images = self.placeholder_images()
+        authors = ZipfSampler(self.user_ids, self.skew, self.random)
+        now = timezone.now()
+        period = timedelta(days=type(self).PUB_DATE_DAYS).total_seconds()
+        self.writer.write(Recipe, (
+            'id', 'name', 'text', 'image', 'cooking_time', 'pub_date',
+            'author', 'deleted'
+        ), (
+            (recipe_id, self.sentence(3), self.sentence(40),
+             self.random.choice(images), self.random.randint(5, 180),
+             now - timedelta(seconds=period * (1 - index / len(ids))),
+             authors.pick(), False)
+            for index, recipe_id in enumerate(ids)
+        ))
+        self.recipe_ids = ids
+
+    def create_recipe_links(self) -> None:
+        ingredients_per_recipe = min(self.ingredients_per_recipe,
+                                     len(self.ingredient_ids))
+        tags_per_recipe = min(self.tags_per_recipe, len(self.tag_ids))
+        ids = self.next_ids(RecipeIngredient,
+                            len(self.recipe_ids) * ingredients_per_recipe)
+        self.writer.write(RecipeIngredient, (
+            'id', 'recipe', 'ingredient', 'amount'
+        ), (
+            (link_id, recipe_id, ingredient_id, self.random.randint(1, 500))
+            for link_id, (recipe_id, ingredient_id) in zip(ids, (
+                (recipe_id, ingredient_id)
+                for recipe_id in self.recipe_ids
+                for ingredient_id in self.random.sample(
+                    self.ingredient_ids, ingredients_per_recipe
+                )
+            ))
+        ))
+        ids = self.next_ids(RecipeTag, len(self.recipe_ids) * tags_per_recipe)
+        self.writer.write(RecipeTag, ('id', 'recipe', 'tag'), (
+            (link_id, recipe_id, tag_id)
+            for link_id, (recipe_id, tag_id) in zip(ids, (
+                (recipe_id, tag_id)
+                for recipe_id in self.recipe_ids
+                for tag_id in self.random.sample(self.tag_ids,
+                                                 tags_per_recipe)
+            ))
+        ))
+
+    def create_user_links(self) -> None:
+        recipes = ZipfSampler(self.recipe_ids, self.skew, self.random)
+        now = timezone.now()
+        period = timedelta(days=type(self).PUB_DATE_DAYS).total_seconds()
+        for model, average in ((Favorite, self.favorites_per_user),
+                               (Shopping, self.shopping_per_user)):
+            self.write_links(model, ('user', 'recipe', 'created'), (
+                (user_id, recipe_id,
+                 now - timedelta(seconds=period * self.random.random()))
+                for user_id in self.user_ids
+                for recipe_id in recipes.sample(self.amount(average))
+            ))
+        authors = ZipfSampler(self.user_ids, self.skew, self.random)
+        self.write_links(Subscription, ('user', 'author'), (
+            (user_id, author_id)
+            for user_id in self.user_ids
+            for author_id in authors.sample(
+                self.amount(self.subscriptions_per_user), exclude=user_id
+            )
+        ))
+
+    def write_links(self, model: type[Model], field_names: Sequence[str],
+                    links: Iterable[tuple]) -> None:
+        start = (model.objects.aggregate(id=Max('id'))['id'] or 0) + 1
+        self.writer.write(model, ('id', *field_names), (
+            (link_id, *link)
+            for link_id, link in zip(itertools.count(start), links)
+        ))
+
+    def report(self) -> Iterator[str]:
+        total = sum(self.writer.rows.values())
+        for table, rows in self.writer.rows.items():
+            yield f'{table}: {rows} rows'
+        elapsed = self.writer.elapsed or 1e-9
+        yield (f'{total} rows in {elapsed:.1f} s, '
+               f'{total / elapsed:,.0f} rows/s')
@@ -0,0 +1,130 @@
+import time
+from collections import deque
+from typing import Any, Callable, Optional, Union
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+
+class RequestStats:
+    """
+    Timings of one request, filled by `RequestTimingMiddleware`.
+    All durations are in seconds.
+    """
+
+    __slots__ = ('method', 'path', 'view', 'status', 'queries', 'db_time',
+                 'started', 'view_started', 'view_db_time', 'render_started',
+                 'render_finished', 'finished')
+
+    def __init__(self, request: HttpRequest) -> None:
+        self.method = request.method
+        self.path = request.path
+        self.view = ''
+        self.status = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.view_db_time = 0.0
+        self.started = time.perf_counter()
+        self.view_started: Optional[float] = None
+        self.render_started: Optional[float] = None
+        self.render_finished: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def execute(self, execute: Callable, sql: str, params: Any, many: bool,
+                context: dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def start_view(self, view: str) -> None:
+        self.view = view
+        self.view_started = time.perf_counter()
+
+    def start_render(self) -> None:
+        self.render_started = time.perf_counter()
+        self.view_db_time = self.db_time
+
+    def finish_render(self, response: HttpResponse) -> None:
+        self.render_finished = time.perf_counter()
+
+    def finish(self, response: HttpResponse) -> None:
+        self.finished = time.perf_counter()
+        self.status = response.status_code
+        if self.render_started is None:
+            self.view_db_time = self.db_time
+
+    @property
+    def total_time(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def view_time(self) -> float:
+        """ View code and serialization, DB time excluded. """
+        if self.view_started is None:
+            return 0.0
+        end = self.render_started or self.finished or time.perf_counter()
+        return max(end - self.view_started - self.view_db_time, 0.0)
+
+    @property
+    def render_time(self) -> float:
+        if self.render_started is None or self.render_finished is None:
+            return 0.0
+        return self.render_finished - self.render_started
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries",'
+            f' view;dur={self.view_time * 1000:.2f},'
+            f' render;dur={self.render_time * 1000:.2f},'
+            f' total;dur={self.total_time * 1000:.2f}'
+        )
+
+    def as_dict(self) -> dict[str, Union[str, int, float]]:
+        return {
+            'view': self.view,
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'view_ms': round(self.view_time * 1000, 3),
+            'render_ms': round(self.render_time * 1000, 3),
+            'total_ms': round(self.total_time * 1000, 3),
+            'timestamp': time.time(),
+        }
+
+
+class RequestStatsBuffer:
+    """ Thread safe in-process ring buffer of the latest requests stats. """
+
+    def __init__(self, size: int) -> None:
+        self.items: deque[dict[str, Any]] = deque(maxlen=max(size, 0))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.items.maxlen)
+
+    def append(self, data: dict[str, Any]) -> None:
+        if self.enabled:
+            self.items.append(data)
+
+    def latest(self, view: Optional[str] = None,
+               limit: Optional[int] = None) -> list[dict[str, Any]]:
+        items = [
+            item for item in reversed(list(self.items))
+            if not view or item['view'] == view
+        ]
+        return items[:limit]
+
+
+request_stats_buffer = RequestStatsBuffer(settings.REQUEST_STATS_BUFFER_SIZE)
+
+
+def get_view_name(view_func: Callable) -> str:
+    view_class = getattr(view_func, 'view_class', None)
+    if view_class is not None:
+        return view_class.__name__
+    return getattr(view_func, '__name__', type(view_func).__name__)
@@ -0,0 +1,335 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import (
+    DatabaseError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from core.models import Job
+
+logger = logging.getLogger('foodgram.jobs')
+
+JOB_TABLE = Job._meta.db_table
+
+
+class JobType:
+    """
+    Function registered as a job. Calling it runs the function in place,
+    `delay` queues it for `runworker` with JSON serializable arguments.
+    At most `concurrency` jobs of one type run at the same time across
+    all workers, failed jobs are retried `max_attempts` times with
+    exponential backoff. A job running longer than `timeout` seconds is
+    considered hung and queued again, see `Heartbeat`.
+    """
+
+    def __init__(self, func: Callable, name: str, priority: int,
+                 max_attempts: int, concurrency: Optional[int],
+                 timeout: float) -> None:
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def __call__(self, *args: Any) -> Any:
+        return self.func(*args)
+
+    def delay(self, *args: Any, priority: Optional[int] = None,
+              countdown: float = 0) -> Optional[Job]:
+        """
+        Queues the job in the current transaction, so it is not run if the
+        transaction is rolled back. With `JOBS_SYNC` the job is run in
+        place after the transaction commits instead.
+        """
+        if settings.JOBS_SYNC:
+            transaction.on_commit(lambda: self.run_sync(*args))
+            return None
+        return Job.objects.create(
+            name=self.name,
+            args=list(args),
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=countdown),
+        )
+
+    def run_sync(self, *args: Any) -> None:
+        try:
+            self.func(*args)
+        except Exception:
+            logger.exception('job %s failed', self.name)
+
+    @staticmethod
+    def backoff(attempts: int) -> float:
+        """ Delay before the next attempt in seconds, with jitter. """
+        delay = min(settings.JOBS_BACKOFF * 2 ** (attempts - 1),
+                    settings.JOBS_BACKOFF_MAX)
+        return delay * random.uniform(0.5, 1)
+
+
+registry: dict[str, JobType] = {}
+
+
+def job(name: str, priority: int = 0, max_attempts: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None) -> Callable[[Callable], JobType]:
+    def register(func: Callable) -> JobType:
+        if name in registry:
+            raise ValueError(f'Job {name} already registered')
+        registry[name] = JobType(
+            func=func,
+            name=name,
+            priority=priority,
+            max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+            concurrency=concurrency,
+            timeout=timeout or settings.JOBS_TIMEOUT,
+        )
+        return registry[name]
+
+    return register
+
+
+class Heartbeat:
+    """
+    Refreshes `locked_at` of a running job every `interval` seconds from a
+    thread with its own connection, so jobs of live workers are not taken
+    for abandoned ones however long they run. Stops refreshing after
+    `timeout` seconds, the job is then reset like one of a stopped worker.
+    """
+
+    HEARTBEAT_SQL = (
+        f'UPDATE {JOB_TABLE} SET locked_at = NOW() '
+        f'WHERE id = %(id)s AND status = %(running)s '
+        f'AND locked_by = %(worker)s'
+    )
+
+    def __init__(self, job_id: int, worker: str, interval: float,
+                 timeout: float) -> None:
+        self.job_id = job_id
+        self.worker = worker
+        self.interval = interval
+        self.timeout = timeout
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self) -> 'Heartbeat':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self) -> None:
+        deadline = time.monotonic() + self.timeout
+        try:
+            while not self.stopped.wait(self.interval):
+                if time.monotonic() > deadline:
+                    logger.warning('job #%s exceeded its timeout of %s s',
+                                   self.job_id, self.timeout)
+                    return
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(type(self).HEARTBEAT_SQL, {
+                            'id': self.job_id,
+                            'running': Job.Status.RUNNING,
+                            'worker': self.worker,
+                        })
+                except DatabaseError:
+                    logger.exception('job #%s heartbeat failed', self.job_id)
+        finally:
+            connection.close()
+
+
+class Worker:
+    """
+    Runs queued jobs one at a time. Jobs are claimed with
+    `FOR UPDATE SKIP LOCKED`, so any number of workers share the queue
+    without blocking each other. Claims of job types with a concurrency
+    limit are serialized by a transaction level advisory lock per type.
+    Running jobs are kept locked by a `Heartbeat`, jobs that missed
+    `MISSED_HEARTBEATS` of them are queued again.
+    """
+
+    # Namespace of the advisory locks, the second key is the type name hash.
+    LOCK_SPACE = 0x6A6F62
+    # Jobs left running by stopped workers and old finished jobs are
+    # cleaned up at most this often.
+    MAINTENANCE_INTERVAL = 60
+    MISSED_HEARTBEATS = 3
+
+    CLAIM_SQL = (
+        f'UPDATE {JOB_TABLE} SET status = %(running)s, '
+        f'attempts = attempts + 1, locked_by = %(worker)s, locked_at = NOW() '
+        f'WHERE id = (SELECT id FROM {JOB_TABLE} '
+        f'WHERE status = %(queued)s AND run_at <= NOW() '
+        f'AND NOT name = ANY(%(skip)s::varchar[]) '
+        f'ORDER BY priority DESC, run_at, id '
+        f'LIMIT 1 FOR UPDATE SKIP LOCKED) '
+        f'RETURNING id, name, args, attempts, max_attempts'
+    )
+    LOCK_SQL = 'SELECT pg_advisory_xact_lock(%s, hashtext(%s))'
+    RUNNING_SQL = (
+        f'SELECT COUNT(*) FROM {JOB_TABLE} '
+        f'WHERE name = %(name)s AND status = %(running)s'
+    )
+    STALE_SQL = (
+        f'UPDATE {JOB_TABLE} SET status = CASE '
+        f'WHEN attempts >= max_attempts THEN %(failed)s ELSE %(queued)s END, '
+        f'finished = CASE WHEN attempts >= max_attempts THEN NOW() END, '
+        f'run_at = NOW(), locked_by = \'\', '
+        f'last_error = \'Timed out on \' || locked_by '
+        f'WHERE status = %(running)s '
+        f'AND locked_at < NOW() - %(expired)s * INTERVAL \'1 second\''
+    )
+    PURGE_SQL = (
+        f'DELETE FROM {JOB_TABLE} WHERE status = %(done)s '
+        f'AND finished < NOW() - %(hours)s * INTERVAL \'1 hour\''
+    )
+
+    def __init__(self, poll_interval: float) -> None:
+        self.poll_interval = poll_interval
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        self.maintained: Optional[float] = None
+
+    def stop(self, *args: Any) -> None:
+        self.stopping = True
+
+    def run(self, once: bool = False) -> int:
+        """
+        Runs jobs until stopped, or until the queue has no due jobs with
+        `once`, returns the number of jobs run.
+        """
+        done = 0
+        while not self.stopping:
+            close_old_connections()
+            self.maintain()
+            if self.run_one():
+                done += 1
+            elif once:
+                break
+            else:
+                time.sleep(self.poll_interval)
+        return done
+
+    def run_one(self) -> bool:
+        claimed = self.claim()
+        if claimed is None:
+            return False
+        job_id, name, args, attempts, max_attempts = claimed
+        started = time.perf_counter()
+        try:
+            job_type = registry.get(name)
+            if job_type is None:
+                raise LookupError(f'Job {name} is not registered')
+            with Heartbeat(job_id, self.name, settings.JOBS_HEARTBEAT,
+                           job_type.timeout):
+                job_type.func(*json.loads(args))
+        except Exception:
+            self.fail(job_id, name, attempts, max_attempts,
+                      traceback.format_exc())
+        else:
+            self.owned(job_id).update(
+                status=Job.Status.DONE,
+                finished=timezone.now(),
+                locked_by='',
+            )
+            logger.info('job %s #%s done in %.1f ms', name, job_id,
+                        (time.perf_counter() - started) * 1000)
+        return True
+
+    def owned(self, job_id: int) -> QuerySet:
+        """ The job unless it was reset and claimed by another worker. """
+        return Job.objects.filter(id=job_id, locked_by__in=(self.name, ''))
+
+    def claim(self) -> Optional[tuple[int, str, str, int, int]]:
+        """
+        Marks the next due job as running, job types at their concurrency
+        limit are skipped. Arguments are returned as JSON text.
+        """
+        skip = []
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(type(self).CLAIM_SQL, {
+                    'running': Job.Status.RUNNING,
+                    'queued': Job.Status.QUEUED,
+                    'worker': self.name,
+                    'skip': skip,
+                })
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                name = row[1]
+                job_type = registry.get(name)
+                if job_type is None or job_type.concurrency is None:
+                    return row
+                # Waits for other claims of this type to commit, so the
+                # count below sees them.
+                cursor.execute(type(self).LOCK_SQL,
+                               (type(self).LOCK_SPACE, name))
+                cursor.execute(type(self).RUNNING_SQL, {
+                    'name': name,
+                    'running': Job.Status.RUNNING,
+                })
+                if cursor.fetchone()[0] <= job_type.concurrency:
+                    return row
+                transaction.set_rollback(True)
+            skip.append(name)
+
+    def fail(self, job_id: int, name: str, attempts: int, max_attempts: int,
+             error: str) -> None:
+        if attempts >= max_attempts:
+            logger.error('job %s #%s failed after %s attempts:\n%s',
+                         name, job_id, attempts, error)
+            self.owned(job_id).update(
+                status=Job.Status.FAILED,
+                finished=timezone.now(),
+                locked_by='',
+                last_error=error,
+            )
+            return
+        delay = JobType.backoff(attempts)
+        logger.warning('job %s #%s failed, retry in %.0f s:\n%s',
+                       name, job_id, delay, error)
+        self.owned(job_id).update(
+            status=Job.Status.QUEUED,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            locked_by='',
+            last_error=error,
+        )
+
+    def maintain(self) -> None:
+        now = time.monotonic()
+        if (self.maintained is not None
+                and now - self.maintained < type(self).MAINTENANCE_INTERVAL):
+            return
+        self.maintained = now
+        with connection.cursor() as cursor:
+            cursor.execute(type(self).STALE_SQL, {
+                'failed': Job.Status.FAILED,
+                'queued': Job.Status.QUEUED,
+                'running': Job.Status.RUNNING,
+                'expired': (settings.JOBS_HEARTBEAT
+                            * type(self).MISSED_HEARTBEATS),
+            })
+            if cursor.rowcount:
+                logger.warning('reset %s timed out jobs', cursor.rowcount)
+            cursor.execute(type(self).PURGE_SQL, {
+                'done': Job.Status.DONE,
+                'hours': settings.JOBS_KEEP_DONE_HOURS,
+            })
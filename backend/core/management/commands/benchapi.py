@@ -0,0 +1,519 @@
+import base64
+import io
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from api.urls import urlpatterns
+from core.dataset import SyntheticDataset
+from core.instrumentation import request_stats_buffer
+from recipes.models import (
+    Favorite,
+    Recipe,
+    Shopping,
+)
+from recipes.ranking import Ranking
+from recipes.similarity import RecipeSimilarity
+from recipes.timeline import Timeline
+from users.models import FoodgramUser, Subscription
+
+ANONYMOUS = 'anonymous'
+USER = 'user'
+ADMIN = 'admin'
+
+
+class Scenario:
+    """
+    One measured request. `build` gets the iteration number and returns
+    the request parts (`kwargs`, `query`, `data` or a raw `body` with its
+    `content_type`, `token`), it runs before the measurement and may
+    prepare the database. Streamed responses are read within the
+    measurement.
+    """
+
+    def __init__(self, route: str, method: str = 'get', auth: str = USER,
+                 status: int = 200, label: str = '',
+                 build: Optional[Callable[[int], dict[str, Any]]] = None
+                 ) -> None:
+        self.route = route
+        self.method = method
+        self.auth = auth
+        self.status = status
+        self.label = label or f'{route} {method.upper()}'
+        self.build = build or (lambda iteration: {})
+
+
+class Command(BaseCommand):
+
+    help = ('Seed a synthetic dataset into a test database and benchmark '
+            'every API route through the Django test client')
+
+    BASELINE_FILE = os.path.join(
+        settings.BASE_DIR, 'data', 'bench', 'api_baseline.json'
+    )
+    FAST_PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+    # Cached views build every response, cache hits would hide
+    # regressions of the views.
+    DUMMY_CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--ingredients', type=int, default=1000)
+        parser.add_argument('--tags', type=int, default=8)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--tags-per-recipe', type=int, default=2)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--shopping-per-user', type=int, default=10)
+        parser.add_argument('--subscriptions-per-user', type=int,
+                            default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '-n', '--requests',
+            type=int,
+            default=20,
+            help='Measured requests per scenario.'
+        )
+        parser.add_argument(
+            '-b', '--baseline',
+            type=str,
+            default=type(self).BASELINE_FILE,
+            help='Baseline file.'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Save results as the new baseline instead of comparing.'
+        )
+        parser.add_argument(
+            '-t', '--tolerance',
+            type=float,
+            default=0.5,
+            help='Allowed relative p50 latency growth over the baseline.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        dataset = SyntheticDataset(
+            users=kwargs['users'],
+            recipes=kwargs['recipes'],
+            ingredients=kwargs['ingredients'],
+            tags=kwargs['tags'],
+            ingredients_per_recipe=kwargs['ingredients_per_recipe'],
+            tags_per_recipe=kwargs['tags_per_recipe'],
+            favorites_per_user=kwargs['favorites_per_user'],
+            shopping_per_user=kwargs['shopping_per_user'],
+            subscriptions_per_user=kwargs['subscriptions_per_user'],
+            seed=kwargs['seed'],
+        )
+        if dataset.users < 3 or dataset.recipes < 2:
+            raise CommandError('At least 3 users and 2 recipes are required')
+        old_name = connection.settings_dict['NAME']
+        created = False
+        request_logger = logging.getLogger('foodgram.requests')
+        request_logger.disabled = True
+        setup_test_environment()
+        try:
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(
+                        MEDIA_ROOT=media_root,
+                        PASSWORD_HASHERS=type(self).FAST_PASSWORD_HASHERS,
+                        CACHES=type(self).DUMMY_CACHES):
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False
+                )
+                created = True
+                started = time.perf_counter()
+                dataset.create()
+                Timeline.rebuild()
+                Ranking.update(full=True)
+                for _ in RecipeSimilarity.build():
+                    pass
+                print(f'dataset {dataset.as_dict()} created in '
+                      f'{time.perf_counter() - started:.1f} s')
+                results = self.run(dataset, kwargs['requests'])
+        except CommandError:
+            raise
+        except Exception as error:
+            raise CommandError(f'error: {type(error)} = {error}')
+        finally:
+            if created:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            request_logger.disabled = False
+        self.report(results)
+        report = {'dataset': dataset.as_dict(), 'results': results}
+        if kwargs['save_baseline']:
+            self.save_baseline(kwargs['baseline'], report)
+            return
+        self.compare(kwargs['baseline'], report, kwargs['tolerance'])
+
+    def run(self, dataset: SyntheticDataset,
+            requests: int) -> dict[str, dict[str, Any]]:
+        self.dataset = dataset
+        self.user = FoodgramUser.objects.get(id=dataset.user_ids[0])
+        self.other = FoodgramUser.objects.get(id=dataset.user_ids[1])
+        self.admin = FoodgramUser.objects.create_superuser(
+            'benchmark-admin', 'benchmark-admin@example.com',
+            SyntheticDataset.PASSWORD, 'Admin', 'Admin'
+        )
+        self.tokens = {
+            USER: Token.objects.create(user=self.user).key,
+            ADMIN: Token.objects.create(user=self.admin).key,
+        }
+        self.own_recipe = Recipe.objects.filter(author=self.user).first() \
+            or self.create_recipe()
+        self.image = self.image_base64()
+        scenarios = self.scenarios()
+        missing = {
+            pattern.name for pattern in urlpatterns
+        } - {scenario.route for scenario in scenarios}
+        if missing:
+            raise CommandError(f'No scenarios for routes: {sorted(missing)}')
+        self.client = Client()
+        return {
+            scenario.label: self.measure(scenario, requests)
+            for scenario in scenarios
+        }
+
+    def measure(self, scenario: Scenario, requests: int) -> dict[str, Any]:
+        latencies = []
+        queries = []
+        for iteration in range(requests + 1):
+            request = self.prepare(scenario, iteration)
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = request()
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            if response.status_code != scenario.status:
+                raise CommandError(
+                    f'{scenario.label}: status {response.status_code}, '
+                    f'expected {scenario.status}: {response.content[:200]}'
+                )
+            if iteration:
+                latencies.append(elapsed * 1000)
+                queries.append(len(context.captured_queries))
+        request = self.prepare(scenario, requests + 1)
+        tracemalloc.start()
+        try:
+            response = request()
+            if response.streaming:
+                b''.join(response.streaming_content)
+            memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        latencies.sort()
+        return {
+            'p50_ms': round(self.percentile(latencies, 50), 3),
+            'p90_ms': round(self.percentile(latencies, 90), 3),
+            'p99_ms': round(self.percentile(latencies, 99), 3),
+            'mean_ms': round(statistics.mean(latencies), 3),
+            'queries': max(queries),
+            'memory_kib': round(memory / 1024, 1),
+        }
+
+    def prepare(self, scenario: Scenario,
+                iteration: int) -> Callable[[], Any]:
+        parts = scenario.build(iteration)
+        url = reverse(f'api:{scenario.route}', kwargs=parts.get('kwargs'))
+        if parts.get('query'):
+            url = f'{url}?{parts["query"]}'
+        headers = {}
+        token = parts.get('token') or self.tokens.get(scenario.auth)
+        if token:
+            headers['HTTP_AUTHORIZATION'] = f'Token {token}'
+        client_method = getattr(self.client, scenario.method)
+        if parts.get('body') is not None:
+            return lambda: client_method(
+                url, data=parts['body'], content_type=parts['content_type'],
+                **headers
+            )
+        data = parts.get('data')
+        if data is None:
+            return lambda: client_method(url, **headers)
+        return lambda: client_method(
+            url, data=json.dumps(data), content_type='application/json',
+            **headers
+        )
+
+    @staticmethod
+    def percentile(values: list[float], percent: int) -> float:
+        index = max(round(percent / 100 * len(values)) - 1, 0)
+        return values[min(index, len(values) - 1)]
+
+    def image_base64(self) -> str:
+        buffer = io.BytesIO()
+        Image.new('RGB', (32, 32), (90, 160, 40)).save(buffer, format='PNG')
+        data = base64.b64encode(buffer.getvalue()).decode()
+        return f'data:image/png;base64,{data}'
+
+    def create_recipe(self) -> Recipe:
+        recipe = Recipe.objects.create(
+            name='Рецепт', text='Описание', cooking_time=10,
+            image=Recipe.objects.exclude(image='').first().image.name,
+            author=self.user
+        )
+        recipe.tags.set(self.dataset.tag_ids[:1])
+        recipe.recipe_ingredient.create(
+            ingredient_id=self.dataset.ingredient_ids[0], amount=1
+        )
+        return recipe
+
+    def recipe_data(self) -> dict[str, Any]:
+        return {
+            'name': 'Новый рецепт',
+            'text': 'Описание нового рецепта',
+            'image': self.image,
+            'cooking_time': 30,
+            'tags': list(self.dataset.tag_ids[:2]),
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 100}
+                for ingredient_id in self.dataset.ingredient_ids[:8]
+            ],
+        }
+
+    def recipe_batch(self, size: int) -> dict[str, Any]:
+        line = json.dumps(self.recipe_data())
+        return {'body': '\n'.join([line] * size).encode(),
+                'content_type': 'application/x-ndjson'}
+
+    def recipe_id(self, iteration: int) -> int:
+        ids = self.dataset.recipe_ids
+        return ids[iteration % len(ids)]
+
+    def author_id(self, iteration: int) -> int:
+        ids = self.dataset.user_ids[1:]
+        return ids[iteration % len(ids)]
+
+    def signout(self, iteration: int) -> dict[str, Any]:
+        Token.objects.filter(user=self.other).delete()
+        return {'token': Token.objects.create(user=self.other).key}
+
+    def link(self, model: type, iteration: int,
+             exists: bool) -> dict[str, Any]:
+        recipe_id = self.recipe_id(iteration)
+        if exists:
+            model.objects.get_or_create(user=self.user, recipe_id=recipe_id)
+        else:
+            model.objects.filter(user=self.user, recipe_id=recipe_id).delete()
+        return {'kwargs': {'pk': recipe_id}}
+
+    def links(self, model: type, iteration: int,
+              exists: bool) -> dict[str, Any]:
+        recipe_ids = [self.recipe_id(iteration * 20 + offset)
+                      for offset in range(20)]
+        model.objects.filter(user=self.user,
+                             recipe_id__in=recipe_ids).delete()
+        if exists:
+            model.objects.bulk_create(
+                model(user=self.user, recipe_id=recipe_id)
+                for recipe_id in set(recipe_ids)
+            )
+        return {'data': {'recipes': recipe_ids}}
+
+    def clear_shopping(self, iteration: int) -> dict[str, Any]:
+        Shopping.objects.filter(user=self.user).delete()
+        return {}
+
+    def subscription(self, iteration: int, exists: bool) -> dict[str, Any]:
+        author_id = self.author_id(iteration)
+        if exists:
+            Subscription.objects.get_or_create(user=self.user,
+                                               author_id=author_id)
+        else:
+            Subscription.objects.filter(user=self.user,
+                                        author_id=author_id).delete()
+        return {'kwargs': {'pk': author_id}}
+
+    def scenarios(self) -> list[Scenario]:
+        password = SyntheticDataset.PASSWORD
+        tags = '&'.join(f'tags={slug}' for slug in self.dataset.tag_slugs[:2])
+        ingredients = (
+            f'ingredients={self.dataset.ingredient_ids[0]}'
+            f'&exclude_ingredients={self.dataset.ingredient_ids[1]}'
+        )
+        pantry = '&'.join(
+            f'ingredients={ingredient_id}'
+            for ingredient_id in self.dataset.ingredient_ids[:300]
+        )
+        stats_status = 200 if request_stats_buffer.enabled else 404
+        return [
+            Scenario('auth-signin', 'post', ANONYMOUS, 201, build=lambda i: {
+                'data': {'email': self.other.email, 'password': password}
+            }),
+            Scenario('auth-signout', 'post', ANONYMOUS, 204,
+                     build=self.signout),
+            Scenario('user-list', auth=ADMIN),
+            Scenario('user-list', 'post', ANONYMOUS, 201, build=lambda i: {
+                'data': {
+                    'username': f'benchmark{i}',
+                    'email': f'benchmark{i}@example.com',
+                    'password': password,
+                    'first_name': 'Имя',
+                    'last_name': 'Фамилия',
+                }
+            }),
+            Scenario('user-me'),
+            Scenario('user-password', 'post', status=204, build=lambda i: {
+                'data': {'current_password': password,
+                         'new_password': password}
+            }),
+            Scenario('user-subscribtion'),
+            Scenario('user-feed'),
+            Scenario('user-subscribtion', label='user-subscribtion GET '
+                     'recipes_limit', build=lambda i: {
+                         'query': 'recipes_limit=3'
+                     }),
+            Scenario('user-detail', build=lambda i: {
+                'kwargs': {'pk': self.author_id(i)}
+            }),
+            Scenario('user-subscribe', 'post', status=201,
+                     build=lambda i: self.subscription(i, exists=False)),
+            Scenario('user-subscribe', 'delete', status=204,
+                     build=lambda i: self.subscription(i, exists=True)),
+            Scenario('tag-list', auth=ANONYMOUS),
+            Scenario('tag-detail', auth=ANONYMOUS, build=lambda i: {
+                'kwargs': {'pk': self.dataset.tag_ids[0]}
+            }),
+            Scenario('ingredient-list', auth=ANONYMOUS),
+            Scenario('ingredient-list', auth=ANONYMOUS,
+                     label='ingredient-list GET search', build=lambda i: {
+                         'query': 'search=ку'
+                     }),
+            Scenario('ingredient-detail', auth=ANONYMOUS, build=lambda i: {
+                'kwargs': {'pk': self.dataset.ingredient_ids[0]}
+            }),
+            Scenario('recipe-list', auth=ANONYMOUS,
+                     label='recipe-list GET anonymous'),
+            Scenario('recipe-list'),
+            Scenario('recipe-list', label='recipe-list GET tags',
+                     build=lambda i: {'query': tags}),
+            Scenario('recipe-list', label='recipe-list GET favorited',
+                     build=lambda i: {'query': 'is_favorited=1'}),
+            Scenario('recipe-list', label='recipe-list GET author',
+                     build=lambda i: {'query': f'author={self.user.id}'}),
+            Scenario('recipe-list', label='recipe-list GET ingredients',
+                     build=lambda i: {'query': ingredients}),
+            Scenario('recipe-list', label='recipe-list GET trending',
+                     build=lambda i: {'query': 'ordering=trending'}),
+            Scenario('recipe-list', 'post', status=201, build=lambda i: {
+                'data': self.recipe_data()
+            }),
+            Scenario('recipe-batch', 'post', label='recipe-batch POST 20',
+                     build=lambda i: self.recipe_batch(20)),
+            Scenario('recipe-detail', build=lambda i: {
+                'kwargs': {'pk': self.recipe_id(i)}
+            }),
+            Scenario('recipe-cookable', auth=ANONYMOUS, build=lambda i: {
+                'query': f'{pantry}&missing=2'
+            }),
+            Scenario('recipe-similar', build=lambda i: {
+                'kwargs': {'pk': self.recipe_id(i)}
+            }),
+            Scenario('recipe-detail', 'patch', build=lambda i: {
+                'kwargs': {'pk': self.own_recipe.id},
+                'data': {'name': f'Рецепт {i}', 'cooking_time': i + 1},
+            }),
+            Scenario('recipe-detail', 'delete', status=204, build=lambda i: {
+                'kwargs': {'pk': self.create_recipe().id}
+            }),
+            Scenario('favorite', 'post', status=201,
+                     build=lambda i: self.link(Favorite, i, exists=False)),
+            Scenario('favorite', 'delete', status=204,
+                     build=lambda i: self.link(Favorite, i, exists=True)),
+            Scenario('shopping', 'post', status=201,
+                     build=lambda i: self.link(Shopping, i, exists=False)),
+            Scenario('shopping', 'delete', status=204,
+                     build=lambda i: self.link(Shopping, i, exists=True)),
+            Scenario('favorite-bulk', 'post', status=201,
+                     build=lambda i: self.links(Favorite, i, exists=False)),
+            Scenario('favorite-bulk', 'delete', status=204,
+                     build=lambda i: self.links(Favorite, i, exists=True)),
+            Scenario('shopping-bulk', 'post', status=201,
+                     build=lambda i: self.links(Shopping, i, exists=False)),
+            Scenario('shopping-bulk', 'delete', status=204,
+                     build=lambda i: self.links(Shopping, i, exists=True)),
+            Scenario('shopping-from-favorites', 'post', status=201,
+                     build=self.clear_shopping),
+            Scenario('download-shopping'),
+            Scenario('request-stats', auth=ADMIN, status=stats_status),
+        ]
+
+    def report(self, results: dict[str, dict[str, Any]]) -> None:
+        print(f'{"scenario":<38} {"p50":>8} {"p90":>8} {"p99":>8} '
+              f'{"queries":>7} {"memory":>10}')
+        for label, result in results.items():
+            print(f'{label:<38} {result["p50_ms"]:>8.2f} '
+                  f'{result["p90_ms"]:>8.2f} {result["p99_ms"]:>8.2f} '
+                  f'{result["queries"]:>7} '
+                  f'{result["memory_kib"]:>7.1f} KiB')
+
+    def save_baseline(self, file_name: str, report: dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        with open(file_name, mode='w') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        print(f'baseline saved to `{file_name}`')
+
+    def compare(self, file_name: str, report: dict[str, Any],
+                tolerance: float) -> None:
+        if not os.path.isfile(file_name):
+            print(f'baseline `{file_name}` not found, run with '
+                  f'--save-baseline to create it')
+            return
+        with open(file_name) as file:
+            baseline = json.load(file)
+        if baseline['dataset'] != report['dataset']:
+            raise CommandError(
+                f'Baseline dataset {baseline["dataset"]} differs from '
+                f'{report["dataset"]}'
+            )
+        regressions = []
+        for label, result in report['results'].items():
+            expected = baseline['results'].get(label)
+            if expected is None:
+                continue
+            if result['queries'] > expected['queries']:
+                regressions.append(
+                    f'{label}: queries {expected["queries"]} -> '
+                    f'{result["queries"]}'
+                )
+            limit = expected['p50_ms'] * (1 + tolerance) + 1
+            if result['p50_ms'] > limit:
+                regressions.append(
+                    f'{label}: p50 {expected["p50_ms"]:.2f} ms -> '
+                    f'{result["p50_ms"]:.2f} ms'
+                )
+        if regressions:
+            raise CommandError(
+                'Performance regressions:\n' + '\n'.join(regressions)
+            )
+        print('no regressions against the baseline')
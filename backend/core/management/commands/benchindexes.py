@@ -0,0 +1,167 @@
+from typing import Any, Iterator
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import connection
+from django.db.models import Count
+from django.db.models.query import QuerySet
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.views import (
+    DownloadShoppingCartView,
+    RecipeListView,
+    SubscribtionView,
+)
+from recipes.models import (
+    Favorite,
+    RecipeIngredient,
+    Recipe,
+    RecipeBucket,
+    Shopping,
+    Tag,
+)
+from users.models import FoodgramUser, Subscription
+
+
+class Command(BaseCommand):
+
+    help = ('Check that the hot query shapes of the API use the expected '
+            'indexes, run on a database filled by `seeddb`')
+
+    PAGE_SIZE = 10
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-a', '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE and print execution times.'
+        )
+        parser.add_argument(
+            '-p', '--plans',
+            action='store_true',
+            help='Print plans of all queries.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            failed = []
+            for label, queryset, indexes in self.cases():
+                plan = self.explain(queryset, kwargs['analyze'])
+                used = set(self.index_names(plan['Plan']))
+                missing = set(indexes) - used
+                status = 'FAIL' if missing else 'ok'
+                timing = (f' {plan["Execution Time"]:.2f} ms'
+                          if kwargs['analyze'] else '')
+                print(f'{status:<5}{label:<42}{timing} '
+                      f'uses: {", ".join(sorted(used)) or "-"}')
+                if missing:
+                    failed.append(label)
+                    print(f'     missing: {", ".join(sorted(missing))}')
+                if missing or kwargs['plans']:
+                    print(queryset.explain())
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
+        if failed:
+            raise CommandError(f'Expected indexes not used: {failed}')
+
+    def explain(self, queryset: QuerySet, analyze: bool) -> dict[str, Any]:
+        sql, params = queryset.query.sql_with_params()
+        options = 'FORMAT JSON, ANALYZE' if analyze else 'FORMAT JSON'
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN ({options}) {sql}', params)
+            return cursor.fetchone()[0][0]
+
+    def index_names(self, node: dict[str, Any]) -> Iterator[str]:
+        if 'Index Name' in node:
+            yield node['Index Name']
+        for child in node.get('Plans', ()):
+            yield from self.index_names(child)
+
+    def request(self, user: Any, path: str = '/',
+                data: dict[str, Any] = None) -> Request:
+        request = Request(APIRequestFactory().get(path, data))
+        request.user = user
+        return request
+
+    def filtered(self, user: Any, data: dict[str, Any]) -> QuerySet:
+        view = RecipeListView(request=self.request(user, '/', data))
+        return view.filter_queryset()
+
+    def cases(self) -> Iterator[tuple[str, QuerySet, tuple[str, ...]]]:
+        size = type(self).PAGE_SIZE
+        author = FoodgramUser.objects.annotate(
+            amount=Count('recipes')
+        ).order_by('-amount').first()
+        followed = Subscription.objects.values('author_id').annotate(
+            amount=Count('id')
+        ).order_by('-amount').first()
+        user = FoodgramUser.objects.get(id=Shopping.objects.values(
+            'user_id'
+        ).annotate(amount=Count('id')).order_by('-amount')[0]['user_id'])
+        subscriber = FoodgramUser.objects.get(id=Subscription.objects.values(
+            'user_id'
+        ).annotate(amount=Count('id')).order_by('-amount')[0]['user_id'])
+        tag = Tag.objects.annotate(
+            amount=Count('recipe_tag')
+        ).filter(amount__gt=0).order_by('amount').first()
+        ingredient_id = RecipeIngredient.objects.values_list(
+            'ingredient_id', flat=True
+        ).first()
+        page = list(Recipe.objects.values_list('id', flat=True)[:size])
+        buckets = list(RecipeBucket.objects.filter(
+            recipe_id=page[0]
+        ).values_list('bucket', flat=True))
+
+        yield ('recipes by author', self.filtered(
+            AnonymousUser(), {'author': author.id}
+        )[:size], ('recipe_author_idx',))
+        yield ('recipes by tag', self.filtered(
+            AnonymousUser(), {'tags': [tag.slug]}
+        )[:size], ('recipetag_tag_idx',))
+        yield ('recipes by popularity', self.filtered(
+            AnonymousUser(), {'ordering': 'popular'}
+        )[:size], ('ranking_popular_idx',))
+        yield ('recipes by trending', self.filtered(
+            user, {'ordering': 'trending'}
+        )[:size], ('ranking_trending_idx',))
+        yield ('recipes with and without ingredients', self.filtered(
+            AnonymousUser(), {'ingredients': [ingredient_id],
+                              'exclude_ingredients': [ingredient_id + 1]}
+        )[:size], ('recipeingredient_ingr_idx',))
+        yield ('recipes favorited by user', self.filtered(
+            user, {'is_favorited': 1}
+        )[:size], ('unique_favorite',))
+        yield ('recipes in shopping cart', self.filtered(
+            user, {'is_in_shopping_cart': 1}
+        )[:size], ('unique_shopping',))
+        yield ('recipe ingredients prefetch', RecipeIngredient.objects.filter(
+            recipe_id__in=page
+        ), ('unique_recipe_ingredient',))
+        yield ('recipe tags prefetch', Tag.objects.filter(
+            recipe_tag__recipe_id__in=page
+        ), ('unique_recipe_tag',))
+        yield ('recipes with ingredient', RecipeIngredient.objects.filter(
+            ingredient_id=ingredient_id
+        ).values('recipe_id'), ('recipeingredient_ingr_idx',))
+        yield ('similar recipe candidates', RecipeBucket.objects.filter(
+            bucket__in=buckets
+        ).values('recipe_id'), ('recipebucket_bucket_idx',))
+        yield ('author followers', Subscription.objects.filter(
+            author_id=followed['author_id']
+        ).values('user_id'), ('subscription_author_idx',))
+        yield ('subscriptions of user', SubscribtionView(
+            request=self.request(subscriber)
+        ).filter_queryset()[:size], ('subscription_user_idx',))
+        yield ('author recipes of subscriptions', Recipe.objects.filter(
+            author_id__in=subscriber.subscription_source.values('author_id')
+        ).order_by('author_id', 'id'), ('recipe_author_idx',))
+        yield ('shopping cart download', DownloadShoppingCartView(
+            request=self.request(user)
+        ).get_queryset(), ('unique_shopping', 'unique_recipe_ingredient'))
+        yield ('favorite exists', Favorite.objects.filter(
+            user=user, recipe_id=page[0]
+        ), ('unique_favorite',))
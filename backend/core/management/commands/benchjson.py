@@ -0,0 +1,102 @@
+import io
+import json
+import timeit
+from typing import Any, Callable
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.parsers import FoodgramJSONParser
+from api.renderers import FoodgramJSONRenderer, orjson
+from api.representations import (
+    IngredientRepresentation,
+    RecipeReadRepresentation,
+)
+from api.views import (
+    IngredientListView,
+    RecipeListView,
+)
+
+
+class Command(BaseCommand):
+
+    help = ('Compare DRF and Foodgram JSON renderers and parsers on recipe '
+            'pages and the ingredient catalogue of the current database')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-l', '--limit',
+            type=int,
+            default=100,
+            help='Recipes per page.'
+        )
+        parser.add_argument(
+            '-r', '--repeat',
+            type=int,
+            default=20,
+            help='Runs per case, the best one is reported.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            print(f'orjson: {orjson.__version__ if orjson else "missing"}')
+            request = APIRequestFactory().get('/')
+            request.user = AnonymousUser()
+            recipes = RecipeListView(
+                request=request
+            ).get_queryset()[:kwargs['limit']]
+            ingredients = IngredientListView(request=request).get_queryset()
+            payloads = (
+                ('recipe page', {
+                    'count': len(recipes),
+                    'next': None,
+                    'previous': None,
+                    'results': RecipeReadRepresentation(
+                        instance=recipes, many=True
+                    ).data
+                }),
+                ('ingredient catalogue', IngredientRepresentation(
+                    instance=ingredients, many=True
+                ).data),
+            )
+            for name, data in payloads:
+                self.run_case(name, data, kwargs['repeat'])
+        except CommandError:
+            raise
+        except Exception as error:
+            raise CommandError(f'error: {type(error)} = {error}')
+
+    def run_case(self, name: str, data: Any, repeat: int) -> None:
+        expected = JSONRenderer().render(data)
+        actual = FoodgramJSONRenderer().render(data)
+        if expected != actual:
+            raise CommandError(f'{name}: rendered JSON differs')
+        if JSONParser().parse(self.stream(actual)) != json.loads(expected):
+            raise CommandError(f'{name}: parsed JSON differs')
+        cases = (
+            ('render', lambda: JSONRenderer().render(data),
+             lambda: FoodgramJSONRenderer().render(data)),
+            ('parse', lambda: JSONParser().parse(self.stream(expected)),
+             lambda: FoodgramJSONParser().parse(self.stream(expected))),
+        )
+        for operation, slow, fast in cases:
+            slow_time = self.measure(slow, repeat)
+            fast_time = self.measure(fast, repeat)
+            speedup = slow_time / fast_time if fast_time else 0
+            print(f'{name:<22} {operation:<7} {len(expected):>9} bytes  '
+                  f'drf {slow_time * 1000:8.2f} ms  '
+                  f'foodgram {fast_time * 1000:8.2f} ms  x{speedup:.1f}')
+
+    @staticmethod
+    def measure(function: Callable[[], Any], repeat: int) -> float:
+        return min(timeit.repeat(function, number=1, repeat=repeat))
+
+    @staticmethod
+    def stream(data: bytes) -> io.BytesIO:
+        return io.BytesIO(data)
@@ -0,0 +1,122 @@
+import timeit
+from typing import Any, Callable
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db.models.query import QuerySet
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.representations import (
+    IngredientRepresentation,
+    RecipeMinifiedRepresentation,
+    RecipeReadRepresentation,
+    SubscriptionReadRepresentation,
+)
+from api.serializers import (
+    IngredientSerializer,
+    RecipeMinifiedSerializer,
+    RecipeReadSerializer,
+    SubscriptionReadSerializer,
+)
+from api.views import (
+    IngredientListView,
+    RecipeListView,
+    SubscribtionView,
+)
+from users.models import FoodgramUser
+
+
+class Command(BaseCommand):
+
+    # Parity of the outputs is checked by `api.tests`.
+    help = ('Compare speed of read serializers and their fast path '
+            'representations on the current database')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-u', '--user',
+            type=int,
+            help='User id for annotated querysets (anonymous by default).'
+        )
+        parser.add_argument(
+            '-l', '--limit',
+            type=int,
+            default=100,
+            help='Objects per run.'
+        )
+        parser.add_argument(
+            '-r', '--repeat',
+            type=int,
+            default=5,
+            help='Runs per case, the best one is reported.'
+        )
+        parser.add_argument(
+            '--recipes-limit',
+            type=int,
+            help='`recipes_limit` of subscriptions.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            request = APIRequestFactory().get('/')
+            if kwargs['user']:
+                request.user = FoodgramUser.objects.get(id=kwargs['user'])
+            else:
+                request.user = AnonymousUser()
+            limit = kwargs['limit']
+            context = {'recipes_limit': kwargs['recipes_limit']}
+            recipes = list(
+                RecipeListView(request=request).get_queryset()[:limit]
+            )
+            ingredients = IngredientListView(
+                request=request
+            ).get_queryset()[:limit]
+            subscriptions = []
+            if request.user.is_authenticated:
+                subscriptions = list(
+                    SubscribtionView(request=request).get_queryset()[:limit]
+                )
+            cases = (
+                ('RecipeReadSerializer', RecipeReadSerializer,
+                 RecipeReadRepresentation, recipes, {}),
+                ('RecipeMinifiedSerializer', RecipeMinifiedSerializer,
+                 RecipeMinifiedRepresentation, recipes, {}),
+                ('IngredientSerializer', IngredientSerializer,
+                 IngredientRepresentation, ingredients, {}),
+                ('SubscriptionReadSerializer', SubscriptionReadSerializer,
+                 SubscriptionReadRepresentation, subscriptions, context),
+            )
+            for name, serializer, representation, instances, ctx in cases:
+                self.run_case(name, serializer, representation, instances,
+                              ctx, kwargs['repeat'])
+        except Exception as error:
+            raise CommandError(f'error: {type(error)} = {error}')
+
+    def run_case(self, name: str, serializer: type, representation: type,
+                 instances: Any, context: dict[str, Any],
+                 repeat: int) -> None:
+        renderer = JSONRenderer()
+
+        def render(cls: type) -> Callable[[], bytes]:
+            def run() -> bytes:
+                instance = instances
+                if isinstance(instance, QuerySet):
+                    instance = instance.all()
+                return renderer.render(
+                    cls(instance=instance, many=True, context=context).data
+                )
+            return run
+
+        size = len(render(representation)())
+        slow = min(timeit.repeat(render(serializer), number=1,
+                                 repeat=repeat))
+        fast = min(timeit.repeat(render(representation), number=1,
+                                 repeat=repeat))
+        speedup = slow / fast if fast else 0
+        print(f'{name:<28} {size:>9} bytes  '
+              f'serializer {slow * 1000:8.2f} ms  '
+              f'representation {fast * 1000:8.2f} ms  x{speedup:.1f}')
@@ -0,0 +1,165 @@
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from typing import Optional
+
+import numpy as np
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+
+class Command(BaseCommand):
+
+    help = ('Load a running server with concurrent HTTP clients and report '
+            'throughput, latency and memory of the server processes')
+
+    # `{n}` is replaced by a random number from 1 to `--ids`.
+    PATHS = (
+        '/api/recipes/?page={n}',
+        '/api/recipes/{n}/',
+        '/api/recipes/{n}/similar/',
+        '/api/tags/',
+        '/api/ingredients/?name={n}',
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-u', '--url',
+            type=str,
+            default='http://127.0.0.1:9000',
+            help='Server address.'
+        )
+        parser.add_argument(
+            '-p', '--path',
+            type=str,
+            action='append',
+            help='Requested path, may be repeated.'
+        )
+        parser.add_argument(
+            '-c', '--concurrency',
+            type=int,
+            default=16,
+            help='Concurrent clients.'
+        )
+        parser.add_argument(
+            '-d', '--duration',
+            type=float,
+            default=20,
+            help='Seconds to run.'
+        )
+        parser.add_argument(
+            '--ids',
+            type=int,
+            default=100,
+            help='Upper bound of `{n}` in paths.'
+        )
+        parser.add_argument(
+            '--token',
+            type=str,
+            help='Authorization token of requests.'
+        )
+        parser.add_argument(
+            '--server-pid',
+            type=int,
+            help='Gunicorn master pid, reports memory of its workers.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            paths = kwargs['path'] or type(self).PATHS
+            headers = {}
+            if kwargs['token']:
+                headers['Authorization'] = f'Token {kwargs["token"]}'
+            latencies = defaultdict(list)
+            statuses = Counter()
+            deadline = time.monotonic() + kwargs['duration']
+
+            def client() -> None:
+                generator = random.Random()
+                while time.monotonic() < deadline:
+                    template = generator.choice(paths)
+                    path = template.format(
+                        n=generator.randint(1, kwargs['ids'])
+                    )
+                    request = urllib.request.Request(
+                        kwargs['url'] + path, headers=headers
+                    )
+                    started = time.perf_counter()
+                    try:
+                        with urllib.request.urlopen(request,
+                                                    timeout=60) as response:
+                            response.read()
+                            code = response.status
+                    except urllib.error.HTTPError as error:
+                        code = error.code
+                    except OSError:
+                        code = 0
+                    latencies[template].append(time.perf_counter() - started)
+                    statuses[code] += 1
+
+            started = time.monotonic()
+            clients = [threading.Thread(target=client)
+                       for _ in range(kwargs['concurrency'])]
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+            elapsed = time.monotonic() - started
+            self.report(latencies, statuses, elapsed)
+            if kwargs['server_pid']:
+                self.report_memory(kwargs['server_pid'])
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
+
+    @staticmethod
+    def report(latencies: dict[str, list[float]], statuses: Counter,
+               elapsed: float) -> None:
+        total = sum(statuses.values())
+        print(f'{total} requests in {elapsed:.1f} s, '
+              f'{total / elapsed:.1f} req/s, statuses {dict(statuses)}')
+        print(f'{"path":<30} {"count":>6} {"p50 ms":>8} {"p95 ms":>8} '
+              f'{"p99 ms":>8}')
+        rows = sorted(latencies.items())
+        rows.append(('all', [value for _, values in rows
+                             for value in values]))
+        for path, values in rows:
+            p50, p95, p99 = np.percentile(values, (50, 95, 99)) * 1000
+            print(f'{path:<30} {len(values):>6} {p50:>8.1f} {p95:>8.1f} '
+                  f'{p99:>8.1f}')
+
+    @classmethod
+    def report_memory(cls, pid: int) -> None:
+        """ Proportional and private memory of the master and workers. """
+        with open(f'/proc/{pid}/task/{pid}/children') as file:
+            children = [int(child) for child in file.read().split()]
+        total_pss = total_private = 0
+        for process in (pid, *children):
+            pss, private = cls.read_memory(process) or (0, 0)
+            total_pss += pss
+            total_private += private
+            print(f'pid {process}: pss {pss / 1024:.1f} MiB, '
+                  f'private {private / 1024:.1f} MiB')
+        print(f'total: pss {total_pss / 1024:.1f} MiB, '
+              f'private {total_private / 1024:.1f} MiB')
+
+    @staticmethod
+    def read_memory(pid: int) -> Optional[tuple[int, int]]:
+        path = f'/proc/{pid}/smaps_rollup'
+        if not os.path.exists(path):
+            return None
+        values = {}
+        with open(path) as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    values[parts[0].rstrip(':')] = int(parts[1])
+        private = values.get('Private_Clean', 0) + values.get(
+            'Private_Dirty', 0
+        )
+        return values.get('Pss', 0), private
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from recipes.models import Recipe
+from recipes.purge import Purge
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+
+    help = ('Purge soft deleted users and recipes left by failed or lost '
+            'purge jobs')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-b', '--batch-size',
+            type=int,
+            default=settings.PURGE_BATCH_SIZE,
+            help='Dependent rows deleted per statement.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            purge = Purge(kwargs['batch_size'])
+            for model in (User, Recipe):
+                ids = list(model.objects.filter(deleted=True).values_list(
+                    'id', flat=True
+                ))
+                deleted = 0
+                for start in range(0, len(ids), kwargs['batch_size']):
+                    deleted += purge.purge(
+                        model, ids[start:start + kwargs['batch_size']]
+                    )
+                print(f'purged {deleted} {model._meta.model_name} rows')
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
@@ -0,0 +1,27 @@
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from recipes.ranking import Ranking
+
+
+class Command(BaseCommand):
+
+    help = ('Add new favorites and carts to the popular and trending '
+            'recipe rankings, run periodically')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute all rankings, accounts for removed favorites.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            result = Ranking.update(full=kwargs['full'])
+            print(f'added {result["recipes"]} recipes, updated popular '
+                  f'{result["popular"]}, trending {result["trending"]}')
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
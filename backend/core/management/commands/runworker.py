@@ -0,0 +1,43 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.utils.module_loading import autodiscover_modules
+
+from core.jobs import Worker, registry
+
+
+class Command(BaseCommand):
+
+    help = ('Run queued background jobs, start several workers to run jobs '
+            'in parallel')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when no jobs are due instead of waiting for new ones.'
+        )
+        parser.add_argument(
+            '-s', '--sleep',
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help='Seconds to wait before polling an empty queue again.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            autodiscover_modules('jobs')
+            worker = Worker(kwargs['sleep'])
+            # Finish the running job before exiting.
+            signal.signal(signal.SIGTERM, worker.stop)
+            signal.signal(signal.SIGINT, worker.stop)
+            print(f'worker {worker.name} started, jobs: '
+                  f'{", ".join(sorted(registry))}')
+            done = worker.run(once=kwargs['once'])
+            print(f'worker {worker.name} stopped, ran {done} jobs')
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
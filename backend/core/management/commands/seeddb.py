@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from core.dataset import SyntheticDataset
+from recipes.ranking import Ranking
+
+
+class Command(BaseCommand):
+
+    help = ('Fill database with a deterministic synthetic dataset, '
+            'use on an idle database only')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--recipes', type=int, default=100_000)
+        parser.add_argument(
+            '--ingredients',
+            type=int,
+            default=0,
+            help='Ingredients to create, 0 reuses the existing ones.'
+        )
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=0,
+            help='Tags to create, 0 reuses the existing ones.'
+        )
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--tags-per-recipe', type=int, default=2)
+        parser.add_argument('--favorites-per-user', type=int, default=30)
+        parser.add_argument('--shopping-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int,
+                            default=10)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Zipf exponent of authors, recipes and subscriptions.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=50_000)
+        parser.add_argument(
+            '--disable-triggers',
+            action='store_true',
+            help=('Skip foreign key checks while loading, PostgreSQL '
+                  'superuser only.')
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        dataset = SyntheticDataset(
+            users=kwargs['users'],
+            recipes=kwargs['recipes'],
+            ingredients=kwargs['ingredients'],
+            tags=kwargs['tags'],
+            ingredients_per_recipe=kwargs['ingredients_per_recipe'],
+            tags_per_recipe=kwargs['tags_per_recipe'],
+            favorites_per_user=kwargs['favorites_per_user'],
+            shopping_per_user=kwargs['shopping_per_user'],
+            subscriptions_per_user=kwargs['subscriptions_per_user'],
+            skew=kwargs['skew'],
+            seed=kwargs['seed'],
+            batch_size=kwargs['batch_size'],
+            disable_triggers=kwargs['disable_triggers'],
+        )
+        try:
+            started = time.perf_counter()
+            dataset.create()
+            for line in dataset.report():
+                print(line)
+            # Recipes are written with COPY, without their rankings.
+            print(f'rankings: {Ranking.update(full=True)}')
+            print(f'done in {time.perf_counter() - started:.1f} s')
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
@@ -0,0 +1,29 @@
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from recipes.similarity import RecipeSimilarity
+
+
+class Command(BaseCommand):
+
+    help = ('Build MinHash signatures and LSH buckets of recipe '
+            'ingredients for similar recipes')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-b', '--batch-size',
+            type=int,
+            default=10_000,
+            help='Recipe ids per transaction.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            done = 0
+            for done in RecipeSimilarity.build(kwargs['batch_size']):
+                print(f'{done} recipes')
+            print(f'built signatures of {done} recipes')
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
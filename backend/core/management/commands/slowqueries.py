@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from core.slowqueries import SlowQueryReport
+
+
+class Command(BaseCommand):
+
+    help = 'Aggregate slow query log by normalized SQL'
+
+    ORDER_ENUM = ('total', 'count', 'mean', 'p95', 'max')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-f', '--file',
+            type=str,
+            nargs='+',
+            default=[settings.SLOW_QUERY_LOG_FILE],
+            help='Slow query log files.'
+        )
+        parser.add_argument(
+            '--view',
+            type=str,
+            default=None,
+            help='Only queries issued by this view.'
+        )
+        parser.add_argument(
+            '-o', '--order',
+            type=str,
+            choices=type(self).ORDER_ENUM,
+            default='total',
+        )
+        parser.add_argument('-l', '--limit', type=int, default=20)
+        parser.add_argument(
+            '-p', '--plans',
+            action='store_true',
+            help='Print the latest captured EXPLAIN plan of every query.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            report = SlowQueryReport()
+            for file_name in kwargs['file']:
+                with open(file_name) as file:
+                    report.add_lines(file, view=kwargs['view'])
+            rows = report.rows(kwargs['order'])[:kwargs['limit']]
+            print(f'{"count":>7} {"total ms":>11} {"mean ms":>9} '
+                  f'{"p95 ms":>9} {"max ms":>9}  fingerprint')
+            for row in rows:
+                print(f'{row["count"]:>7} {row["total"]:>11.1f} '
+                      f'{row["mean"]:>9.1f} {row["p95"]:>9.1f} '
+                      f'{row["max"]:>9.1f}  {row["fingerprint"]}')
+                print(f'  views: {", ".join(row["views"])}')
+                print(f'  {row["sql"]}')
+                if kwargs['plans'] and row['plan']:
+                    print('  ' + row['plan'].replace('\n', '\n  '))
+                print()
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from recipes.media import RecipeImages
+
+
+class Command(BaseCommand):
+
+    help = ('Remove recipe images no recipe refers to, left by deleted '
+            'recipes and replaced images, run periodically')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-b', '--batch-size',
+            type=int,
+            default=1000,
+            help='Files checked against the database per query.'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Skip files modified less than N seconds ago, they may '
+                 'belong to recipes being created.'
+        )
+        parser.add_argument(
+            '--quarantine',
+            action='store_true',
+            help=f'Move orphans to {settings.MEDIA_QUARANTINE_ROOT} instead '
+                 f'of deleting them.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count orphans.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            checked = orphans = 0
+            for checked, orphans in RecipeImages.sweep(
+                min_age=kwargs['min_age'],
+                batch_size=kwargs['batch_size'],
+                quarantine=kwargs['quarantine'],
+                dry_run=kwargs['dry_run'],
+            ):
+                print(f'checked {checked} files, {orphans} orphans')
+            if kwargs['dry_run']:
+                action = 'found'
+            elif kwargs['quarantine']:
+                action = 'quarantined'
+            else:
+                action = 'deleted'
+            print(f'{action} {orphans} orphans of {checked} files')
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
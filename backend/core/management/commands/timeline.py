@@ -0,0 +1,47 @@
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from recipes.models import Recipe
+from recipes.timeline import Timeline
+
+
+class Command(BaseCommand):
+
+    help = ('Push the latest recipes into the followers timelines and trim '
+            'timelines, run periodically')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-r', '--recent',
+            type=int,
+            default=1000,
+            help='Push the latest N recipes again, pushes are idempotent.'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Refill all timelines from subscriptions, e.g. after seeddb.'
+        )
+        parser.add_argument(
+            '--no-trim',
+            action='store_true',
+            help='Do not trim timelines to TIMELINE_LENGTH.'
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        try:
+            if kwargs['rebuild']:
+                print(f'inserted {Timeline.rebuild()} timeline entries')
+            recipe_ids = Recipe.objects.order_by('-id').values_list(
+                'id', flat=True
+            )[:kwargs['recent']]
+            pushed = sum(
+                Timeline.push_recipe(recipe_id) for recipe_id in recipe_ids
+            )
+            print(f'pushed {pushed} timeline entries')
+            if not kwargs['no_trim']:
+                print(f'trimmed {Timeline.trim()} timeline entries')
+        except Exception as error:
+            raise CommandError(f'error:{type(error)} = {error}')
@@ -0,0 +1,266 @@
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from core.cache import single_flight
+from core.instrumentation import RequestStats
+from core.models import Job
+
+# Upper bounds of the request duration histogram buckets in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+# Name, type and help of every exported metric.
+METRICS = {
+    'foodgram_http_request_duration_seconds': (
+        'histogram', 'Request duration by view class, method and status.'
+    ),
+    'foodgram_db_queries_total': (
+        'counter', 'SQL queries by view class.'
+    ),
+    'foodgram_db_query_seconds_total': (
+        'counter', 'Time spent in SQL queries by view class.'
+    ),
+    'foodgram_cache_requests_total': (
+        'counter', 'Cached response lookups by result, see SingleFlight.'
+    ),
+    'foodgram_worker_busy_seconds_total': (
+        'counter', 'Time workers spent handling requests.'
+    ),
+    'foodgram_workers': (
+        'gauge', 'Running processes serving requests.'
+    ),
+    'foodgram_recipes_created_total': (
+        'counter', 'Recipes created by source.'
+    ),
+    'foodgram_users_registered_total': (
+        'counter', 'Users registered.'
+    ),
+    'foodgram_shopping_cart_downloads_total': (
+        'counter', 'Shopping cart downloads.'
+    ),
+    'foodgram_jobs': (
+        'gauge', 'Queued and running background jobs by name.'
+    ),
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms. With a `directory` every process
+    writes its values to `<directory>/<pid>-<start>.json` at most every
+    `flush_interval` seconds and on exit, the exported values are the sums
+    over all files, so gunicorn workers are aggregated whichever of them
+    serves the scrape. Files of stopped processes are kept to keep the
+    counters monotonic, the directory has to be emptied when the server
+    starts. Without a `directory` only the serving process is exported.
+    """
+
+    JOBS_SQL = (
+        f'SELECT name, status, COUNT(*) FROM {Job._meta.db_table} '
+        f'WHERE status IN (%s, %s) GROUP BY name, status'
+    )
+
+    def __init__(self, directory: str, flush_interval: float) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.counters: dict[tuple[str, Labels], float] = defaultdict(float)
+        self.histograms: dict[tuple[str, Labels], list[float]] = {}
+        self.pid: Optional[int] = None
+        self.file: Optional[str] = None
+        self.flushed = time.monotonic()
+
+    @property
+    def path(self) -> Optional[str]:
+        """ File of the process, workers forked by gunicorn get their own. """
+        if not self.directory:
+            return None
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.file = os.path.join(
+                self.directory, f'{self.pid}-{int(time.time() * 1000)}.json'
+            )
+        return self.file
+
+    @staticmethod
+    def labels(values: dict[str, Any]) -> Labels:
+        return tuple(sorted((key, str(value))
+                            for key, value in values.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, self.labels(labels))
+        with self.lock:
+            self.counters[key] += value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """ Histogram counts of `LATENCY_BUCKETS`, +Inf, sum and count. """
+        key = (name, self.labels(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = [0.0] * (len(LATENCY_BUCKETS) + 3)
+                self.histograms[key] = histogram
+            histogram[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def observe_request(self, stats: RequestStats) -> None:
+        view = stats.view or 'none'
+        self.observe('foodgram_http_request_duration_seconds',
+                     stats.total_time, view=view, method=stats.method,
+                     status=stats.status)
+        self.inc('foodgram_db_queries_total', stats.queries, view=view)
+        self.inc('foodgram_db_query_seconds_total', stats.db_time,
+                 view=view)
+        self.inc('foodgram_worker_busy_seconds_total', stats.total_time)
+        self.flush()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            counters = list(self.counters.items())
+            histograms = [(key, list(values))
+                          for key, values in self.histograms.items()]
+        counters.extend(
+            (('foodgram_cache_requests_total', (('result', result),)), value)
+            for result, value in single_flight.stats.items()
+        )
+        return {
+            'pid': os.getpid(),
+            'counters': [[name, labels, value]
+                         for (name, labels), value in counters],
+            'histograms': [[name, labels, values]
+                           for (name, labels), values in histograms],
+        }
+
+    def flush(self, force: bool = False) -> None:
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if not force and now - self.flushed < self.flush_interval:
+            return
+        self.flushed = now
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary, self.path)
+
+    def snapshots(self) -> Iterator[dict[str, Any]]:
+        if self.path is None:
+            yield self.snapshot()
+            return
+        self.flush(force=True)
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path) as file:
+                    yield json.load(file)
+            except (OSError, ValueError):
+                continue
+
+    @staticmethod
+    def is_running(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def collect(self) -> tuple[dict, dict]:
+        """ Counters and gauges, histograms summed over processes. """
+        values: dict[tuple[str, Labels], float] = defaultdict(float)
+        histograms: dict[tuple[str, Labels], list[float]] = {}
+        for snapshot in self.snapshots():
+            if self.is_running(snapshot['pid']):
+                values[('foodgram_workers', ())] += 1
+            for name, labels, value in snapshot['counters']:
+                values[(name, tuple(map(tuple, labels)))] += value
+            for name, labels, counts in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                if key in histograms:
+                    histograms[key] = [
+                        total + count
+                        for total, count in zip(histograms[key], counts)
+                    ]
+                else:
+                    histograms[key] = counts
+        with connection.cursor() as cursor:
+            cursor.execute(type(self).JOBS_SQL,
+                           (Job.Status.QUEUED, Job.Status.RUNNING))
+            for name, status, count in cursor.fetchall():
+                values[('foodgram_jobs',
+                        (('name', name), ('status', status)))] = count
+        return values, histograms
+
+    @staticmethod
+    def format_labels(labels: Iterable[tuple[str, str]]) -> str:
+        pairs = ','.join(
+            '{}="{}"'.format(key, value.replace('\\', '\\\\')
+                             .replace('"', '\\"').replace('\n', '\\n'))
+            for key, value in labels
+        )
+        return f'{{{pairs}}}' if pairs else ''
+
+    @staticmethod
+    def format_value(value: float) -> str:
+        return str(int(value)) if float(value).is_integer() else repr(value)
+
+    def render(self) -> str:
+        """ Prometheus text exposition format 0.0.4. """
+        values, histograms = self.collect()
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind != 'histogram':
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f'{name}{self.format_labels(labels)} '
+                                     f'{self.format_value(value)}')
+                continue
+            for (metric, labels), counts in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0.0
+                bounds = [repr(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+                for bound, count in zip(bounds, counts):
+                    cumulative += count
+                    bucket_labels = self.format_labels(
+                        (*labels, ('le', bound))
+                    )
+                    lines.append(f'{name}_bucket{bucket_labels} '
+                                 f'{self.format_value(cumulative)}')
+                lines.append(f'{name}_sum{self.format_labels(labels)} '
+                             f'{self.format_value(counts[-2])}')
+                lines.append(f'{name}_count{self.format_labels(labels)} '
+                             f'{self.format_value(counts[-1])}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry(settings.METRICS_DIR,
+                          settings.METRICS_FLUSH_INTERVAL)
+
+
+def flush_on_exit() -> None:
+    if not metrics.counters and not metrics.histograms:
+        return
+    try:
+        metrics.flush(force=True)
+    except OSError:
+        pass
+
+
+atexit.register(flush_on_exit)
@@ -0,0 +1,146 @@
+import logging
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from core.instrumentation import (
+    RequestStats,
+    get_view_name,
+    request_stats_buffer,
+)
+from core.metrics import metrics
+from core.slowqueries import SlowQueryRecorder
+
+logger = logging.getLogger('foodgram.requests')
+
+
+@contextmanager
+def wrap_queries(wrapper: Callable) -> Iterator[None]:
+    """ Installs an execute wrapper on every database connection. """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
+
+
+class WrappedStream:
+    """
+    Content of a streaming response with the execute wrapper of its
+    request installed while it is consumed, queries run by a generator
+    after the view returned are counted too. `on_close` is called once
+    when the server closes the response, whether or not the content was
+    consumed.
+    """
+
+    def __init__(self, content: Iterable[bytes], wrapper: Callable,
+                 on_close: Optional[Callable[[], None]] = None) -> None:
+        self.content = content
+        self.wrapper = wrapper
+        self.on_close = on_close
+        self.closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        with wrap_queries(self.wrapper):
+            yield from self.content
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if self.on_close is not None:
+            self.on_close()
+
+
+class RequestTimingMiddleware:
+    """
+    Counts queries and measures DB, view and rendering time of every
+    request. Results go to the `Server-Timing` header, to the
+    `foodgram.requests` logger, to the in-process ring buffer and to the
+    metrics exported at `/metrics`. Streaming responses are reported when
+    their content is closed, their `Server-Timing` header only covers the
+    view.
+    """
+
+    HEADER = 'Server-Timing'
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        stats = RequestStats(request)
+        request.foodgram_stats = stats
+        with wrap_queries(stats.execute):
+            response = self.get_response(request)
+        if response.streaming:
+            if settings.REQUEST_TIMING_HEADER:
+                response[type(self).HEADER] = stats.server_timing()
+            response.streaming_content = WrappedStream(
+                response.streaming_content, stats.execute,
+                lambda: self.report(stats, response)
+            )
+            return response
+        self.report(stats, response)
+        if settings.REQUEST_TIMING_HEADER:
+            response[type(self).HEADER] = stats.server_timing()
+        return response
+
+    @staticmethod
+    def report(stats: RequestStats, response: HttpResponse) -> None:
+        stats.finish(response)
+        data = stats.as_dict()
+        logger.info(
+            'view=%s method=%s path=%s status=%s queries=%s db_ms=%s '
+            'view_ms=%s render_ms=%s total_ms=%s',
+            data['view'], data['method'], data['path'], data['status'],
+            data['queries'], data['db_ms'], data['view_ms'],
+            data['render_ms'], data['total_ms'],
+            extra={'request_stats': data}
+        )
+        request_stats_buffer.append(data)
+        if settings.METRICS_ENABLED:
+            metrics.observe_request(stats)
+
+    def process_view(self, request: HttpRequest, view_func: Callable,
+                     view_args: Any, view_kwargs: Any) -> None:
+        request.foodgram_stats.start_view(get_view_name(view_func))
+
+    def process_template_response(self, request: HttpRequest,
+                                  response: HttpResponse) -> HttpResponse:
+        request.foodgram_stats.start_render()
+        response.add_post_render_callback(
+            request.foodgram_stats.finish_render
+        )
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Logs slow queries of every request together with the view that issued
+    them, see `SlowQueryRecorder`.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.SLOW_QUERY_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        recorder = SlowQueryRecorder(request)
+        request.foodgram_slow_queries = recorder
+        with wrap_queries(recorder):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = WrappedStream(
+                response.streaming_content, recorder
+            )
+        return response
+
+    def process_view(self, request: HttpRequest, view_func: Callable,
+                     view_args: Any, view_kwargs: Any) -> None:
+        request.foodgram_slow_queries.view = get_view_name(view_func)
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.20 on 2026-10-19 11:00
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profilereport',
+            name='file',
+            field=models.FileField(storage=core.models.profile_report_storage, upload_to=core.models.profile_report_file_name, verbose_name='Файл профиля'),
+        ),
+    ]
@@ -1,8 +1,15 @@
 import csv
 import json
-from typing import Any, Collection
-from django.db.models import Model
+import uuid
+from typing import Any, Collection, Final
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.db.models import Model, Q
 from django.db.models.query import QuerySet
+from django.utils import timezone
+
 CSV_FORMAT = 'csv'
 JSON_FORMAT = 'json'
 FORMAT_ENUM = (CSV_FORMAT, JSON_FORMAT)
@@ -80,3 +87,172 @@ class FoodgramModelMixin:
             data.append(item)
         with open(file_name, mode='w') as file:
             json.dump(data, file)
+
+
+def profile_report_file_name(instance: 'ProfileReport', name: str) -> str:
+    return f'{uuid.uuid4().hex}.prof'
+
+
+def profile_report_storage() -> FileSystemStorage:
+    return FileSystemStorage(location=settings.PROFILER_ROOT)
+
+
+class ProfileReport(models.Model):
+
+    PATH_MAX_LENGTH: Final[int] = 2048
+    VIEW_MAX_LENGTH: Final[int] = 200
+    METHOD_MAX_LENGTH: Final[int] = 10
+
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name='Пользователь',
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+
+    method = models.CharField(
+        verbose_name='Метод',
+        max_length=METHOD_MAX_LENGTH,
+    )
+
+    path = models.CharField(
+        verbose_name='Путь',
+        max_length=PATH_MAX_LENGTH,
+    )
+
+    view = models.CharField(
+        verbose_name='View',
+        max_length=VIEW_MAX_LENGTH,
+    )
+
+    status = models.PositiveSmallIntegerField(
+        verbose_name='Статус ответа',
+    )
+
+    duration = models.FloatField(
+        verbose_name='Длительность, мс',
+    )
+
+    summary = models.TextField(
+        verbose_name='Сводка',
+    )
+
+    file = models.FileField(
+        verbose_name='Файл профиля',
+        upload_to=profile_report_file_name,
+        storage=profile_report_storage,
+    )
+
+    class Meta:
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+        ordering = ('-created',)
+
+    def __str__(self) -> str:
+        return f'{self.method} {self.path}'
+
+
+class Job(models.Model):
+
+    NAME_MAX_LENGTH: Final[int] = 100
+    WORKER_MAX_LENGTH: Final[int] = 100
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        FAILED = 'failed', 'Ошибка'
+
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=NAME_MAX_LENGTH,
+    )
+
+    args = models.JSONField(
+        verbose_name='Аргументы',
+        default=list,
+    )
+
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=Status.choices,
+        default=Status.QUEUED,
+    )
+
+    priority = models.SmallIntegerField(
+        verbose_name='Приоритет',
+        default=0,
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Количество попыток',
+        default=0,
+    )
+
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимальное количество попыток',
+    )
+
+    run_at = models.DateTimeField(
+        verbose_name='Время запуска',
+        default=timezone.now,
+    )
+
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True,
+    )
+
+    locked_by = models.CharField(
+        verbose_name='Обработчик',
+        max_length=WORKER_MAX_LENGTH,
+        blank=True,
+    )
+
+    locked_at = models.DateTimeField(
+        verbose_name='Время начала выполнения',
+        null=True,
+        blank=True,
+    )
+
+    finished = models.DateTimeField(
+        verbose_name='Дата завершения',
+        null=True,
+        blank=True,
+    )
+
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('-id',)
+        indexes = (
+            models.Index(
+                fields=('-priority', 'run_at', 'id'),
+                condition=Q(status='queued'),
+                name='job_queued_idx',
+            ),
+            models.Index(
+                fields=('name',),
+                condition=Q(status='running'),
+                name='job_running_idx',
+            ),
+            models.Index(
+                fields=('finished',),
+                condition=Q(status='done'),
+                name='job_done_idx',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.name} #{self.id}'
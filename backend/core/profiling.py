@@ -0,0 +1,124 @@
+import cProfile
+import io
+import marshal
+import pstats
+import time
+import tracemalloc
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.http import HttpRequest, HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.urls import reverse
+
+from core.models import ProfileReport
+
+SUMMARY = 'summary'
+STORE = 'store'
+MODES = {'1': SUMMARY, SUMMARY: SUMMARY, STORE: STORE}
+
+
+class RequestProfiler:
+    """
+    Runs a part of the request under `cProfile` and optionally
+    `tracemalloc`. Profiling is requested with `?_profile=1|summary|store`
+    or the `X-Profile` header, memory tracing with `?_profile_memory=1` or
+    the `X-Profile-Memory` header.
+    """
+
+    QUERY_PARAM = '_profile'
+    MEMORY_QUERY_PARAM = '_profile_memory'
+    HEADER = 'HTTP_X_PROFILE'
+    MEMORY_HEADER = 'HTTP_X_PROFILE_MEMORY'
+    REPORT_HEADER = 'X-Profile-Report'
+
+    def __init__(self, mode: str, memory: bool = False) -> None:
+        self.mode = mode
+        self.memory = memory
+        self.profile = cProfile.Profile()
+        self.started = 0.0
+        self.duration = 0.0
+        self.running = False
+        self.tracing = False
+        self.memory_peak = 0
+        self.memory_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    @classmethod
+    def from_request(cls,
+                     request: HttpRequest) -> Optional['RequestProfiler']:
+        if not settings.PROFILER_ENABLED:
+            return None
+        value = (request.GET.get(cls.QUERY_PARAM)
+                 or request.META.get(cls.HEADER, ''))
+        mode = MODES.get(value.lower())
+        if mode is None:
+            return None
+        memory = (request.GET.get(cls.MEMORY_QUERY_PARAM)
+                  or request.META.get(cls.MEMORY_HEADER, ''))
+        return cls(mode, memory=memory.lower() in ('1', 'true'))
+
+    def start(self) -> None:
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.tracing = True
+        self.running = True
+        self.started = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self.profile.disable()
+        self.running = False
+        self.duration = time.perf_counter() - self.started
+        if self.memory and tracemalloc.is_tracing():
+            self.memory_peak = tracemalloc.get_traced_memory()[1]
+            self.memory_snapshot = tracemalloc.take_snapshot()
+            if self.tracing:
+                tracemalloc.stop()
+
+    def summary(self, limit: Optional[int] = None) -> str:
+        limit = limit or settings.PROFILER_SUMMARY_LIMIT
+        stream = io.StringIO()
+        stream.write(f'duration: {self.duration * 1000:.2f} ms\n\n')
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        if self.memory_snapshot is not None:
+            stream.write(f'memory peak: {self.memory_peak / 1024:.1f} KiB\n')
+            for statistic in self.memory_snapshot.statistics(
+                    'lineno')[:limit]:
+                stream.write(f'{statistic}\n')
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """ Stats in the `.prof` format read by `pstats` and snakeviz. """
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+    def finish(self, request: HttpRequest, response: HttpResponse,
+               view: str) -> HttpResponse:
+        """
+        Stops profiling after the response is rendered. Returns the summary
+        as plain text or stores the report and points to it in a header.
+        """
+        if isinstance(response, SimpleTemplateResponse):
+            response.render()
+        self.stop()
+        if self.mode == SUMMARY:
+            return HttpResponse(self.summary(),
+                                content_type='text/plain; charset=utf-8')
+        report = ProfileReport(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:ProfileReport.PATH_MAX_LENGTH],
+            view=view,
+            status=response.status_code,
+            duration=round(self.duration * 1000, 3),
+            summary=self.summary(),
+        )
+        report.file.save('profile.prof', ContentFile(self.dump()))
+        response[type(self).REPORT_HEADER] = reverse(
+            'admin:core_profilereport_change', args=(report.id,)
+        )
+        return response
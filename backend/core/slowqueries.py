@@ -0,0 +1,154 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpRequest
+
+logger = logging.getLogger('foodgram.slow_queries')
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+VALUES_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+SPACES = re.compile(r'\s+')
+
+
+def normalize_sql(sql: str) -> str:
+    """ SQL without literals and parameter lists, one line. """
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = VALUES_LIST.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def sql_fingerprint(normalized_sql: str) -> str:
+    return hashlib.md5(normalized_sql.encode()).hexdigest()[:16]
+
+
+class SlowQueryRecorder:
+    """
+    `connection.execute_wrapper` that logs queries slower than
+    `SLOW_QUERY_THRESHOLD_MS` as JSON lines to the `foodgram.slow_queries`
+    logger. A `SLOW_QUERY_EXPLAIN_RATE` share of slow SELECT queries is
+    run again under `EXPLAIN (ANALYZE, BUFFERS)` on PostgreSQL.
+    """
+
+    EXPLAIN_SQL = 'EXPLAIN (ANALYZE, BUFFERS) '
+
+    def __init__(self, request: Optional[HttpRequest] = None,
+                 threshold: Optional[float] = None,
+                 explain_rate: Optional[float] = None,
+                 sample: Callable[[], float] = random.random) -> None:
+        self.method = request.method if request is not None else ''
+        self.path = request.path if request is not None else ''
+        self.view = ''
+        if threshold is None:
+            threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if explain_rate is None:
+            explain_rate = settings.SLOW_QUERY_EXPLAIN_RATE
+        self.threshold = threshold / 1000
+        self.explain_rate = explain_rate
+        self.sample = sample
+        self.explaining = False
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool,
+                 context: dict[str, Any]) -> Any:
+        if self.explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            self.record(sql, params, many, context, duration)
+        return result
+
+    def record(self, sql: str, params: Any, many: bool,
+               context: dict[str, Any], duration: float) -> None:
+        connection = context['connection']
+        normalized = normalize_sql(sql)
+        data = {
+            'timestamp': time.time(),
+            'view': self.view,
+            'method': self.method,
+            'path': self.path,
+            'database': connection.alias,
+            'duration_ms': round(duration * 1000, 3),
+            'fingerprint': sql_fingerprint(normalized),
+            'sql': normalized,
+            'plan': None,
+        }
+        if (not many and self.explain_rate
+                and self.sample() < self.explain_rate):
+            data['plan'] = self.explain(connection, sql, params)
+        logger.warning(json.dumps(data, ensure_ascii=False))
+
+    def explain(self, connection: Any, sql: str,
+                params: Any) -> Optional[str]:
+        if (connection.vendor != 'postgresql'
+                or not sql.lstrip()[:6].upper() == 'SELECT'):
+            return None
+        self.explaining = True
+        try:
+            # A savepoint keeps the outer transaction usable on failure.
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(type(self).EXPLAIN_SQL + sql, params)
+                    return '\n'.join(row[0] for row in cursor.fetchall())
+        except Exception as error:
+            return f'EXPLAIN failed: {error}'
+        finally:
+            self.explaining = False
+
+
+class SlowQueryReport:
+    """ Aggregates slow query log lines by SQL fingerprint. """
+
+    def __init__(self) -> None:
+        self.queries: dict[str, dict[str, Any]] = {}
+
+    def add_lines(self, lines: Iterable[str],
+                  view: Optional[str] = None) -> None:
+        for line in lines:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+            if view and data['view'] != view:
+                continue
+            self.add(data)
+
+    def add(self, data: dict[str, Any]) -> None:
+        query = self.queries.setdefault(data['fingerprint'], {
+            'fingerprint': data['fingerprint'],
+            'sql': data['sql'],
+            'durations': [],
+            'views': set(),
+            'plan': None,
+        })
+        query['durations'].append(data['duration_ms'])
+        query['views'].add(data['view'] or '-')
+        if data.get('plan'):
+            query['plan'] = data['plan']
+
+    def rows(self, order_by: str = 'total') -> list[dict[str, Any]]:
+        rows = []
+        for query in self.queries.values():
+            durations = sorted(query['durations'])
+            rows.append({
+                'fingerprint': query['fingerprint'],
+                'sql': query['sql'],
+                'views': sorted(query['views']),
+                'count': len(durations),
+                'total': sum(durations),
+                'mean': sum(durations) / len(durations),
+                'p95': durations[int(0.95 * (len(durations) - 1))],
+                'max': durations[-1],
+                'plan': query['plan'],
+            })
+        return sorted(rows, key=lambda row: row[order_by], reverse=True)
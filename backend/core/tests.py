@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from django.urls import reverse
+
+from core.models import ProfileReport
+from users.models import FoodgramUser
+
+
+class ProfileReportDownloadTest(TestCase):
+    """ Profile dumps are downloaded through the admin by staff only. """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.admin = FoodgramUser.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password',
+            first_name='Admin', last_name='Admin',
+        )
+        cls.user = FoodgramUser.objects.create_user(
+            username='user', email='user@example.com', password='password',
+            first_name='User', last_name='User',
+        )
+
+    def setUp(self) -> None:
+        self.report = ProfileReport(method='GET', path='/api/recipes/',
+                                    view='RecipeListView', status=200,
+                                    duration=1.0, summary='')
+        self.report.file.save('profile.prof', ContentFile(b'dump'))
+        self.addCleanup(self.report.file.delete, save=False)
+        self.url = reverse('admin:core_profilereport_download',
+                           args=(self.report.id,))
+
+    def test_stored_outside_media(self) -> None:
+        self.assertTrue(self.report.file.storage.exists(self.report.file.name))
+        self.assertFalse(
+            self.report.file.path.startswith(settings.MEDIA_ROOT)
+        )
+
+    def test_staff_download(self) -> None:
+        self.client.force_login(self.admin)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'dump')
+
+    def test_user_download(self) -> None:
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('admin:login'), response['Location'])
@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+from typing import Callable, Iterator
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError, connection
+from django.urls import URLPattern, get_resolver, resolve, reverse
+from django.urls.resolvers import RoutePattern
+from rest_framework.test import APIRequestFactory
+
+from core.cache import single_flight
+from recipes.pantry import pantry_index
+
+logger = logging.getLogger('foodgram.warmup')
+
+
+class WarmUp:
+    """
+    Work done before a server process takes requests instead of by its
+    first requests: URL patterns are compiled, views imported, cached
+    responses of the tag and ingredient lists and the pantry index built
+    and a database connection opened. Run in the gunicorn master before
+    workers are forked, see `gunicorn.conf.py`, everything built is shared
+    by the workers. `ready` reports whether it has finished.
+
+    A failed warm-up, for example while the database is still starting,
+    is retried by `ensure` from the readiness check, by one thread at a
+    time and after a backoff doubling from `RETRY_BACKOFF` up to
+    `RETRY_BACKOFF_MAX` seconds. Failures of the `SOFT_STEPS` are only
+    logged, the readiness check tests the database on every call.
+    """
+
+    # Cached list views primed with a request to their bare path.
+    CACHED_VIEWS = ('api:tag-list', 'api:ingredient-list')
+    SOFT_STEPS = ('database',)
+    RETRY_BACKOFF = 1
+    RETRY_BACKOFF_MAX = 60
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.timings: dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def steps(self) -> Iterator[tuple[str, Callable[[], None]]]:
+        yield 'database', connection.ensure_connection
+        yield 'urls', self.load_urls
+        yield 'responses', self.prime_responses
+        yield 'pantry', self.build_pantry_index
+
+    def run(self) -> dict[str, float]:
+        for name, step in self.steps():
+            started = time.perf_counter()
+            try:
+                step()
+            except DatabaseError:
+                if name not in type(self).SOFT_STEPS:
+                    raise
+                logger.warning('warm-up step %s failed', name,
+                               exc_info=True)
+                continue
+            self.timings[name] = round(
+                (time.perf_counter() - started) * 1000, 1
+            )
+        # Warm-up lookups are not traffic.
+        single_flight.stats.clear()
+        self.ready = True
+        logger.info('warm-up done in %s ms: %s',
+                    round(sum(self.timings.values()), 1), self.timings)
+        return self.timings
+
+    def attempt(self) -> bool:
+        """ Runs the warm-up unless another thread does, returns `ready`. """
+        if not self.lock.acquire(blocking=False):
+            return self.ready
+        try:
+            if not self.ready:
+                self.run()
+                self.failures = 0
+        except Exception:
+            self.failures += 1
+            delay = min(type(self).RETRY_BACKOFF * 2 ** (self.failures - 1),
+                        type(self).RETRY_BACKOFF_MAX)
+            self.retry_at = time.monotonic() + delay
+            logger.exception('warm-up failed, retry in %s s', delay)
+        finally:
+            self.lock.release()
+        return self.ready
+
+    def ensure(self) -> bool:
+        """ Retries a failed warm-up once its backoff has passed. """
+        if self.ready or time.monotonic() < self.retry_at:
+            return self.ready
+        return self.attempt()
+
+    @staticmethod
+    def load_urls() -> None:
+        """ Imports all views and compiles every URL pattern. """
+        resolver = get_resolver()
+        for pattern in resolver.url_patterns:
+            for child in getattr(pattern, 'url_patterns', (pattern,)):
+                if (not isinstance(child, URLPattern) or not child.name
+                        or not isinstance(child.pattern, RoutePattern)):
+                    continue
+                namespace = getattr(pattern, 'namespace', None)
+                name = f'{namespace}:{child.name}' if namespace else child.name
+                kwargs = {key: 1 for key in child.pattern.converters}
+                resolve(reverse(name, kwargs=kwargs))
+
+    @classmethod
+    def prime_responses(cls) -> None:
+        factory = APIRequestFactory()
+        for name in cls.CACHED_VIEWS:
+            path = reverse(name)
+            view = resolve(path).func
+            request = factory.get(path)
+            request.user = AnonymousUser()
+            view(request).render()
+
+    @staticmethod
+    def build_pantry_index() -> None:
+        with pantry_index.lock:
+            pantry_index.sync()
+
+
+warm_up = WarmUp()
@@ -33,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,6 +74,7 @@ DATABASES = {
         'NAME': os.getenv('POSTGRES_DB', 'foodgram'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'django'),
+        'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', 0)),
     }
 }
 
@@ -100,6 +103,15 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FoodgramJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FoodgramJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 AUTH_USER_MODEL = 'users.FoodgramUser'
@@ -119,5 +131,103 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/mediafiles'
+# Outside MEDIA_ROOT, quarantined files must not be served at MEDIA_URL.
+MEDIA_QUARANTINE_ROOT = os.getenv('FOODGRAM_MEDIA_QUARANTINE_ROOT', str(BASE_DIR / 'data' / 'quarantine'))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+SLOW_QUERY_ENABLED = os.getenv('FOODGRAM_SLOW_QUERY', 'true').lower() == 'true'
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('FOODGRAM_SLOW_QUERY_THRESHOLD_MS', 100))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('FOODGRAM_SLOW_QUERY_EXPLAIN_RATE', 0.05))
+SLOW_QUERY_LOG_FILE = os.getenv('FOODGRAM_SLOW_QUERY_LOG', str(BASE_DIR / 'data' / 'slow_queries.log'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {
+            'format': '%(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_queries': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'foodgram': {
+            'handlers': ['console'],
+            'level': os.getenv('FOODGRAM_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'foodgram.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+REQUEST_TIMING_ENABLED = os.getenv('FOODGRAM_REQUEST_TIMING', 'true').lower() == 'true'
+REQUEST_TIMING_HEADER = os.getenv('FOODGRAM_REQUEST_TIMING_HEADER', 'true').lower() == 'true'
+REQUEST_STATS_BUFFER_SIZE = int(os.getenv('FOODGRAM_REQUEST_STATS_BUFFER_SIZE', 0))
+
+PROFILER_ENABLED = os.getenv('FOODGRAM_PROFILER', 'true').lower() == 'true'
+PROFILER_SUMMARY_LIMIT = int(os.getenv('FOODGRAM_PROFILER_SUMMARY_LIMIT', 40))
+# Outside MEDIA_ROOT, profiles are downloaded from the admin by staff only.
+PROFILER_ROOT = os.getenv('FOODGRAM_PROFILER_ROOT', str(BASE_DIR / 'data' / 'profiles'))
+
+JOBS_SYNC = os.getenv('FOODGRAM_JOBS_SYNC', 'false').lower() == 'true'
+JOBS_MAX_ATTEMPTS = int(os.getenv('FOODGRAM_JOBS_MAX_ATTEMPTS', 5))
+JOBS_BACKOFF = float(os.getenv('FOODGRAM_JOBS_BACKOFF', 10))
+JOBS_BACKOFF_MAX = float(os.getenv('FOODGRAM_JOBS_BACKOFF_MAX', 3600))
+JOBS_POLL_INTERVAL = float(os.getenv('FOODGRAM_JOBS_POLL_INTERVAL', 1))
+JOBS_TIMEOUT = int(os.getenv('FOODGRAM_JOBS_TIMEOUT', 600))
+JOBS_HEARTBEAT = float(os.getenv('FOODGRAM_JOBS_HEARTBEAT', 30))
+JOBS_KEEP_DONE_HOURS = int(os.getenv('FOODGRAM_JOBS_KEEP_DONE_HOURS', 24))
+
+TIMELINE_LENGTH = int(os.getenv('FOODGRAM_TIMELINE_LENGTH', 500))
+TIMELINE_PULL_FOLLOWERS = int(os.getenv('FOODGRAM_TIMELINE_PULL_FOLLOWERS', 10_000))
+
+RANKING_HALF_LIFE_HOURS = float(os.getenv('FOODGRAM_RANKING_HALF_LIFE_HOURS', 72))
+RANKING_FAVORITE_WEIGHT = float(os.getenv('FOODGRAM_RANKING_FAVORITE_WEIGHT', 1))
+RANKING_SHOPPING_WEIGHT = float(os.getenv('FOODGRAM_RANKING_SHOPPING_WEIGHT', 0.5))
+
+SIMILAR_PERMUTATIONS = int(os.getenv('FOODGRAM_SIMILAR_PERMUTATIONS', 32))
+SIMILAR_BANDS = int(os.getenv('FOODGRAM_SIMILAR_BANDS', 16))
+SIMILAR_CANDIDATES = int(os.getenv('FOODGRAM_SIMILAR_CANDIDATES', 500))
+
+PANTRY_INDEX_TTL = int(os.getenv('FOODGRAM_PANTRY_INDEX_TTL', 600))
+PANTRY_MAX_MISSING = int(os.getenv('FOODGRAM_PANTRY_MAX_MISSING', 5))
+
+BULK_MAX_RECIPES = int(os.getenv('FOODGRAM_BULK_MAX_RECIPES', 500))
+BATCH_CHUNK_SIZE = int(os.getenv('FOODGRAM_BATCH_CHUNK_SIZE', 100))
+
+PURGE_BATCH_SIZE = int(os.getenv('FOODGRAM_PURGE_BATCH_SIZE', 1000))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('FOODGRAM_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('FOODGRAM_CACHE_LOCATION', 'foodgram'),
+    }
+}
+CACHE_LOCK_TIMEOUT = float(os.getenv('FOODGRAM_CACHE_LOCK_TIMEOUT', 30))
+CACHE_WAIT = float(os.getenv('FOODGRAM_CACHE_WAIT', 10))
+CACHE_RECIPES_TTL = float(os.getenv('FOODGRAM_CACHE_RECIPES_TTL', 10))
+CACHE_RECIPES_STALE = float(os.getenv('FOODGRAM_CACHE_RECIPES_STALE', 120))
+CACHE_TAGS_TTL = float(os.getenv('FOODGRAM_CACHE_TAGS_TTL', 600))
+CACHE_TAGS_STALE = float(os.getenv('FOODGRAM_CACHE_TAGS_STALE', 3600))
+CACHE_INGREDIENTS_TTL = float(os.getenv('FOODGRAM_CACHE_INGREDIENTS_TTL', 600))
+CACHE_INGREDIENTS_STALE = float(os.getenv('FOODGRAM_CACHE_INGREDIENTS_STALE', 3600))
+
+METRICS_ENABLED = os.getenv('FOODGRAM_METRICS', 'true').lower() == 'true'
+METRICS_DIR = os.getenv('FOODGRAM_METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('FOODGRAM_METRICS_FLUSH_INTERVAL', 1))
+METRICS_ALLOWED_IPS = os.getenv('FOODGRAM_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+METRICS_TOKEN = os.getenv('FOODGRAM_METRICS_TOKEN', '')
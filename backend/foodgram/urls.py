@@ -3,9 +3,13 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from api.views import MetricsView, ReadinessView
+
 urlpatterns = [
     path('api/', include('api.urls', namespace='api')),
     path('admin/', admin.site.urls),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('ready', ReadinessView.as_view(), name='ready'),
 ]
 
 if settings.DEBUG:
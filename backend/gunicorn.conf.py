@@ -0,0 +1,79 @@
+"""
+Gunicorn settings of the backend, loaded by `gunicorn foodgram.wsgi` from
+the `backend` directory. Defaults are overridden by `GUNICORN_*`
+environment variables, see the README for the benchmarks behind them.
+
+With `preload_app` Django is loaded and warmed up once in the master,
+see `core.warmup.WarmUp`, and workers are forked with everything already
+imported and built. The garbage collector is disabled while the app is
+loaded and the loaded objects are frozen before forking, so collections
+in workers don't write to the pages shared with the master.
+"""
+import gc
+import multiprocessing
+import os
+import shutil
+
+# Warmed up connections are kept between requests.
+os.environ.setdefault('POSTGRES_CONN_MAX_AGE', '60')
+os.environ.setdefault('FOODGRAM_METRICS_DIR', '/tmp/foodgram-metrics')
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:9000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+
+if preload_app:
+    gc.disable()
+
+
+def on_starting(server):
+    # Metrics files of the previous run, see `core.metrics`.
+    shutil.rmtree(os.environ['FOODGRAM_METRICS_DIR'], ignore_errors=True)
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+
+    warm_up(server.log)
+    # Workers must not share the sockets of the master.
+    connections.close_all()
+    gc.freeze()
+    gc.enable()
+
+
+def post_fork(server, worker):
+    gc.enable()
+
+
+def post_worker_init(worker):
+    from django.db import DatabaseError, connection
+
+    from core.warmup import warm_up as state
+
+    # Without preloading, or when the master failed to warm up.
+    if not state.ready:
+        warm_up(worker.log)
+    elif worker.cfg.worker_class_str == 'sync':
+        # Requests of sync workers run in this thread and reuse it.
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            worker.log.warning('Database is not available yet')
+
+
+def warm_up(log):
+    from core.warmup import warm_up as state
+
+    # Failures are logged by `WarmUp` and retried by `/ready`.
+    if not state.attempt():
+        log.warning('Warm-up failed, retried by the readiness check')
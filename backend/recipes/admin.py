@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.utils.safestring import mark_safe, SafeText
 
+from core.admin import SoftDeleteAdminMixin
+from recipes.jobs import delete_recipes
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -36,13 +38,15 @@ class RecipeIngredientInline(admin.TabularInline):
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'pub_date', 'name', 'cooking_time', 'author')
+class RecipeAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'pub_date', 'name', 'cooking_time', 'author',
+                    'deleted')
     fields = ('author', 'name', 'text', 'cooking_time', 'image', 'pub_date',
-              'favorites_amount')
-    readonly_fields = ('pub_date', 'favorites_amount')
+              'favorites_amount', 'deleted')
+    readonly_fields = ('pub_date', 'favorites_amount', 'deleted')
     inlines = (RecipeTagInline, RecipeIngredientInline)
-    list_filter = ('name', 'author', 'tags')
+    list_filter = ('deleted', 'name', 'author', 'tags')
+    soft_delete = staticmethod(delete_recipes)
 
     def favorites_amount(self, recipe: Recipe) -> SafeText:
         return mark_safe(recipe.favorite_recipe.count())
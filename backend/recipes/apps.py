@@ -5,5 +5,5 @@ class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
 
-    # def ready(self):
-    #     import recipes.signals
+    def ready(self):
+        import recipes.signals  # noqa: F401
@@ -0,0 +1,119 @@
+import threading
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from core.jobs import job
+from recipes.media import RecipeImages
+from recipes.models import Recipe
+from recipes.pantry import pantry_index
+from recipes.purge import Purge
+from recipes.timeline import Timeline
+
+User = get_user_model()
+
+
+@job('timeline.push_recipe')
+def timeline_push_recipe(recipe_id: int) -> int:
+    return Timeline.push_recipe(recipe_id)
+
+
+@job('timeline.push_recipes')
+def timeline_push_recipes(author_id: int, recipe_ids: list[int]) -> int:
+    return Timeline.push_recipes(author_id, recipe_ids)
+
+
+# A new subscriber waits for the author's recipes in the feed.
+@job('timeline.subscribe', priority=10)
+def timeline_subscribe(user_id: int, author_id: int) -> int:
+    return Timeline.subscribe(user_id, author_id)
+
+
+@job('media.delete_images', priority=-10, concurrency=2)
+def delete_images(names: list[str]) -> int:
+    return RecipeImages.delete_unused(names)
+
+
+# One purge at a time keeps the batch deletes from competing for locks,
+# purging thousands of recipes may take longer than the default timeout.
+@job('purge.recipes', priority=-10, concurrency=1, timeout=6 * 3600)
+def purge_recipes(recipe_ids: list[int]) -> int:
+    return Purge(settings.PURGE_BATCH_SIZE).purge(
+        Recipe,
+        Recipe.objects.filter(id__in=recipe_ids, deleted=True).values_list(
+            'id', flat=True
+        )
+    )
+
+
+@job('purge.users', priority=-10, concurrency=1, timeout=6 * 3600)
+def purge_users(user_ids: list[int]) -> int:
+    return Purge(settings.PURGE_BATCH_SIZE).purge(
+        User,
+        User.objects.filter(id__in=user_ids, deleted=True).values_list(
+            'id', flat=True
+        )
+    )
+
+
+def delete_recipes(recipe_ids: Iterable[int]) -> int:
+    """ Hides recipes at once and purges them in a job. """
+    recipe_ids = list(recipe_ids)
+    with transaction.atomic():
+        hidden = Purge.hide_recipes(recipe_ids)
+        purge_recipes.delay(recipe_ids)
+    pantry_index.remove(recipe_ids)
+    return hidden
+
+
+def delete_users(user_ids: Iterable[int]) -> int:
+    """ Hides users with their recipes at once and purges them in a job. """
+    user_ids = list(user_ids)
+    with transaction.atomic():
+        recipe_ids = list(Recipe.objects.filter(
+            author_id__in=user_ids,
+            deleted=False
+        ).values_list('id', flat=True))
+        hidden = Purge.hide_users(user_ids)
+        purge_users.delay(user_ids)
+    pantry_index.remove(recipe_ids)
+    return hidden
+
+
+class ImageDeletions(threading.local):
+    """
+    Images of recipes deleted or replaced in the current transaction.
+    They are queued as `delete_images` jobs of at most `CHUNK_SIZE` names
+    after the transaction commits, so deleting a user with many recipes
+    queues few jobs and nothing is deleted on rollback.
+    """
+
+    CHUNK_SIZE = 1000
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+
+    def add(self, name: str) -> None:
+        if not name:
+            return
+        if not connection.in_atomic_block:
+            delete_images.delay([name])
+            return
+        if not self.pending():
+            self.names = []
+            transaction.on_commit(self.flush)
+        self.names.append(name)
+
+    def pending(self) -> bool:
+        """ Whether `flush` waits for the current transaction. """
+        return any(func == self.flush for _, func in connection.run_on_commit)
+
+    def flush(self) -> None:
+        names, self.names = self.names, []
+        for start in range(0, len(names), type(self).CHUNK_SIZE):
+            delete_images.delay(names[start:start + type(self).CHUNK_SIZE])
+
+
+image_deletions = ImageDeletions()
@@ -0,0 +1,101 @@
+import os
+import shutil
+import time
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.db import connection
+
+from recipes.models import Recipe
+
+IMAGE_FIELD = Recipe._meta.get_field('image')
+
+
+class RecipeImages:
+    """
+    Image files of recipes in the storage of `Recipe.image`. Files are
+    only removed when no recipe refers to them, the seeded placeholder
+    images are shared by many recipes.
+    """
+
+    # One index probe per name, stops at the first recipe using a shared
+    # image instead of reading all of them.
+    REFERENCED_SQL = (
+        f'SELECT file.name FROM UNNEST(%s::varchar[]) AS file (name) '
+        f'WHERE EXISTS (SELECT 1 FROM {Recipe._meta.db_table} AS recipe '
+        f'WHERE recipe.image = file.name)'
+    )
+
+    @classmethod
+    def referenced(cls, names: Iterable[str]) -> set[str]:
+        with connection.cursor() as cursor:
+            cursor.execute(cls.REFERENCED_SQL, (list(names),))
+            return {row[0] for row in cursor.fetchall()}
+
+    @classmethod
+    def delete_unused(cls, names: Iterable[str]) -> int:
+        names = set(names) - {''}
+        if not names:
+            return 0
+        deleted = 0
+        for name in sorted(names - cls.referenced(names)):
+            if IMAGE_FIELD.storage.exists(name):
+                IMAGE_FIELD.storage.delete(name)
+                deleted += 1
+        return deleted
+
+    @staticmethod
+    def walk(directory: str, min_age: float) -> Iterator[str]:
+        """
+        Storage names of files under `directory` not modified for
+        `min_age` seconds, read with `os.scandir` without listing the
+        whole directory in memory.
+        """
+        stack = [directory]
+        started = time.time()
+        while stack:
+            path = stack.pop()
+            with os.scandir(IMAGE_FIELD.storage.path(path)) as entries:
+                for entry in entries:
+                    name = f'{path}/{entry.name}'
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(name)
+                    elif (entry.is_file(follow_symlinks=False)
+                          and started - entry.stat().st_mtime >= min_age):
+                        yield name
+
+    @classmethod
+    def sweep(cls, min_age: float, batch_size: int, quarantine: bool = False,
+              dry_run: bool = False) -> Iterator[tuple[int, int]]:
+        """
+        Removes image files no recipe refers to, or moves them to
+        `MEDIA_QUARANTINE_ROOT` with `quarantine`. Files are checked against
+        the database in batches, yields the number of files checked and
+        orphans found so far after every batch. Files younger than
+        `min_age` seconds may belong to recipes not committed yet.
+        """
+        directory = IMAGE_FIELD.upload_to.rstrip('/')
+        files = cls.walk(directory, min_age)
+        checked = orphans = 0
+        while True:
+            batch = list(islice(files, batch_size))
+            if not batch:
+                break
+            checked += len(batch)
+            unused = sorted(set(batch) - cls.referenced(batch))
+            orphans += len(unused)
+            if not dry_run:
+                for name in unused:
+                    if quarantine:
+                        cls.move_to_quarantine(name)
+                    else:
+                        IMAGE_FIELD.storage.delete(name)
+            yield checked, orphans
+
+    @staticmethod
+    def move_to_quarantine(name: str) -> None:
+        target = os.path.join(settings.MEDIA_QUARANTINE_ROOT, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # The quarantine may be on another file system than the media.
+        shutil.move(IMAGE_FIELD.storage.path(name), target)
@@ -0,0 +1,211 @@
+# Generated by Django 3.2.20 on 2026-10-19 09:03
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are created and dropped concurrently, composite indexes
+    # are created before the single column ones they replace are dropped.
+    # Favorite and Shopping never got their unique constraints because
+    # their Meta didn't inherit UserRecipe.Meta, duplicates are removed.
+    # Tag slugs become unique, repeated slugs get the id of their tag
+    # appended before the first concurrent operation, and the migration
+    # stops there if slugs still collide.
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='UPDATE "recipes_tag" AS duplicate '
+                'SET slug = LEFT(duplicate.slug, 49 - LENGTH(duplicate.id::text)) || \'-\' || duplicate.id '
+                'FROM "recipes_tag" AS original '
+                'WHERE duplicate.slug = original.slug AND duplicate.id > original.id',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql='DO $$ BEGIN '
+                'IF EXISTS (SELECT 1 FROM "recipes_tag" GROUP BY slug HAVING COUNT(*) > 1) THEN '
+                'RAISE EXCEPTION \'recipes_tag has duplicate slugs, make them unique and migrate again\'; '
+                'END IF; END $$',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['author', 'id'], name='recipe_author_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipeingredient',
+            index=models.Index(fields=['ingredient', 'recipe'], name='recipeingredient_ingr_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipetag',
+            index=models.Index(fields=['tag', 'recipe'], name='recipetag_tag_idx'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='favorite',
+                    constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_favorite'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql='DELETE FROM "recipes_favorite" AS duplicate USING "recipes_favorite" AS original '
+                        'WHERE duplicate.user_id = original.user_id '
+                        'AND duplicate.recipe_id = original.recipe_id '
+                        'AND duplicate.id > original.id',
+                    reverse_sql=migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    sql='CREATE UNIQUE INDEX CONCURRENTLY "unique_favorite" '
+                        'ON "recipes_favorite" ("user_id", "recipe_id")',
+                    reverse_sql='ALTER TABLE "recipes_favorite" DROP CONSTRAINT "unique_favorite"',
+                ),
+                migrations.RunSQL(
+                    sql='ALTER TABLE "recipes_favorite" ADD CONSTRAINT "unique_favorite" '
+                        'UNIQUE USING INDEX "unique_favorite"',
+                    reverse_sql=migrations.RunSQL.noop,
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='shopping',
+                    constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_shopping'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql='DELETE FROM "recipes_shopping" AS duplicate USING "recipes_shopping" AS original '
+                        'WHERE duplicate.user_id = original.user_id '
+                        'AND duplicate.recipe_id = original.recipe_id '
+                        'AND duplicate.id > original.id',
+                    reverse_sql=migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    sql='CREATE UNIQUE INDEX CONCURRENTLY "unique_shopping" '
+                        'ON "recipes_shopping" ("user_id", "recipe_id")',
+                    reverse_sql='ALTER TABLE "recipes_shopping" DROP CONSTRAINT "unique_shopping"',
+                ),
+                migrations.RunSQL(
+                    sql='ALTER TABLE "recipes_shopping" ADD CONSTRAINT "unique_shopping" '
+                        'UNIQUE USING INDEX "unique_shopping"',
+                    reverse_sql=migrations.RunSQL.noop,
+                ),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='recipeingredient',
+            options={'ordering': ('id',), 'verbose_name': 'Ингредиент рецепта', 'verbose_name_plural': 'Ингредиенты рецепта'},
+        ),
+        migrations.AlterModelOptions(
+            name='recipetag',
+            options={'ordering': ('id',), 'verbose_name': 'Тэг рецепта', 'verbose_name_plural': 'Тэти рецепта'},
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='cooking_time',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(32000)], verbose_name='Время приготовления (в минутах)'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='amount',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(32000)], verbose_name='Количество'),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='color',
+            field=models.PositiveIntegerField(unique=True, validators=[django.core.validators.MaxValueValidator(16777215)], verbose_name='Цвет'),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='slug',
+            field=models.SlugField(unique=True, verbose_name='Уникальный слаг'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='favorite',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='favorite_user', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+                ),
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='author',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipes', to=settings.AUTH_USER_MODEL, verbose_name='Автор рецепта'),
+                ),
+                migrations.AlterField(
+                    model_name='recipeingredient',
+                    name='ingredient',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredient', to='recipes.ingredient', verbose_name='Ингредиент'),
+                ),
+                migrations.AlterField(
+                    model_name='recipeingredient',
+                    name='recipe',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredient', to='recipes.recipe', verbose_name='Рецепт'),
+                ),
+                migrations.AlterField(
+                    model_name='recipetag',
+                    name='recipe',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_tag', to='recipes.recipe', verbose_name='Рецепт'),
+                ),
+                migrations.AlterField(
+                    model_name='recipetag',
+                    name='tag',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recipe_tag', to='recipes.tag', verbose_name='Тэг'),
+                ),
+                migrations.AlterField(
+                    model_name='shopping',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='shopping_user', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "recipes_favorite_user_id_dd4f6854"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "recipes_favorite_user_id_dd4f6854" '
+                                'ON "recipes_favorite" ("user_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "recipes_recipe_author_id_7274f74b"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "recipes_recipe_author_id_7274f74b" '
+                                'ON "recipes_recipe" ("author_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "recipes_recipeingredient_ingredient_id_0efc0df1"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "recipes_recipeingredient_ingredient_id_0efc0df1" '
+                                'ON "recipes_recipeingredient" ("ingredient_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "recipes_recipeingredient_recipe_id_76423229"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "recipes_recipeingredient_recipe_id_76423229" '
+                                'ON "recipes_recipeingredient" ("recipe_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "recipes_recipetag_recipe_id_5d236855"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "recipes_recipetag_recipe_id_5d236855" '
+                                'ON "recipes_recipetag" ("recipe_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "recipes_recipetag_tag_id_09c50185"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "recipes_recipetag_tag_id_09c50185" '
+                                'ON "recipes_recipetag" ("tag_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "recipes_shopping_user_id_1a68d62f"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "recipes_shopping_user_id_1a68d62f" '
+                                'ON "recipes_shopping" ("user_id")',
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.20 on 2026-10-19 09:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='timeline_settings', serialize=False, to='users.foodgramuser', verbose_name='Автор')),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='Количество подписчиков')),
+                ('pull', models.BooleanField(default=False, verbose_name='Рецепты читаются при запросе ленты')),
+            ],
+            options={
+                'verbose_name': 'Автор ленты',
+                'verbose_name_plural': 'Авторы лент',
+                'ordering': ('author',),
+            },
+        ),
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_author_entry', to=settings.AUTH_USER_MODEL, verbose_name='Автор рецепта')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entry', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи лент',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_timeline_entry'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.2.20 on 2026-10-19 12:40
+
+import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+# Existing favorites and carts are dated long ago rather than at the
+# migration, or the first ranking update would score the whole history
+# as trending. A constant default doesn't rewrite the tables.
+HISTORY_CREATED = datetime.datetime(2000, 1, 1, tzinfo=django.utils.timezone.utc)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=HISTORY_CREATED, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shopping',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=HISTORY_CREATED, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='RankingCheckpoint',
+            fields=[
+                ('source', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Источник')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Последний обработанный идентификатор')),
+            ],
+            options={
+                'verbose_name': 'Позиция пересчета рейтингов',
+                'verbose_name_plural': 'Позиции пересчета рейтингов',
+                'ordering': ('source',),
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeRanking',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('favorites', models.PositiveIntegerField(default=0, verbose_name='Количество добавлений в избранное')),
+                ('trending', models.FloatField(default=0, verbose_name='Рейтинг популярности за последнее время')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+                'ordering': ('recipe',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reciperanking',
+            index=models.Index(fields=['-favorites', '-recipe'], name='ranking_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reciperanking',
+            index=models.Index(fields=['-trending', '-recipe'], name='ranking_trending_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.20 on 2026-10-19 18:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Rating ordering only lists recipes with a ranking, recipes created
+    # before 0005 get empty ones, `manage.py rankings --full` fills them.
+    dependencies = [
+        ('recipes', '0007_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='INSERT INTO "recipes_reciperanking" (recipe_id, favorites, trending) '
+                'SELECT id, 0, 0 FROM "recipes_recipe" AS recipe WHERE NOT EXISTS ('
+                'SELECT 1 FROM "recipes_reciperanking" WHERE recipe_id = recipe.id) '
+                'ON CONFLICT DO NOTHING',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.20 on 2026-10-19 19:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Indexes of the recipes table are created concurrently, see 0003.
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0008_ranking_backfill'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('deleted', True)), fields=['id'], name='recipe_deleted_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['image'], name='recipe_image_idx'),
+        ),
+    ]
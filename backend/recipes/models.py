@@ -37,6 +37,7 @@ class Tag(models.Model, FoodgramModelMixin):
 
     slug = models.SlugField(
         verbose_name='Уникальный слаг',
+        unique=True,
     )
 
     class Meta:
@@ -147,7 +148,8 @@ class Recipe(models.Model, FoodgramModelMixin):
         verbose_name='Автор рецепта',
         to=User,
         on_delete=models.CASCADE,
-        related_name='recipes'
+        related_name='recipes',
+        db_index=False,
     )
 
     tags = models.ManyToManyField(
@@ -162,10 +164,30 @@ class Recipe(models.Model, FoodgramModelMixin):
         through='RecipeIngredient',
     )
 
+    deleted = models.BooleanField(
+        verbose_name='Удалён',
+        default=False,
+    )
+
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('author', 'id'),
+                name='recipe_author_idx',
+            ),
+            models.Index(
+                fields=('id',),
+                condition=models.Q(deleted=True),
+                name='recipe_deleted_idx',
+            ),
+            models.Index(
+                fields=('image',),
+                name='recipe_image_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -204,14 +226,16 @@ class RecipeTag(models.Model, FoodgramModelMixin):
         verbose_name='Рецепт',
         to=Recipe,
         on_delete=models.CASCADE,
-        related_name='recipe_tag'
+        related_name='recipe_tag',
+        db_index=False,
     )
 
     tag = models.ForeignKey(
         verbose_name='Тэг',
         to=Tag,
         on_delete=models.CASCADE,
-        related_name='recipe_tag'
+        related_name='recipe_tag',
+        db_index=False,
     )
 
     class Meta:
@@ -223,6 +247,12 @@ class RecipeTag(models.Model, FoodgramModelMixin):
                 name='unique_recipe_tag',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('tag', 'recipe'),
+                name='recipetag_tag_idx',
+            ),
+        ]
         ordering = ('id',)
 
     def __str__(self) -> str:
@@ -254,14 +284,16 @@ class RecipeIngredient(models.Model, FoodgramModelMixin):
         verbose_name='Рецепт',
         to=Recipe,
         on_delete=models.CASCADE,
-        related_name='recipe_ingredient'
+        related_name='recipe_ingredient',
+        db_index=False,
     )
 
     ingredient = models.ForeignKey(
         verbose_name='Ингредиент',
         to=Ingredient,
         on_delete=models.CASCADE,
-        related_name='recipe_ingredient'
+        related_name='recipe_ingredient',
+        db_index=False,
     )
 
     amount = models.IntegerField(
@@ -281,6 +313,12 @@ class RecipeIngredient(models.Model, FoodgramModelMixin):
                 name='unique_recipe_ingredient',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('ingredient', 'recipe'),
+                name='recipeingredient_ingr_idx',
+            ),
+        ]
         ordering = ('id',)
 
     def __str__(self) -> str:
@@ -310,7 +348,8 @@ class UserRecipe(models.Model, FoodgramModelMixin):
         verbose_name='Пользователь',
         to=User,
         on_delete=models.CASCADE,
-        related_name='%(class)s_user'
+        related_name='%(class)s_user',
+        db_index=False,
     )
 
     recipe = models.ForeignKey(
@@ -320,6 +359,11 @@ class UserRecipe(models.Model, FoodgramModelMixin):
         related_name='%(class)s_recipe'
     )
 
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+    )
+
     class Meta:
         abstract = True
         constraints = [
@@ -354,7 +398,7 @@ class UserRecipe(models.Model, FoodgramModelMixin):
 
 class Favorite(UserRecipe):
 
-    class Meta:
+    class Meta(UserRecipe.Meta):
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
         ordering = ('id',)
@@ -362,7 +406,188 @@ class Favorite(UserRecipe):
 
 class Shopping(UserRecipe):
 
-    class Meta:
+    class Meta(UserRecipe.Meta):
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
         ordering = ('id',)
+
+
+class TimelineEntry(models.Model):
+
+    user = models.ForeignKey(
+        verbose_name='Пользователь',
+        to=User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        db_index=False,
+    )
+
+    recipe = models.ForeignKey(
+        verbose_name='Рецепт',
+        to=Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entry',
+    )
+
+    author = models.ForeignKey(
+        verbose_name='Автор рецепта',
+        to=User,
+        on_delete=models.CASCADE,
+        related_name='timeline_author_entry',
+        db_index=False,
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_timeline_entry',
+            ),
+        ]
+        ordering = ('id',)
+
+    def __str__(self) -> str:
+        return f'{self.user} <-> {self.recipe}'
+
+
+class TimelineAuthor(models.Model):
+
+    author = models.OneToOneField(
+        verbose_name='Автор',
+        to=User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='timeline_settings',
+    )
+
+    followers = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+    )
+
+    pull = models.BooleanField(
+        verbose_name='Рецепты читаются при запросе ленты',
+        default=False,
+    )
+
+    class Meta:
+        verbose_name = 'Автор ленты'
+        verbose_name_plural = 'Авторы лент'
+        ordering = ('author',)
+
+    def __str__(self) -> str:
+        return f'{self.author}'
+
+
+class RecipeRanking(models.Model):
+
+    recipe = models.OneToOneField(
+        verbose_name='Рецепт',
+        to=Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+    )
+
+    favorites = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в избранное',
+        default=0,
+    )
+
+    trending = models.FloatField(
+        verbose_name='Рейтинг популярности за последнее время',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        ordering = ('recipe',)
+        indexes = [
+            models.Index(
+                fields=('-favorites', '-recipe'),
+                name='ranking_popular_idx',
+            ),
+            models.Index(
+                fields=('-trending', '-recipe'),
+                name='ranking_trending_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.recipe} ({self.favorites}, {self.trending:.2f})'
+
+
+class RankingCheckpoint(models.Model):
+
+    source = models.CharField(
+        verbose_name='Источник',
+        max_length=32,
+        primary_key=True,
+    )
+
+    last_id = models.BigIntegerField(
+        verbose_name='Последний обработанный идентификатор',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Позиция пересчета рейтингов'
+        verbose_name_plural = 'Позиции пересчета рейтингов'
+        ordering = ('source',)
+
+    def __str__(self) -> str:
+        return f'{self.source}: {self.last_id}'
+
+
+class RecipeSignature(models.Model):
+
+    recipe = models.OneToOneField(
+        verbose_name='Рецепт',
+        to=Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+    )
+
+    signature = models.BinaryField(
+        verbose_name='MinHash сигнатура ингредиентов',
+    )
+
+    class Meta:
+        verbose_name = 'Сигнатура рецепта'
+        verbose_name_plural = 'Сигнатуры рецептов'
+        ordering = ('recipe',)
+
+    def __str__(self) -> str:
+        return f'{self.recipe}'
+
+
+class RecipeBucket(models.Model):
+
+    recipe = models.ForeignKey(
+        verbose_name='Рецепт',
+        to=Recipe,
+        on_delete=models.CASCADE,
+        related_name='buckets',
+    )
+
+    bucket = models.BigIntegerField(
+        verbose_name='LSH корзина',
+    )
+
+    class Meta:
+        verbose_name = 'LSH корзина рецепта'
+        verbose_name_plural = 'LSH корзины рецептов'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=('bucket', 'recipe'),
+                name='recipebucket_bucket_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.recipe} <-> {self.bucket}'
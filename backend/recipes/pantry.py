@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max
+
+from recipes.models import Recipe, RecipeIngredient
+
+
+class PantryIndex:
+    """
+    In-process inverted index from ingredient id to the ids of recipes
+    using it, stored as unsorted `uint32` arrays, and the number of
+    ingredients of every recipe. Answers which recipes can be cooked from
+    a set of ingredients with at most `missing` ingredients lacking.
+
+    Before a query the index reads recipe ingredients added since the last
+    seen `RecipeIngredient` id, so recipes created or given new
+    ingredients by other processes are patched in. Deleted recipes are
+    not indexed and are removed at once from the index of the process
+    deleting them. Recipes deleted and ingredients removed from recipes in
+    other processes are dropped by a full rebuild every `PANTRY_INDEX_TTL`
+    seconds, until then deleted recipes are skipped when rendered.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.postings: dict[int, np.ndarray] = {}
+        self.sizes = np.zeros(0, dtype=np.int16)
+        self.last_link_id = 0
+        self.built: Optional[float] = None
+
+    def build(self) -> None:
+        last_link_id = RecipeIngredient.objects.aggregate(
+            id=Max('id')
+        )['id'] or 0
+        links = np.array(RecipeIngredient.objects.filter(
+            id__lte=last_link_id
+        ).values_list('ingredient_id', 'recipe_id'), dtype=np.int64)
+        links = links.reshape(-1, 2)
+        # Few recipes wait for a purge, they are read with a partial index
+        # instead of joining recipes to every link.
+        deleted = np.array(Recipe.objects.filter(
+            deleted=True
+        ).values_list('id', flat=True), dtype=np.int64)
+        if len(deleted):
+            links = links[np.isin(links[:, 1], deleted, invert=True)]
+        order = np.argsort(links[:, 0], kind='stable')
+        ingredients, starts = np.unique(links[order, 0], return_index=True)
+        recipes = links[order, 1].astype(np.uint32)
+        self.postings = dict(zip(
+            ingredients.tolist(), np.split(recipes, starts[1:])
+        ))
+        self.sizes = np.bincount(
+            links[:, 1], minlength=1
+        ).astype(np.int16)
+        self.last_link_id = last_link_id
+        self.built = time.monotonic()
+
+    def patch(self, recipe_ids: Iterable[int],
+              links: Iterable[tuple[int, int]]) -> None:
+        """
+        Replaces ingredients of `recipe_ids` with (ingredient, recipe)
+        `links`, recipes without links are removed.
+        """
+        recipe_ids = np.array(sorted(set(recipe_ids)), dtype=np.uint32)
+        if not len(recipe_ids):
+            return
+        known = recipe_ids[recipe_ids < len(self.sizes)]
+        known = known[self.sizes[known] > 0]
+        if len(known):
+            for ingredient_id, posting in self.postings.items():
+                self.postings[ingredient_id] = posting[
+                    np.isin(posting, known, invert=True)
+                ]
+        if int(recipe_ids[-1]) >= len(self.sizes):
+            self.sizes = np.concatenate([self.sizes, np.zeros(
+                int(recipe_ids[-1]) + 1 - len(self.sizes), dtype=np.int16
+            )])
+        self.sizes[recipe_ids] = 0
+        for ingredient_id, recipe_id in links:
+            self.postings[ingredient_id] = np.append(
+                self.postings.get(ingredient_id,
+                                  np.zeros(0, dtype=np.uint32)),
+                np.uint32(recipe_id)
+            )
+            self.sizes[recipe_id] += 1
+
+    def sync(self) -> None:
+        if self.built is None or time.monotonic() - self.built > self.ttl:
+            self.build()
+            return
+        last_link_id = RecipeIngredient.objects.aggregate(
+            id=Max('id')
+        )['id'] or 0
+        if last_link_id <= self.last_link_id:
+            return
+        changed = set(RecipeIngredient.objects.filter(
+            id__gt=self.last_link_id,
+            id__lte=last_link_id
+        ).values_list('recipe_id', flat=True))
+        links = list(RecipeIngredient.objects.filter(
+            recipe_id__in=changed,
+            recipe__deleted=False
+        ).values_list('ingredient_id', 'recipe_id'))
+        self.patch(changed, links)
+        self.last_link_id = last_link_id
+
+    def update(self, recipe_id: int, ingredient_ids: Iterable[int]) -> None:
+        with self.lock:
+            if self.built is not None:
+                self.patch((recipe_id,), [(ingredient_id, recipe_id)
+                                          for ingredient_id in ingredient_ids])
+
+    def remove(self, recipe_ids: Iterable[int]) -> None:
+        with self.lock:
+            if self.built is not None:
+                self.patch(recipe_ids, ())
+
+    def cookable(self, ingredient_ids: Iterable[int],
+                 missing: int = 0) -> list[int]:
+        """
+        Ids of recipes using at least one of `ingredient_ids` and lacking
+        at most `missing` ingredients, fewest missing and newest first.
+        """
+        with self.lock:
+            self.sync()
+            postings = [self.postings[ingredient_id]
+                        for ingredient_id in set(ingredient_ids)
+                        if ingredient_id in self.postings]
+            if not postings:
+                return []
+            hits = np.bincount(np.concatenate(postings),
+                               minlength=len(self.sizes))
+            lacking = self.sizes - hits
+            recipe_ids = np.flatnonzero((hits > 0) & (lacking <= missing))
+            order = np.lexsort((-recipe_ids, lacking[recipe_ids]))
+            return recipe_ids[order].tolist()
+
+
+pantry_index = PantryIndex(settings.PANTRY_INDEX_TTL)
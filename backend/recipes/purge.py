@@ -0,0 +1,135 @@
+from typing import Iterable
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import CASCADE, SET_NULL, Model
+from django.db.models.fields.reverse_related import ForeignObjectRel
+
+from recipes.media import RecipeImages
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Purge:
+    """
+    Soft deletion of recipes and users. `hide_*` set the `deleted` flag,
+    which hides the rows from the API at once, `purge` removes them later
+    with their dependent rows. Dependents are deleted in batches of
+    `batch_size` rows with one statement per batch, instead of the ORM
+    collector loading all of them and holding locks in one transaction.
+    Dependents with their own dependents, recipes of a user, are purged
+    recursively in batches.
+    """
+
+    SELECT_SQL = 'SELECT {pk} FROM {table} WHERE {column} = ANY(%s) LIMIT %s'
+    DELETE_SQL = (
+        'DELETE FROM {table} WHERE {pk} IN ('
+        'SELECT {pk} FROM {table} WHERE {column} = ANY(%s) LIMIT %s)'
+    )
+    NULLIFY_SQL = (
+        'UPDATE {table} SET {column} = NULL WHERE {pk} IN ('
+        'SELECT {pk} FROM {table} WHERE {column} = ANY(%s) LIMIT %s)'
+    )
+    DELETE_ALL_SQL = 'DELETE FROM {table} WHERE {column} = ANY(%s)'
+    NULLIFY_ALL_SQL = (
+        'UPDATE {table} SET {column} = NULL WHERE {column} = ANY(%s)'
+    )
+    PURGE_SQL = 'DELETE FROM {table} WHERE {pk} = ANY(%s)'
+
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+
+    @classmethod
+    def hide_recipes(cls, recipe_ids: Iterable[int]) -> int:
+        return Recipe.objects.filter(
+            id__in=list(recipe_ids),
+            deleted=False
+        ).update(deleted=True)
+
+    @classmethod
+    def hide_users(cls, user_ids: Iterable[int]) -> int:
+        """ Hides users with their recipes, the users can't log in. """
+        user_ids = list(user_ids)
+        with transaction.atomic():
+            Recipe.objects.filter(
+                author_id__in=user_ids,
+                deleted=False
+            ).update(deleted=True)
+            return User.objects.filter(
+                id__in=user_ids,
+                deleted=False
+            ).update(deleted=True, is_active=False)
+
+    @staticmethod
+    def relations(model: type[Model]) -> list[ForeignObjectRel]:
+        return [field for field in model._meta.get_fields(include_hidden=True)
+                if field.auto_created and not field.concrete
+                and (field.one_to_many or field.one_to_one)
+                and field.on_delete in (CASCADE, SET_NULL)]
+
+    @staticmethod
+    def get_sql(sql: str, relation: ForeignObjectRel) -> str:
+        opts = relation.related_model._meta
+        return sql.format(table=opts.db_table, pk=opts.pk.column,
+                          column=relation.field.column)
+
+    def execute_batches(self, sql: str, ids: list[int]) -> int:
+        """ Runs a batch statement until it affects no more rows. """
+        done = 0
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(sql, (ids, self.batch_size))
+                done += cursor.rowcount
+                if cursor.rowcount < self.batch_size:
+                    return done
+
+    def purge_dependents(self, relation: ForeignObjectRel,
+                         ids: list[int]) -> None:
+        if relation.on_delete is SET_NULL:
+            sql = self.get_sql(type(self).NULLIFY_SQL, relation)
+            self.execute_batches(sql, ids)
+            return
+        if not self.relations(relation.related_model):
+            sql = self.get_sql(type(self).DELETE_SQL, relation)
+            self.execute_batches(sql, ids)
+            return
+        sql = self.get_sql(type(self).SELECT_SQL, relation)
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, (ids, self.batch_size))
+                batch = [row[0] for row in cursor.fetchall()]
+            if not batch:
+                return
+            self.purge(relation.related_model, batch)
+
+    def purge(self, model: type[Model], ids: Iterable[int]) -> int:
+        """
+        Deletes rows of `model` after their dependents, rows of dependents
+        added during the purge are removed in the final transaction.
+        """
+        ids = list(ids)
+        if not ids:
+            return 0
+        relations = self.relations(model)
+        for relation in relations:
+            self.purge_dependents(relation, ids)
+        images = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            for relation in relations:
+                if relation.on_delete is SET_NULL:
+                    sql = type(self).NULLIFY_ALL_SQL
+                else:
+                    sql = type(self).DELETE_ALL_SQL
+                cursor.execute(self.get_sql(sql, relation), (ids,))
+            if model is Recipe:
+                images = list(Recipe.objects.filter(
+                    id__in=ids
+                ).values_list('image', flat=True))
+            cursor.execute(type(self).PURGE_SQL.format(
+                table=model._meta.db_table,
+                pk=model._meta.pk.column
+            ), (ids,))
+            deleted = cursor.rowcount
+        RecipeImages.delete_unused(images)
+        return deleted
@@ -0,0 +1,126 @@
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Model
+from django.utils import timezone
+
+from recipes.models import (
+    Favorite,
+    RankingCheckpoint,
+    Recipe,
+    RecipeRanking,
+    Shopping,
+)
+
+RANKING_TABLE = RecipeRanking._meta.db_table
+RECIPE_TABLE = Recipe._meta.db_table
+FAVORITE_TABLE = Favorite._meta.db_table
+SHOPPING_TABLE = Shopping._meta.db_table
+
+
+class Ranking:
+    """
+    Popular and trending scores of recipes. `favorites` is the number of
+    favorites, `trending` is log2 of the favorites and carts weighted by
+    `2 ** (created / RANKING_HALF_LIFE)`. Decay is relative, so scores are
+    comparable without updating old rows as time passes and new events
+    are added to the stored score. Events are read incrementally after the
+    last processed id of every source table.
+    """
+
+    # Events are added after this delay, so that transactions which took
+    # ids earlier but commit later are not skipped by the checkpoint.
+    LAG = timedelta(minutes=1)
+    # Lower bound of exponents, POWER() raises on float underflow.
+    MIN_EXPONENT = -1000
+
+    MISSING_SQL = (
+        f'INSERT INTO {RANKING_TABLE} (recipe_id, favorites, trending) '
+        f'SELECT id, 0, 0 FROM {RECIPE_TABLE} AS recipe WHERE NOT EXISTS ('
+        f'SELECT 1 FROM {RANKING_TABLE} WHERE recipe_id = recipe.id) '
+        f'ON CONFLICT DO NOTHING'
+    )
+    RESET_SQL = f'UPDATE {RANKING_TABLE} SET favorites = 0, trending = 0'
+    POPULAR_SQL = (
+        f'UPDATE {RANKING_TABLE} AS ranking SET favorites = counts.amount '
+        f'FROM (SELECT recipe_id, COUNT(*) AS amount FROM {FAVORITE_TABLE} '
+        f'WHERE recipe_id IN (SELECT recipe_id FROM {FAVORITE_TABLE} '
+        f'WHERE id > %s AND id <= %s) GROUP BY recipe_id) AS counts '
+        f'WHERE ranking.recipe_id = counts.recipe_id'
+    )
+    TRENDING_SQL = (
+        f'UPDATE {RANKING_TABLE} AS ranking SET trending = CASE '
+        f'WHEN ranking.trending = 0 THEN scores.score '
+        f'ELSE GREATEST(ranking.trending, scores.score) + LN(1 + POWER(2, '
+        f'GREATEST(-ABS(ranking.trending - scores.score), {MIN_EXPONENT})'
+        f')) / LN(2) END '
+        f'FROM (SELECT recipe_id, %(now)s + LN(SUM(weight * POWER(2, '
+        f'GREATEST(EXTRACT(EPOCH FROM created)::float8 / %(half_life)s '
+        f'- %(now)s, {MIN_EXPONENT})))) / LN(2) AS score FROM ('
+        f'SELECT recipe_id, created, %(favorite_weight)s::float8 AS weight '
+        f'FROM {FAVORITE_TABLE} '
+        f'WHERE id > %(favorite_from)s AND id <= %(favorite_to)s '
+        f'UNION ALL '
+        f'SELECT recipe_id, created, %(shopping_weight)s::float8 '
+        f'FROM {SHOPPING_TABLE} '
+        f'WHERE id > %(shopping_from)s AND id <= %(shopping_to)s'
+        f') AS events GROUP BY recipe_id HAVING SUM(weight) > 0) AS scores '
+        f'WHERE ranking.recipe_id = scores.recipe_id'
+    )
+
+    @staticmethod
+    def half_life() -> float:
+        return settings.RANKING_HALF_LIFE_HOURS * 3600
+
+    @classmethod
+    def checkpoint(cls, model: type[Model]) -> int:
+        checkpoint, _ = RankingCheckpoint.objects.select_for_update(
+        ).get_or_create(source=model._meta.model_name)
+        return checkpoint.last_id
+
+    @classmethod
+    def last_id(cls, model: type[Model]) -> Optional[int]:
+        """ Last id of events older than `LAG`. """
+        return model.objects.filter(
+            created__lt=timezone.now() - cls.LAG
+        ).order_by('-id').values_list('id', flat=True).first()
+
+    @classmethod
+    def update(cls, full: bool = False) -> dict[str, int]:
+        """
+        Adds events after the checkpoints to the scores. Removed favorites
+        and carts are only accounted for by a `full` recomputation.
+        """
+        now = timezone.now().timestamp() / cls.half_life()
+        with transaction.atomic(), connection.cursor() as cursor:
+            ranges = {}
+            for model in (Favorite, Shopping):
+                checkpoint = cls.checkpoint(model)
+                start = 0 if full else checkpoint
+                stop = cls.last_id(model) or 0
+                ranges[model] = (start, max(start, stop))
+            cursor.execute(cls.MISSING_SQL)
+            result = {'recipes': cursor.rowcount}
+            if full:
+                cursor.execute(cls.RESET_SQL)
+            cursor.execute(cls.POPULAR_SQL, ranges[Favorite])
+            result['popular'] = cursor.rowcount
+            cursor.execute(cls.TRENDING_SQL, {
+                'now': now,
+                'half_life': cls.half_life(),
+                'favorite_weight': settings.RANKING_FAVORITE_WEIGHT,
+                'favorite_from': ranges[Favorite][0],
+                'favorite_to': ranges[Favorite][1],
+                'shopping_weight': settings.RANKING_SHOPPING_WEIGHT,
+                'shopping_from': ranges[Shopping][0],
+                'shopping_to': ranges[Shopping][1],
+            })
+            result['trending'] = cursor.rowcount
+            for model, (_, stop) in ranges.items():
+                RankingCheckpoint.objects.update_or_create(
+                    source=model._meta.model_name,
+                    defaults={'last_id': stop}
+                )
+        return result
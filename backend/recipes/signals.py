@@ -1,12 +1,18 @@
-import os
-
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from recipes.models import Recipe
+from recipes.jobs import image_deletions
+from recipes.models import Recipe, RecipeRanking
 
 
 @receiver(post_delete, sender=Recipe)
 def recipe_delete_callback(sender, instance: Recipe, **kwargs):
-    if os.path.isfile(instance.image.path):
-        os.remove(instance.image.path)
+    image_deletions.add(instance.image.name)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_create_callback(sender, instance: Recipe, created: bool,
+                           **kwargs):
+    # Rating ordering joins rankings, a recipe without one is not listed.
+    if created:
+        RecipeRanking.objects.create(recipe=instance)
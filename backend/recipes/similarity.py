@@ -0,0 +1,212 @@
+import random
+from functools import lru_cache
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from core.dataset import TableWriter
+from recipes.models import (
+    Recipe,
+    RecipeBucket,
+    RecipeIngredient,
+    RecipeSignature,
+)
+
+
+class MinHash:
+    """
+    MinHash signatures of ingredient id sets with `permutations` seeded
+    splitmix64 hash functions and LSH band keys of `bands` bands. Seeds
+    are drawn from a seeded `random.Random`, so all processes compute the
+    same signatures.
+    """
+
+    SEED: int = 7919
+
+    def __init__(self, permutations: int, bands: int) -> None:
+        if permutations % bands:
+            raise ValueError(
+                f'{permutations} permutations do not split into {bands} bands'
+            )
+        generator = random.Random(type(self).SEED)
+        self.permutations = permutations
+        self.bands = bands
+        self.rows = permutations // bands
+        self.seeds = np.array([generator.getrandbits(64)
+                               for _ in range(permutations)], dtype=np.uint64)
+        self.multipliers = np.array([generator.getrandbits(64) | 1
+                                     for _ in range(self.rows)],
+                                    dtype=np.uint64)
+        self.salts = np.array([generator.getrandbits(64)
+                               for _ in range(bands)], dtype=np.uint64)
+
+    @staticmethod
+    def mix(values: np.ndarray) -> np.ndarray:
+        """ splitmix64 finalizer, wraps around on overflow. """
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(
+            0xBF58476D1CE4E5B9
+        )
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(
+            0x94D049BB133111EB
+        )
+        return values ^ (values >> np.uint64(31))
+
+    def signatures(self, recipe_ids: np.ndarray,
+                   ingredient_ids: np.ndarray) -> tuple[np.ndarray,
+                                                        np.ndarray]:
+        """
+        Signatures of recipes from (recipe, ingredient) pairs sorted by
+        recipe, returns unique recipe ids and a `(recipes, permutations)`
+        array of 32 bit hashes.
+        """
+        recipes, starts = np.unique(recipe_ids, return_index=True)
+        hashes = self.mix(
+            ingredient_ids.astype(np.uint64)[None, :] + self.seeds[:, None]
+        ) >> np.uint64(32)
+        return recipes, np.minimum.reduceat(hashes, starts, axis=1).T
+
+    def buckets(self, signatures: np.ndarray) -> np.ndarray:
+        """ `(recipes, bands)` array of LSH keys. """
+        bands = signatures.reshape(-1, self.bands, self.rows)
+        keys = (bands * self.multipliers).sum(axis=2) ^ self.salts
+        return keys.view(np.int64)
+
+    @staticmethod
+    def similarity(signature: np.ndarray,
+                   signatures: np.ndarray) -> np.ndarray:
+        """ Estimated Jaccard similarity with every row of `signatures`. """
+        return (signatures == signature).mean(axis=1)
+
+    @staticmethod
+    def to_bytes(signature: np.ndarray) -> bytes:
+        return signature.astype('<u4').tobytes()
+
+    @staticmethod
+    def from_bytes(data: bytes) -> np.ndarray:
+        return np.frombuffer(data, dtype='<u4').astype(np.uint64)
+
+
+@lru_cache(maxsize=None)
+def get_minhash() -> MinHash:
+    return MinHash(settings.SIMILAR_PERMUTATIONS, settings.SIMILAR_BANDS)
+
+
+class RecipeSimilarity:
+    """
+    Similar recipes by Jaccard similarity of ingredient sets. Recipes
+    sharing a LSH bucket are candidates, candidates are ranked by the
+    similarity estimated from MinHash signatures.
+    """
+
+    @classmethod
+    def update(cls, recipe_id: int, ingredient_ids: Iterable[int]) -> None:
+        """ Replaces the signature and buckets of one recipe. """
+        cls.update_many({recipe_id: ingredient_ids})
+
+    @classmethod
+    def update_many(cls, ingredients: dict[int, Iterable[int]]) -> None:
+        """
+        Replaces signatures and buckets of recipes from a mapping of
+        recipe id to ingredient ids, with bulk queries for all of them.
+        """
+        minhash = get_minhash()
+        RecipeBucket.objects.filter(recipe_id__in=ingredients).delete()
+        RecipeSignature.objects.filter(recipe_id__in=ingredients).delete()
+        links = np.array([
+            (recipe_id, ingredient_id)
+            for recipe_id, ingredient_ids in sorted(ingredients.items())
+            for ingredient_id in sorted(set(ingredient_ids))
+        ], dtype=np.int64).reshape(-1, 2)
+        if not len(links):
+            return
+        recipes, signatures = minhash.signatures(links[:, 0], links[:, 1])
+        RecipeSignature.objects.bulk_create(
+            RecipeSignature(recipe_id=recipe_id,
+                            signature=minhash.to_bytes(signature))
+            for recipe_id, signature in zip(recipes.tolist(), signatures)
+        )
+        RecipeBucket.objects.bulk_create(
+            RecipeBucket(recipe_id=recipe_id, bucket=bucket)
+            for recipe_id, bucket in zip(
+                np.repeat(recipes, minhash.bands).tolist(),
+                minhash.buckets(signatures).ravel().tolist()
+            )
+        )
+
+    @classmethod
+    def build(cls, batch_size: int = 10_000) -> Iterator[int]:
+        """
+        Replaces signatures and buckets of all recipes, one transaction per
+        batch of recipe ids, yields the number of recipes done.
+        """
+        minhash = get_minhash()
+        writer = TableWriter(batch_size * minhash.bands)
+        last_id = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        done = 0
+        for start in range(0, last_id + 1, batch_size):
+            stop = start + batch_size
+            with transaction.atomic():
+                for model in (RecipeBucket, RecipeSignature):
+                    model.objects.filter(recipe_id__gte=start,
+                                         recipe_id__lt=stop).delete()
+                links = np.array(RecipeIngredient.objects.filter(
+                    recipe_id__gte=start,
+                    recipe_id__lt=stop
+                ).order_by('recipe_id').values_list(
+                    'recipe_id', 'ingredient_id'
+                ), dtype=np.int64).reshape(-1, 2)
+                if not len(links):
+                    continue
+                recipes, signatures = minhash.signatures(links[:, 0],
+                                                         links[:, 1])
+                writer.write(RecipeSignature, ('recipe', 'signature'), (
+                    (recipe_id, minhash.to_bytes(signature))
+                    for recipe_id, signature in zip(recipes.tolist(),
+                                                    signatures)
+                ))
+                writer.write(RecipeBucket, ('recipe', 'bucket'), zip(
+                    np.repeat(recipes, minhash.bands).tolist(),
+                    minhash.buckets(signatures).ravel().tolist()
+                ))
+            done += len(recipes)
+            yield done
+
+    @classmethod
+    def similar(cls, recipe_id: int) -> list[int]:
+        """ Ids of similar recipes, most similar first. """
+        minhash = get_minhash()
+        data = RecipeSignature.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('signature', flat=True).first()
+        if data is None:
+            return []
+        signature = minhash.from_bytes(data)
+        buckets = minhash.buckets(signature[None, :])[0].tolist()
+        # Recipes sharing more bands are more similar, so the cut keeps
+        # the best candidates of crowded buckets.
+        candidates = RecipeBucket.objects.filter(
+            bucket__in=buckets
+        ).exclude(recipe_id=recipe_id).values('recipe_id').annotate(
+            shared=Count('id')
+        ).order_by('-shared').values('recipe_id')
+        rows = RecipeSignature.objects.filter(
+            recipe_id__in=candidates[:settings.SIMILAR_CANDIDATES]
+        ).values_list('recipe_id', 'signature')
+        return cls.rank(minhash, signature, rows)
+
+    @staticmethod
+    def rank(minhash: MinHash, signature: np.ndarray,
+             rows: Sequence[tuple[int, bytes]]) -> list[int]:
+        rows = list(rows)
+        if not rows:
+            return []
+        recipe_ids = np.array([recipe_id for recipe_id, _ in rows])
+        signatures = np.stack([minhash.from_bytes(data) for _, data in rows])
+        similarity = minhash.similarity(signature, signatures)
+        order = np.lexsort((recipe_ids, -similarity))
+        return recipe_ids[order].tolist()
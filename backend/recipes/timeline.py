@@ -0,0 +1,216 @@
+import heapq
+from functools import cached_property
+from itertools import islice
+from typing import Iterable, Iterator, Union
+
+from django.conf import settings
+from django.db import connection
+
+from recipes.models import Recipe, TimelineAuthor, TimelineEntry
+from users.models import Subscription
+
+TIMELINE_TABLE = TimelineEntry._meta.db_table
+RECIPE_TABLE = Recipe._meta.db_table
+SUBSCRIPTION_TABLE = Subscription._meta.db_table
+AUTHOR_TABLE = TimelineAuthor._meta.db_table
+
+
+class Timeline:
+    """
+    Materialized feeds of new recipes by followed authors. Recipes are
+    pushed into the followers' timelines after they are created, recipes
+    of authors with more than `TIMELINE_PULL_FOLLOWERS` followers are not
+    pushed but read at request time and merged. Feeds are ordered by recipe
+    id, newest first, and hold at most `TIMELINE_LENGTH` recipes.
+    """
+
+    PUSH_SQL = (
+        f'INSERT INTO {TIMELINE_TABLE} (user_id, recipe_id, author_id) '
+        f'SELECT subscription.user_id, recipe.id, recipe.author_id '
+        f'FROM {SUBSCRIPTION_TABLE} AS subscription '
+        f'JOIN {RECIPE_TABLE} AS recipe '
+        f'ON recipe.author_id = subscription.author_id '
+        f'WHERE recipe.id = ANY(%s::bigint[]) AND NOT recipe.deleted '
+        f'AND subscription.author_id = %s '
+        f'ON CONFLICT DO NOTHING'
+    )
+    BACKFILL_SQL = (
+        f'INSERT INTO {TIMELINE_TABLE} (user_id, recipe_id, author_id) '
+        f'SELECT %s, id, author_id FROM {RECIPE_TABLE} '
+        f'WHERE author_id = %s AND NOT deleted ORDER BY id DESC LIMIT %s '
+        f'ON CONFLICT DO NOTHING'
+    )
+    FOLLOWERS_BACKFILL_SQL = (
+        f'INSERT INTO {TIMELINE_TABLE} (user_id, recipe_id, author_id) '
+        f'SELECT subscription.user_id, recipe.id, recipe.author_id '
+        f'FROM {SUBSCRIPTION_TABLE} AS subscription '
+        f'JOIN (SELECT id, author_id FROM {RECIPE_TABLE} '
+        f'WHERE author_id = %s AND NOT deleted ORDER BY id DESC LIMIT %s'
+        f') AS recipe ON recipe.author_id = subscription.author_id '
+        f'WHERE subscription.author_id = %s '
+        f'ON CONFLICT DO NOTHING'
+    )
+    AUTHORS_SQL = (
+        f'INSERT INTO {AUTHOR_TABLE} (author_id, followers, pull) '
+        f'SELECT author_id, COUNT(*), COUNT(*) > %s '
+        f'FROM {SUBSCRIPTION_TABLE} GROUP BY author_id '
+        f'ON CONFLICT (author_id) DO UPDATE '
+        f'SET followers = EXCLUDED.followers, pull = EXCLUDED.pull'
+    )
+    REBUILD_SQL = (
+        f'INSERT INTO {TIMELINE_TABLE} (user_id, recipe_id, author_id) '
+        f'SELECT user_id, recipe_id, author_id FROM ('
+        f'SELECT subscription.user_id, recipe.id AS recipe_id, '
+        f'recipe.author_id, ROW_NUMBER() OVER ('
+        f'PARTITION BY subscription.user_id ORDER BY recipe.id DESC'
+        f') AS position '
+        f'FROM {SUBSCRIPTION_TABLE} AS subscription '
+        f'JOIN {RECIPE_TABLE} AS recipe '
+        f'ON recipe.author_id = subscription.author_id '
+        f'WHERE NOT recipe.deleted AND subscription.author_id NOT IN ('
+        f'SELECT author_id FROM {AUTHOR_TABLE} WHERE pull)'
+        f') AS entries WHERE position <= %s '
+        f'ON CONFLICT DO NOTHING'
+    )
+    TRIM_SQL = (
+        f'DELETE FROM {TIMELINE_TABLE} WHERE id IN ('
+        f'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+        f'PARTITION BY user_id ORDER BY recipe_id DESC) AS position '
+        f'FROM {TIMELINE_TABLE}) AS entries WHERE position > %s)'
+    )
+
+    @staticmethod
+    def is_pull_author(followers: int) -> bool:
+        return followers > settings.TIMELINE_PULL_FOLLOWERS
+
+    @classmethod
+    def push_recipe(cls, recipe_id: int) -> int:
+        author_id = Recipe.objects.filter(id=recipe_id).values_list(
+            'author_id', flat=True
+        ).first()
+        if author_id is None:
+            return 0
+        return cls.push_recipes(author_id, [recipe_id])
+
+    @classmethod
+    def push_recipes(cls, author_id: int, recipe_ids: list[int]) -> int:
+        """
+        Pushes recipes of one author with one statement. When the author
+        is no longer pulled, timelines of all followers are backfilled with
+        the latest recipes of the author instead, pulled recipes were never
+        pushed.
+        """
+        followers = Subscription.objects.filter(author_id=author_id).count()
+        pull = cls.is_pull_author(followers)
+        pulled = TimelineAuthor.objects.filter(
+            author_id=author_id
+        ).values_list('pull', flat=True).first()
+        TimelineAuthor.objects.update_or_create(
+            author_id=author_id,
+            defaults={'followers': followers, 'pull': pull}
+        )
+        if pull:
+            return 0
+        with connection.cursor() as cursor:
+            if pulled:
+                cursor.execute(
+                    cls.FOLLOWERS_BACKFILL_SQL,
+                    (author_id, settings.TIMELINE_LENGTH, author_id)
+                )
+            else:
+                cursor.execute(cls.PUSH_SQL, (list(recipe_ids), author_id))
+            return cursor.rowcount
+
+    @classmethod
+    def subscribe(cls, user_id: int, author_id: int) -> int:
+        if TimelineAuthor.objects.filter(author_id=author_id,
+                                         pull=True).exists():
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(cls.BACKFILL_SQL,
+                           (user_id, author_id, settings.TIMELINE_LENGTH))
+            return cursor.rowcount
+
+    @classmethod
+    def unsubscribe(cls, user_id: int, author_id: int) -> int:
+        return TimelineEntry.objects.filter(
+            user_id=user_id,
+            author_id=author_id
+        ).delete()[0]
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """ Refills all timelines from subscriptions in one statement. """
+        with connection.cursor() as cursor:
+            cursor.execute(cls.AUTHORS_SQL,
+                           (settings.TIMELINE_PULL_FOLLOWERS,))
+            cursor.execute(cls.REBUILD_SQL, (settings.TIMELINE_LENGTH,))
+            return cursor.rowcount
+
+    @classmethod
+    def trim(cls) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(cls.TRIM_SQL, (settings.TIMELINE_LENGTH,))
+            return cursor.rowcount
+
+
+class TimelineFeed:
+    """
+    Lazy sequence of recipe ids of one user's feed for the Django paginator.
+    Pushed entries and pulled recipes are both read as index range scans
+    and merged.
+    """
+
+    def __init__(self, user_id: int) -> None:
+        self.user_id = user_id
+        self.length = settings.TIMELINE_LENGTH
+
+    @cached_property
+    def pull_authors(self) -> list[int]:
+        return list(TimelineAuthor.objects.filter(
+            pull=True,
+            author__subscription_target__user_id=self.user_id
+        ).values_list('author_id', flat=True))
+
+    def pushed(self, stop: int) -> Iterable[int]:
+        return TimelineEntry.objects.filter(
+            user_id=self.user_id,
+            recipe__deleted=False
+        ).order_by('-recipe_id').values_list('recipe_id', flat=True)[:stop]
+
+    def pulled(self, stop: int) -> Iterable[int]:
+        return Recipe.objects.filter(
+            author_id__in=self.pull_authors,
+            deleted=False
+        ).order_by('-id').values_list('id', flat=True)[:stop]
+
+    def count(self) -> int:
+        if not self.pull_authors:
+            return self.pushed(self.length).count()
+        # Recipes pushed before their author became pulled are in both.
+        return len(self[:self.length])
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[int, list[int]]:
+        if isinstance(key, int):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = min(key.stop if key.stop is not None else self.length,
+                   self.length)
+        if stop <= start:
+            return []
+        if not self.pull_authors:
+            return list(self.pushed(stop)[start:])
+        merged = heapq.merge(self.pushed(stop), self.pulled(stop),
+                             reverse=True)
+        return list(islice(self.unique(merged), start, stop))
+
+    @staticmethod
+    def unique(ids: Iterable[int]) -> Iterator[int]:
+        previous = None
+        for recipe_id in ids:
+            if recipe_id != previous:
+                yield recipe_id
+            previous = recipe_id
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from core.admin import SoftDeleteAdminMixin
+from recipes.jobs import delete_users
 from recipes.models import (
     Favorite,
     Shopping,
@@ -28,12 +30,13 @@ class SubscriptionInline(admin.TabularInline):
 
 
 @admin.register(FoodgramUser)
-class FoodgramUserAdmin(UserAdmin):
+class FoodgramUserAdmin(SoftDeleteAdminMixin, UserAdmin):
 
     list_display = ('id', 'username', 'email', 'first_name', 'last_name',
-                    'is_active', 'is_staff', 'is_superuser')
+                    'is_active', 'is_staff', 'is_superuser', 'deleted')
     inlines = (FavoriteInline, ShoppingInline, SubscriptionInline)
-    list_filter = ('username', 'email')
+    list_filter = ('deleted', 'username', 'email')
+    soft_delete = staticmethod(delete_users)
     add_fieldsets = (
         (None, {
             'classes': ('wide',),
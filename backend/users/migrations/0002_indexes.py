@@ -0,0 +1,62 @@
+# Generated by Django 3.2.20 on 2026-10-19 09:03
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are created and dropped concurrently, composite indexes
+    # are created before the single column ones they replace are dropped.
+    atomic = False
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='subscription',
+            index=models.Index(fields=['user', 'id'], name='subscription_user_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='subscription',
+            index=models.Index(fields=['author', 'user'], name='subscription_author_idx'),
+        ),
+        migrations.AlterModelOptions(
+            name='foodgramuser',
+            options={'ordering': ('id',), 'verbose_name': 'Пользователь', 'verbose_name_plural': 'Пользователи'},
+        ),
+        migrations.AlterModelOptions(
+            name='subscription',
+            options={'ordering': ('id',), 'verbose_name': 'Подписка пользователя', 'verbose_name_plural': 'Подписки пользователей'},
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='subscription',
+                    name='author',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='subscription_target', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+                ),
+                migrations.AlterField(
+                    model_name='subscription',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='subscription_source', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "users_subscription_author_id_717ab6a7"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "users_subscription_author_id_717ab6a7" '
+                                'ON "users_subscription" ("author_id")',
+                ),
+                migrations.RunSQL(
+                    sql='DROP INDEX CONCURRENTLY IF EXISTS "users_subscription_user_id_d9433bee"',
+                    reverse_sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS "users_subscription_user_id_d9433bee" '
+                                'ON "users_subscription" ("user_id")',
+                ),
+            ],
+        ),
+    ]
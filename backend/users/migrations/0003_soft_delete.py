@@ -0,0 +1,18 @@
+# Generated by Django 3.2.20 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='deleted',
+            field=models.BooleanField(default=False, verbose_name='Deleted status'),
+        ),
+    ]
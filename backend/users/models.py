@@ -101,6 +101,11 @@ class FoodgramUser(AbstractBaseUser,
         default=timezone.now
     )
 
+    deleted = models.BooleanField(
+        verbose_name='Deleted status',
+        default=False
+    )
+
     subscriptions = models.ManyToManyField(
         to='self',
         through='Subscription',
@@ -169,14 +174,16 @@ class Subscription(models.Model, FoodgramModelMixin):
         verbose_name='Пользователь',
         to=FoodgramUser,
         on_delete=models.CASCADE,
-        related_name='subscription_source'
+        related_name='subscription_source',
+        db_index=False,
     )
 
     author = models.ForeignKey(
         verbose_name='Автор',
         to=FoodgramUser,
         on_delete=models.CASCADE,
-        related_name='subscription_target'
+        related_name='subscription_target',
+        db_index=False,
     )
 
     class Meta:
@@ -188,6 +195,16 @@ class Subscription(models.Model, FoodgramModelMixin):
                 name='unique_subscription',
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('user', 'id'),
+                name='subscription_user_idx',
+            ),
+            models.Index(
+                fields=('author', 'user'),
+                name='subscription_author_idx',
+            ),
+        ]
         ordering = ('id',)
 
     def __str__(self) -> str: